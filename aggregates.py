@@ -0,0 +1,140 @@
+"""Streaming aggregators for the Deals page.
+
+Each aggregator consumes deals one block at a time and keeps only constant
+size state, so the Deals page can be rendered from an in-memory sheet (one
+block) or from partitions far larger than RAM (many blocks) the same way.
+"""
+import collections
+
+import numpy as np
+import pandas as pd
+
+
+class StreamingHistogram:
+    """Histogram of at most ``bins`` bins built one block of values at a time
+
+    Given ``value_range``, the min and max of every value that will be added
+    (a pre-pass over the partitions can supply it), every block is binned on
+    the same edges an in-memory build over all values would use. Otherwise
+    the edges start at the first block's min/max. Values beyond them extend
+    the edges on that side only, by whole bin widths and never below 0 when
+    no value is negative; empty bins outside the values seen are dropped, and
+    when more than ``bins`` bins remain, runs of neighbouring bins are merged
+    starting from the side that did not grow. No values are ever dropped and
+    memory stays at ``bins`` counts.
+    """
+
+    def __init__(self, bins=50, value_range=None):
+        self.bins = bins
+        self.edges = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.min = None
+        self.max = None
+        if value_range is not None:
+            self._start(*value_range)
+
+    def _start(self, low, high):
+        self.edges = np.linspace(low, high if high > low else low + 1, self.bins + 1)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.width = self.edges[1] - self.edges[0]
+
+    def _grow(self, low, high):
+        edges, counts, width = self.edges, self.counts, self.width
+        grew_low = low < edges[0]
+        if grew_low:
+            below = edges[0] - width * np.arange(int(np.ceil((edges[0] - low) / width)), 0, -1)
+            # Whole widths can overshoot past 0; data with no negatives starts there
+            if low >= 0:
+                below[0] = max(below[0], 0.0)
+            edges = np.concatenate([below, edges])
+            counts = np.concatenate([np.zeros(len(below), dtype=np.int64), counts])
+        if high > edges[-1]:
+            above = edges[-1] + width * np.arange(1, int(np.ceil((high - edges[-1]) / width)) + 1)
+            edges = np.concatenate([edges, above])
+            counts = np.concatenate([counts, np.zeros(len(above), dtype=np.int64)])
+
+        # Bins wholly outside the values seen so far are empty
+        first = max(0, np.searchsorted(edges, min(low, self.min), side='right') - 1)
+        last = min(len(counts), np.searchsorted(edges, max(high, self.max), side='right'))
+        edges, counts = edges[first:last + 1], counts[first:last]
+
+        if len(counts) > self.bins:
+            factor = int(np.ceil(len(counts) / self.bins))
+            if grew_low:
+                edges, counts = -edges[::-1], counts[::-1]
+            starts = np.arange(0, len(counts), factor)
+            counts = np.add.reduceat(counts, starts)
+            edges = np.append(edges[starts], edges[-1])
+            if grew_low:
+                edges, counts = -edges[::-1], counts[::-1]
+            width *= factor
+
+        self.edges, self.counts, self.width = edges, counts, width
+
+    def add(self, values):
+        values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+
+        low, high = values.min(), values.max()
+        if self.edges is None:
+            self._start(low, high)
+        elif low < self.edges[0] or high > self.edges[-1]:
+            self._grow(low, high)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+        counts, _ = np.histogram(values, bins=self.edges)
+        self.counts += counts
+        return self
+
+    @property
+    def empty(self):
+        return self.edges is None
+
+
+class DealsSummary:
+    """Counts, price totals and distributions behind the Deals page"""
+
+    HISTOGRAMS = {'offer_price': 50, 'final_price': 50, 'loan_rate': 30}
+
+    def __init__(self, ranges=None):
+        ranges = ranges or {}
+        self.total = 0
+        self.has_status = False
+        self.status_counts = collections.Counter()
+        self.mortgage_counts = collections.Counter()
+        self.final_price_sum = 0.0
+        self.final_price_count = 0
+        self.histograms = {column: StreamingHistogram(bins, ranges.get(column))
+                           for column, bins in self.HISTOGRAMS.items()}
+
+    def add(self, deals):
+        """Fold a block of deals into the summary"""
+        self.total += len(deals)
+
+        if 'status' in deals.columns:
+            self.has_status = True
+            self.status_counts.update(deals['status'].value_counts().to_dict())
+        if 'mortgage' in deals.columns:
+            self.mortgage_counts.update(deals['mortgage'].value_counts().to_dict())
+
+        if 'final_price' in deals.columns:
+            final_price = deals['final_price'].to_numpy(dtype='float64', na_value=np.nan)
+            valid = ~np.isnan(final_price)
+            self.final_price_sum += final_price[valid].sum()
+            self.final_price_count += int(valid.sum())
+
+        for column, histogram in self.histograms.items():
+            if column in deals.columns:
+                histogram.add(deals[column])
+        return self
+
+    @property
+    def closed(self):
+        return self.status_counts.get('Closed', 0)
+
+    @property
+    def avg_final_price(self):
+        return self.final_price_sum / self.final_price_count if self.final_price_count else np.nan
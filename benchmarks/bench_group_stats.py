@@ -0,0 +1,83 @@
+"""Benchmark KPICube rollups against the groupby/lambda KPI code they replaced.
+
+    python benchmarks/bench_group_stats.py --rows 1000000 --groups 50000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kpi_cube import KPICube  # noqa: E402
+
+
+def make_deals(rows, groups, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'deal_id': np.arange(rows),
+        'broker_id': rng.integers(0, groups, rows),
+        'property_type': rng.choice(['Apartment', 'Villa', 'Plot', 'Commercial'], rows),
+        'status': rng.choice(['Closed', 'Pending', 'Cancelled'], rows, p=[0.6, 0.25, 0.15])
+    })
+
+
+def broker_lambda(deals):
+    stats = deals.groupby('broker_id').agg({
+        'deal_id': 'count',
+        'status': lambda x: (x == 'Closed').sum()
+    })
+    return stats['status'] / stats['deal_id'] * 100
+
+
+def broker_cube(cube):
+    return cube.rollup('broker_id')['closure_rate']
+
+
+def type_lambda(deals):
+    return deals.groupby('property_type').apply(
+        lambda x: (x['status'] == 'Closed').sum() / len(x) * 100
+    )
+
+
+def type_cube(cube):
+    return cube.rollup('property_type')['closure_rate']
+
+
+def best_of(func, data, repeat):
+    return min(timeit.repeat(lambda: func(data), number=1, repeat=repeat))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--groups', type=int, default=50000, help="Number of distinct brokers")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    deals = make_deals(args.rows, args.groups)
+    # The cube is built once at load time and updated as deals arrive; pages only roll it up
+    build = best_of(KPICube.from_facts, deals, args.repeat)
+    cube = KPICube.from_facts(deals)
+    cases = [
+        ('closure rate per broker', broker_lambda, broker_cube),
+        ('closure rate per property type', type_lambda, type_cube)
+    ]
+
+    print(f"{args.rows:,} deals, {args.groups:,} brokers (best of {args.repeat}), cube built in {build:.3f}s")
+    print(f"{'KPI':<32}{'lambda (s)':>12}{'rollup (s)':>16}{'speedup':>10}")
+    for name, baseline, rollup in cases:
+        # Both implementations must agree before their timings mean anything
+        expected = baseline(deals).sort_index()
+        actual = rollup(cube).reindex(expected.index)
+        np.testing.assert_allclose(expected.to_numpy(dtype='float64'), actual.to_numpy(dtype='float64'))
+        slow = best_of(baseline, deals, args.repeat)
+        fast = best_of(rollup, cube, args.repeat)
+        print(f"{name:<32}{slow:>12.3f}{fast:>16.3f}{slow / fast:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
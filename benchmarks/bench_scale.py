@@ -0,0 +1,246 @@
+"""Benchmark the data pipeline, model training and page data prep at growing scale.
+
+    python benchmarks/bench_scale.py --scales 10000,100000,1000000 --save scale-new.json
+    python benchmarks/bench_scale.py --scales 10000,100000 --baseline scale-old.json
+
+Each scale generates a synthetic workbook (synthetic_data.py) and times the
+stages below, each as an instrumentation span:
+- load_data, cold (Excel parse plus snapshot build) and warm (snapshot). Only
+  up to --excel-max deals, since larger workbooks take minutes just to write.
+- prepare_data, compact_dataframes, the sheet digests, build_deal_facts and
+  prepare_transformed_data.
+- Every RealEstateModels.train_* method, up to --train-max deals.
+- Above --excel-max, ingest_deals streaming the deals from Parquet partitions
+  (synthetic_data.write_partitions) in --chunk-size chunks, the out-of-core
+  path large deal histories take.
+- Each page's data prep and figures. Pages run in Streamlit's bare mode, so
+  nothing is drawn.
+
+The report shows each stage's time at every scale and its scaling exponent,
+the slope of log(time) against log(deals). 1 is linear. With --baseline, it
+also lists the stages that got slower than a saved run by more than
+--threshold.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import streamlit.logger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dashboard  # noqa: E402
+from aggregates import DealsSummary  # noqa: E402
+from changes import frame_digest  # noqa: E402
+from cities import CityNormalizer  # noqa: E402
+from compaction import compact_dataframes  # noqa: E402
+from facts import build_deal_facts  # noqa: E402
+from ingest import DEFAULT_CHUNK_SIZE, ingest_deals  # noqa: E402
+from instrumentation import end_trace, span, start_trace  # noqa: E402
+from kpi_cube import KPICube  # noqa: E402
+from models import TRAINERS, RealEstateModels  # noqa: E402
+from query_store import SQLiteStore  # noqa: E402
+from synthetic_data import generate_workbook, write_partitions, write_workbook  # noqa: E402
+
+DEFAULT_SCALES = '10000,100000,1000000'
+WARMUP_DEALS = 2000
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_scale(deals, args):
+    """Time every stage once at the given number of deals; returns the top-level spans"""
+    sheets = generate_workbook(deals, city_typo_rate=args.city_typo_rate,
+                               status_typo_rate=args.status_typo_rate, seed=args.seed)
+    trace = start_trace(f"{deals} deals")
+    try:
+        with tempfile.TemporaryDirectory(prefix='bench-scale-') as workdir, working_directory(workdir):
+            if deals <= args.excel_max:
+                write_workbook(sheets, dashboard.EXCEL_FILE)
+                with span('load_data (cold)', stage='load'):
+                    dashboard.load_data()
+                with span('load_data (warm)', stage='load'):
+                    sheets = dashboard.load_data()
+
+            normalizer = CityNormalizer(store_path=os.path.join(workdir, 'aliases.json'))
+            with span('prepare_data', stage='prepare'):
+                prepared = dashboard.prepare_data(dict(sheets), normalizer)
+            with span('compact_dataframes', stage='prepare'):
+                prepared, _ = compact_dataframes(prepared)
+            with span('sheet digests', stage='prepare'):
+                digests = {name: frame_digest(df) for name, df in prepared.items()}
+            with span('build_deal_facts', stage='merge'):
+                facts = build_deal_facts(prepared)
+            with span('prepare_transformed_data', stage='prepare'):
+                df_transformed = dashboard.prepare_transformed_data(facts)
+
+            results = {}
+            if deals <= args.train_max:
+                re_models = RealEstateModels(df_transformed, n_jobs=args.jobs)
+                for method in TRAINERS.values():
+                    with span(method, stage='train'):
+                        getattr(re_models, method)()
+                results = re_models.results
+
+            if deals > args.excel_max:
+                partitions = os.path.join(workdir, 'deals')
+                write_partitions(sheets['Deals'], partitions)
+                with span('ingest_deals (partitions)', stage='load'):
+                    ingest_deals(prepared, path=partitions, chunk_size=args.chunk_size, normalizer=normalizer)
+
+            with span('SQLiteStore.sync', stage='query'):
+                store = SQLiteStore(os.path.join(workdir, 'curated.sqlite')).sync(prepared, digests)
+            for page in [dashboard.show_overview, dashboard.show_customers,
+                         dashboard.show_properties, dashboard.show_brokers]:
+                with span(page.__name__, stage='page'):
+                    page(store)
+
+            with span('DealsSummary', stage='groupby'):
+                summary = DealsSummary().add(prepared['Deals'])
+            with span('show_deals', stage='page'):
+                dashboard.show_deals(summary)
+
+            with span('KPICube.from_facts', stage='groupby'):
+                cube = KPICube.from_facts(facts)
+            with span('show_analytics', stage='page'):
+                dashboard.show_analytics(cube)
+
+            # The KPI view of show_predictive_models, without its cache
+            with span('show_kpi_dashboard', stage='page'):
+                kpi_data = dashboard.get_kpi_data.__wrapped__(None, {}, facts)
+                dashboard.show_kpi_dashboard(prepared, facts, cube, kpi_data)
+            for model_key, result in results.items():
+                if 'trendline' in result:
+                    with span(f"performance figures ({model_key})", stage='figure'):
+                        dashboard.get_performance_figures.__wrapped__(None, model_key, result)
+    finally:
+        end_trace()
+    return [row for row in trace.spans if row['depth'] == 0]
+
+
+def current_label():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'working tree'
+
+
+def scaling_exponent(points):
+    """Slope of log(seconds) against log(deals), or None with fewer than two usable points"""
+    points = [(deals, seconds) for deals, seconds in points if seconds > 0]
+    if len(points) < 2:
+        return None
+    deals, seconds = np.log(np.array(points, dtype='float64')).T
+    return float(np.polyfit(deals, seconds, 1)[0])
+
+
+def print_report(results, scales):
+    stages = list(dict.fromkeys(row['stage'] for row in results))
+    times = {(row['deals'], row['stage']): row['seconds'] for row in results}
+    peaks = {(row['deals'], row['stage']): row['rss_peak_mb'] for row in results}
+
+    header = ''.join(f"{deals:>14,}" for deals in scales)
+    print(f"{'stage (seconds)':<48}{header}{'exponent':>10}{'peak RSS MB':>13}")
+    for stage in stages:
+        cells = ''.join(f"{times[(deals, stage)]:>14.3f}" if (deals, stage) in times else f"{'-':>14}"
+                        for deals in scales)
+        exponent = scaling_exponent([(deals, times[(deals, stage)]) for deals in scales if (deals, stage) in times])
+        peak = max((peaks.get((deals, stage)) or 0 for deals in scales), default=0)
+        print(f"{stage:<48}{cells}{(f'{exponent:.2f}' if exponent is not None else '-'):>10}{peak:>13,.0f}")
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Stages slower than the baseline by more than threshold, as (deals, stage, old, new) rows"""
+    old = {(row['deals'], row['stage']): row['seconds'] for row in baseline['results']}
+    regressions = []
+    for row in results:
+        key = (row['deals'], row['stage'])
+        if key in old and row['seconds'] - old[key] > min_seconds and row['seconds'] > old[key] * (1 + threshold):
+            regressions.append((row['deals'], row['stage'], old[key], row['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="Comma-separated deal counts")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per scale; the fastest time per stage is kept")
+    parser.add_argument('--excel-max', type=int, default=100000, help="Largest scale to time load_data at")
+    parser.add_argument('--train-max', type=int, default=100000, help="Largest scale to train models at")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows per chunk when streaming deal partitions")
+    parser.add_argument('--jobs', type=int, default=-1, help="n_jobs for the random forests")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--city-typo-rate', type=float, default=0.3)
+    parser.add_argument('--status-typo-rate', type=float, default=0.01)
+    parser.add_argument('--label', help="Name of this run in saved results (default: git commit)")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Saved results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Slowdown flagged as a regression")
+    parser.add_argument('--min-seconds', type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    # Bare-mode Streamlit warns on every call made outside a running app
+    streamlit.logger.set_log_level('ERROR')
+
+    # One small untimed pass pays the one-off imports and caches up front
+    run_scale(WARMUP_DEALS, args)
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    results = []
+    for deals in scales:
+        start = time.perf_counter()
+        best = {}
+        for _ in range(args.repeat):
+            for row in run_scale(deals, args):
+                if row['span'] not in best or row['seconds'] < best[row['span']]['seconds']:
+                    best[row['span']] = row
+            gc.collect()
+        results.extend({'deals': deals, 'stage': name, 'seconds': row['seconds'],
+                        'rss_peak_mb': row['rss_peak_mb']} for name, row in best.items())
+        print(f"{deals:,} deals: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    print_report(results, scales)
+
+    run = {
+        'label': args.label or current_label(),
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        print(f"\nAgainst {baseline['label']}: {len(regressions)} regressions over {args.threshold:.0%}")
+        for deals, stage, old, new in regressions:
+            print(f"  {deals:>12,}  {stage:<40}{old:>10.3f} -> {new:.3f} s ({new / old:.2f}x)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""Benchmark dashboard worker start-up with deferred against eager heavy imports.
+
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --workbook-dir /path/containing/data
+
+Each measurement runs in a fresh interpreter under ``python -X importtime``, so
+besides wall time it reports the import cost of every top-level package. The
+eager variant imports Plotly and scikit-learn up front, as the dashboard did
+before they were deferred. With ``--workbook-dir`` (a directory holding
+``data/real_estate_curation_project.xlsx``) it also times the first paint of
+the Overview page through Streamlit's AppTest.
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(ROOT, 'dashboard.py')
+
+# What the dashboard imported at start-up before plotting and modelling were deferred
+EAGER_IMPORTS = ['plotly.express', 'plotly.graph_objects', 'plotly.subplots', 'sklearn.model_selection',
+                 'sklearn.preprocessing', 'sklearn.linear_model', 'sklearn.ensemble', 'sklearn.metrics']
+HEAVY_PACKAGES = ['plotly', 'sklearn', 'scipy', 'statsmodels']
+
+BOOT = "import dashboard, models"
+FIRST_PAINT = f"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({DASHBOARD!r}, default_timeout=600)
+at.run()
+elapsed = time.perf_counter() - start
+sys.path.insert(0, {ROOT!r})
+import lazy_imports
+print(json.dumps({{
+    'seconds': elapsed,
+    'exception': bool(at.exception),
+    'loaded': sorted({{name.split('.')[0] for name in sys.modules}} & set({HEAVY_PACKAGES!r})),
+    'deferred': lazy_imports.import_report()
+}}))
+"""
+
+
+def run(statement, eager, cwd):
+    """Run statement in a fresh interpreter; returns wall seconds, package import seconds and stdout"""
+    if eager:
+        statement = ''.join(f"import {name}\n" for name in EAGER_IMPORTS) + statement
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    # importtime lines read "import time: self [us] | cumulative | module"
+    packages = collections.Counter()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(own) / 1e6
+    return wall, packages, proc.stdout
+
+
+def measure(statement, eager, cwd, repeat):
+    runs = [run(statement, eager, cwd) for _ in range(repeat)]
+    wall = statistics.median(wall for wall, _, _ in runs)
+    return wall, runs[-1][1], runs[-1][2]
+
+
+def print_packages(packages, top):
+    print(f"  {'package':<24}{'import (s)':>12}")
+    for name, seconds in packages.most_common(top):
+        print(f"  {name:<24}{seconds:>12.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=12, help="Packages listed in the import report")
+    parser.add_argument('--workbook-dir', help="Directory containing data/real_estate_curation_project.xlsx")
+    args = parser.parse_args(argv)
+
+    print(f"Worker boot (median of {args.repeat} fresh interpreters)")
+    boot = {}
+    for label, eager in [('eager', True), ('deferred', False)]:
+        wall, packages, _ = measure(BOOT, eager, ROOT, args.repeat)
+        boot[label] = wall
+        heavy = sum(packages[name] for name in HEAVY_PACKAGES)
+        print(f"{label:<10}{wall:>8.3f} s   plotting/ML imports {heavy:.3f} s")
+        print_packages(packages, args.top)
+    print(f"boot speedup {boot['eager'] / boot['deferred']:.2f}x")
+
+    if args.workbook_dir:
+        print(f"\nOverview first paint (median of {args.repeat})")
+        paint = {}
+        for label, eager in [('eager', True), ('deferred', False)]:
+            wall, _, stdout = measure(FIRST_PAINT, eager, args.workbook_dir, args.repeat)
+            result = json.loads(stdout.strip().splitlines()[-1])
+            if result['exception']:
+                raise RuntimeError("dashboard raised during the first run")
+            # Eager imports run before the script, so compare whole processes
+            paint[label] = wall
+            print(f"{label:<10}{wall:>8.3f} s   script run {result['seconds']:.3f} s   "
+                  f"loaded: {', '.join(result['loaded']) or 'none'}")
+            for name, seconds in result['deferred']:
+                print(f"  deferred {name:<28}{seconds:>8.3f} s")
+        print(f"first paint speedup {paint['eager'] / paint['deferred']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
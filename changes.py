@@ -0,0 +1,270 @@
+"""Change detection and incremental refresh of the dashboard's derived data.
+
+Every reload fingerprints each sheet by content (a hash per row, combined
+into a hash per sheet) and each deal partition by file hash. Only sheets
+whose content changed are cleaned and compacted again. The deal fact table,
+the KPI cube and the Deals summary are rebuilt only when a sheet they depend
+on changed; when the only change is deals appended to the end of the Deals
+sheet, or new deal partitions, just the new rows are joined and folded into
+the existing aggregates. Models live in the registry under a fingerprint of
+their training data, so they retrain only when that data changes.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DealsSummary
+from dimensions import DealLookup, build_dimension_indexes
+from facts import build_deal_facts
+from ingest import has_partitions, ingest_deals, partition_files
+from kpi_cube import KPICube
+from snapshot import file_digest
+
+# Sheets the deal fact table is built from
+FACT_SHEETS = ['Deals', 'Properties', 'Customers', 'Brokers', 'PropertyDetails']
+DIMENSION_SHEETS = [name for name in FACT_SHEETS if name != 'Deals']
+
+
+def row_hashes(df):
+    """Per-row content hashes, independent of the index, integer widths and category order"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def frame_digest(df, hashes=None):
+    """Content hash of a sheet: its column names plus every row"""
+    hashes = row_hashes(df) if hashes is None else hashes
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(hashes.tobytes())
+    return digest.hexdigest()
+
+
+def combined_digest(digests, names):
+    """Version token for an artifact built from the named sheets"""
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(f"{name}={digests.get(name)};".encode())
+    return digest.hexdigest()[:16]
+
+
+def is_append(old_hashes, new_hashes):
+    """True if new_hashes is old_hashes with extra rows at the end"""
+    return (old_hashes is not None and len(new_hashes) > len(old_hashes)
+            and np.array_equal(new_hashes[:len(old_hashes)], old_hashes))
+
+
+def append_rows(old, new):
+    """Concatenate new rows to old ones, keeping categorical columns categorical"""
+    combined = pd.concat([old, new])
+    for col in old.columns:
+        if isinstance(old[col].dtype, pd.CategoricalDtype) and not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = combined[col].astype('category')
+    return combined
+
+
+class ChangeTracker:
+    """Remembers what the last reload built so the next one only redoes what changed
+
+    One tracker is shared by every session; its methods return the current
+    artifacts, refreshing them first when the sheets they depend on changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.version = None
+        self.dataframes = None
+        self.memory_report = None
+        self.changes = {}
+        self.facts_version = None
+        self.dimensions_version = None
+        self._raw_digests = {}
+        self._digests = {}
+        self._hashes = {}
+        self._report_rows = {}
+        self._facts = None
+        self._cube = None
+        self._summary = None
+        self._partitions = None
+        self._partition_digests = {}
+
+    @property
+    def digests(self):
+        """Content digest of every current (cleaned) sheet"""
+        return dict(self._digests)
+
+    @property
+    def row_hashes(self):
+        """Per-row content hashes of every current (cleaned) sheet"""
+        return dict(self._hashes)
+
+    def sheets(self, version, load, prepare):
+        """Cleaned sheets and memory report for version, re-preparing only changed sheets
+
+        ``load`` returns the raw sheets; ``prepare`` cleans and compacts a dict
+        of sheets and returns them with a per-sheet memory report.
+        """
+        with self._lock:
+            if version == self.version and self.dataframes is not None:
+                return self.dataframes, self.memory_report
+
+            raw = load()
+            if raw is None:
+                return None, None
+
+            raw_digests = {name: frame_digest(df) for name, df in raw.items()}
+            changed = {name: df for name, df in raw.items()
+                       if raw_digests[name] != self._raw_digests.get(name)}
+            prepared, report = prepare(changed) if changed else ({}, None)
+            if report is not None:
+                for row in report.to_dict('records'):
+                    self._report_rows[row['Dataset']] = row
+
+            dataframes = {}
+            changes = {}
+            for name in raw:
+                if name in prepared:
+                    dataframes[name] = prepared[name]
+                    hashes = row_hashes(dataframes[name])
+                    if name not in self._raw_digests:
+                        changes[name] = 'added'
+                    elif is_append(self._hashes.get(name), hashes):
+                        changes[name] = f"{len(hashes) - len(self._hashes[name]):,} rows appended"
+                    else:
+                        changes[name] = 'changed'
+                    self._hashes[name] = hashes
+                    self._digests[name] = frame_digest(dataframes[name], hashes)
+                else:
+                    dataframes[name] = self.dataframes[name]
+                    changes[name] = 'unchanged'
+            for name in set(self._raw_digests) - set(raw):
+                changes[name] = 'removed'
+                self._hashes.pop(name, None)
+                self._digests.pop(name, None)
+                self._report_rows.pop(name, None)
+
+            self._raw_digests = raw_digests
+            self.version = version
+            self.dataframes = dataframes
+            self.memory_report = pd.DataFrame([self._report_rows[name] for name in raw if name in self._report_rows])
+            self.changes = changes
+            self.facts_version = combined_digest(self._digests, FACT_SHEETS)
+            self.dimensions_version = combined_digest(self._digests, DIMENSION_SHEETS)
+            return self.dataframes, self.memory_report
+
+    def _appended_deals(self, previous):
+        """The Deals rows added since previous was built, or None if it must be rebuilt"""
+        if previous is None or previous['dimensions'] != self.dimensions_version or 'Deals' not in self._hashes:
+            return None
+        hashes = self._hashes['Deals']
+        if not is_append(previous['hashes'], hashes):
+            return None
+        return self.dataframes['Deals'].iloc[len(previous['hashes']):]
+
+    def deal_facts(self):
+        """Deal fact table for the current sheets"""
+        with self._lock:
+            previous = self._facts
+            if previous is not None and previous['version'] == self.facts_version:
+                return previous['facts']
+
+            new_deals = self._appended_deals(previous)
+            if new_deals is not None:
+                sheets = dict(self.dataframes, Deals=new_deals)
+                new_facts = build_deal_facts(sheets, DealLookup(sheets, indexes=previous['indexes']))
+                facts = append_rows(previous['facts'], new_facts)
+                indexes = previous['indexes']
+            else:
+                new_facts = None
+                indexes = build_dimension_indexes(self.dataframes)
+                facts = build_deal_facts(self.dataframes, DealLookup(self.dataframes, indexes=indexes))
+
+            self._facts = {
+                'version': self.facts_version,
+                'dimensions': self.dimensions_version,
+                'hashes': self._hashes.get('Deals'),
+                'indexes': indexes,
+                'facts': facts,
+                # Lets the cube fold in just these rows
+                'appended': (previous['version'], new_facts) if new_facts is not None else None
+            }
+            return facts
+
+    def kpi_cube(self):
+        """KPI cube over the deal fact table"""
+        with self._lock:
+            facts = self.deal_facts()
+            previous = self._cube
+            if previous is not None and previous['version'] == self.facts_version:
+                return previous['cube']
+
+            appended = self._facts['appended']
+            if previous is not None and appended is not None and appended[0] == previous['version']:
+                cube = previous['cube'].copy().update(appended[1])
+            else:
+                cube = KPICube.from_facts(facts)
+
+            self._cube = {'version': self.facts_version, 'cube': cube}
+            return cube
+
+    def _partition_digest(self, path):
+        """Content hash of a partition, rehashed only when its mtime or size moved"""
+        stat = os.stat(path)
+        token = f"{stat.st_mtime_ns}-{stat.st_size}"
+        cached = self._partition_digests.get(path)
+        if cached is None or cached[0] != token:
+            cached = (token, file_digest(path))
+            self._partition_digests[path] = cached
+        return cached[1]
+
+    def deal_aggregates(self, normalizer=None):
+        """Deals summary and KPI cube, streamed from the deal partitions when there are any"""
+        with self._lock:
+            if has_partitions():
+                return self._partition_aggregates(normalizer)
+            if 'Deals' not in self.dataframes:
+                return None, None
+
+            previous = self._summary
+            if previous is None or previous['version'] != self.facts_version:
+                new_deals = self._appended_deals(previous)
+                if new_deals is not None:
+                    summary = copy.deepcopy(previous['summary']).add(new_deals)
+                else:
+                    summary = DealsSummary().add(self.dataframes['Deals'])
+                self._summary = previous = {
+                    'version': self.facts_version,
+                    'dimensions': self.dimensions_version,
+                    'hashes': self._hashes['Deals'],
+                    'summary': summary
+                }
+            return previous['summary'], self.kpi_cube()
+
+    def _partition_aggregates(self, normalizer):
+        files = partition_files()
+        digests = {path: self._partition_digest(path) for path in files}
+        previous = self._partitions
+        if previous is not None and previous['digests'] == digests and previous['dimensions'] == self.dimensions_version:
+            return previous['summary'], previous['cube']
+
+        # New partitions next to unchanged ones are folded into the existing aggregates
+        if (previous is not None and previous['dimensions'] == self.dimensions_version
+                and all(digests.get(path) == digest for path, digest in previous['digests'].items())):
+            new_files = [path for path in files if path not in previous['digests']]
+            summary, cube = ingest_deals(self.dataframes, files=new_files, normalizer=normalizer,
+                                         summary=copy.deepcopy(previous['summary']),
+                                         cube=previous['cube'].copy() if previous['cube'] is not None else None)
+        else:
+            summary, cube = ingest_deals(self.dataframes, files=files, normalizer=normalizer)
+
+        self._partitions = {
+            'digests': digests,
+            'dimensions': self.dimensions_version,
+            'summary': summary,
+            'cube': cube
+        }
+        return summary, cube
@@ -0,0 +1,197 @@
+"""Server-side reduction of chart data.
+
+Histograms and box plots are computed here with NumPy and handed to Plotly
+as finished geometry (bin counts, or quartiles, whiskers and a bounded sample
+of outliers), and scatters are capped at a point budget (a density-preserving
+sample, or a binned heatmap for very large inputs), so the page payload stays
+the same size however many rows are plotted.
+"""
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from lazy_imports import lazy_import
+
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+# Outlier points drawn per box; the rest are summarized by the whiskers
+MAX_OUTLIERS = 200
+
+# Points drawn per scatter, and the size above which a scatter becomes a heatmap
+DEFAULT_POINT_BUDGET = 5000
+HEATMAP_MIN_POINTS = 200000
+
+
+def _finite(values):
+    values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def histogram_bins(values, bins=50):
+    """Bin edges and counts of the finite values"""
+    values = _finite(values)
+    if len(values) == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    counts, edges = np.histogram(values, bins=bins)
+    return edges, counts
+
+
+def histogram_trace(edges, counts, name=None, **kwargs):
+    """Bar trace drawing pre-binned counts as a histogram"""
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=name, **kwargs)
+
+
+def binned_histogram_figure(edges, counts, title=None, x_label=None, y_label='count', color=None):
+    """Histogram drawn from bin edges and counts computed elsewhere (e.g. by a query store)"""
+    fig = go.Figure(histogram_trace(edges, counts, marker_color=color))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, bargap=0)
+    return fig
+
+
+@timed('histogram_figure', stage='figure')
+def histogram_figure(values, bins=50, title=None, x_label=None, y_label='count', color=None):
+    """Histogram of values, binned on the server"""
+    edges, counts = histogram_bins(values, bins)
+    return binned_histogram_figure(edges, counts, title, x_label, y_label, color)
+
+
+def box_stats(values, max_outliers=MAX_OUTLIERS, seed=0):
+    """Quartiles, Tukey whiskers, mean and a sample of the outliers, or None if empty"""
+    values = _finite(values)
+    if len(values) == 0:
+        return None
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+    outliers = values[~inside]
+    if len(outliers) > max_outliers:
+        # Keep the extremes so the axis range matches the full data
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(len(outliers), max_outliers - 2, replace=False)
+        outliers = np.concatenate([[outliers.min(), outliers.max()], outliers[sample]])
+
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        # Whiskers end at the most extreme points inside the fences, as Plotly draws them
+        'lowerfence': values[inside].min(),
+        'upperfence': values[inside].max(),
+        'mean': values.mean(),
+        'count': len(values),
+        'outliers': outliers
+    }
+
+
+def grouped_box_stats(groups, values, max_outliers=MAX_OUTLIERS):
+    """box_stats per group, in order of first appearance"""
+    codes, uniques = pd.factorize(pd.Series(groups))
+    values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    stats = {}
+    for code, group in enumerate(uniques):
+        group_stats = box_stats(values[order[bounds[code]:bounds[code + 1]]], max_outliers)
+        if group_stats is not None:
+            stats[group] = group_stats
+    return stats
+
+
+def box_stats_figure(group_stats, title=None, x_label=None, y_label=None):
+    """Box plot per group drawn from box_stats results, one colour per group"""
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, (group, stats) in enumerate(group_stats.items()):
+        color = colors[i % len(colors)]
+        name = str(group)
+        fig.add_trace(go.Box(
+            x=[name], name=name, legendgroup=name, marker_color=color,
+            q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+            lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']],
+            mean=[stats['mean']], boxpoints=False
+        ))
+        if len(stats['outliers']):
+            fig.add_trace(go.Scatter(
+                x=[name] * len(stats['outliers']), y=stats['outliers'], mode='markers',
+                legendgroup=name, showlegend=False, marker=dict(color=color, size=4)
+            ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, legend_title_text=x_label)
+    return fig
+
+
+@timed('box_figure', stage='figure')
+def box_figure(groups, values, title=None, x_label=None, y_label=None, max_outliers=MAX_OUTLIERS):
+    """Box plot per group drawn from precomputed statistics, one colour per group"""
+    return box_stats_figure(grouped_box_stats(groups, values, max_outliers), title, x_label, y_label)
+
+
+def _grid_cells(values, cells):
+    low, high = values.min(), values.max()
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    return np.minimum(((values - low) / (high - low) * cells).astype(np.int64), cells - 1)
+
+
+def sample_points(x, y, budget=DEFAULT_POINT_BUDGET, seed=0):
+    """Positions of about budget finite (x, y) points, sampled so the density is preserved
+
+    Points are bucketed on a grid and each occupied cell keeps a share of the
+    budget proportional to its count, but never less than one point, so sparse
+    regions and outliers stay visible.
+    """
+    x = pd.Series(x).to_numpy(dtype='float64', na_value=np.nan)
+    y = pd.Series(y).to_numpy(dtype='float64', na_value=np.nan)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(valid) <= budget:
+        return valid
+
+    cells = max(1, int(np.sqrt(budget / 2)))
+    cell = _grid_cells(x[valid], cells) * cells + _grid_cells(y[valid], cells)
+    counts = np.bincount(cell, minlength=cells * cells)
+    occupied = np.count_nonzero(counts)
+    quota = np.minimum(counts, 1 + counts * max(budget - occupied, 0) // len(valid))
+
+    # Rank points within their cell in random order and keep each cell's quota
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(len(valid))
+    order = shuffled[np.argsort(cell[shuffled], kind='stable')]
+    sorted_cells = cell[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_cells, sorted_cells, side='left')
+    return np.sort(valid[order[rank < quota[sorted_cells]]])
+
+
+def density_heatmap(x, y, bins=100):
+    """2-D histogram of the finite (x, y) points as a heatmap trace"""
+    x = pd.Series(x).to_numpy(dtype='float64', na_value=np.nan)
+    y = pd.Series(y).to_numpy(dtype='float64', na_value=np.nan)
+    valid = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+    return go.Heatmap(x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+                      z=np.where(counts.T > 0, counts.T, np.nan), colorscale='Blues',
+                      colorbar=dict(title='Points'))
+
+
+@timed('scatter_figure', stage='figure')
+def scatter_figure(x, y, title=None, x_label=None, y_label=None, budget=DEFAULT_POINT_BUDGET,
+                   heatmap_above=HEATMAP_MIN_POINTS, color=None, color_scale=None, opacity=None):
+    """Scatter of at most budget points, or a density heatmap above heatmap_above points"""
+    x = pd.Series(x).to_numpy(dtype='float64', na_value=np.nan)
+    y = pd.Series(y).to_numpy(dtype='float64', na_value=np.nan)
+    total = int(np.count_nonzero(np.isfinite(x) & np.isfinite(y)))
+
+    if heatmap_above is not None and total > heatmap_above:
+        fig = go.Figure(density_heatmap(x, y))
+        fig.update_layout(title=f"{title} ({total:,} points, binned)" if title else None,
+                          xaxis_title=x_label, yaxis_title=y_label)
+        return fig
+
+    keep = sample_points(x, y, budget)
+    if title and len(keep) < total:
+        title = f"{title} ({len(keep):,} of {total:,} points)"
+    labels = {axis: label for axis, label in [('x', x_label), ('y', y_label), ('color', y_label)] if label}
+    fig = px.scatter(x=x[keep], y=y[keep], title=title, labels=labels,
+                     color=np.asarray(color)[keep] if color is not None else None,
+                     color_continuous_scale=color_scale, opacity=opacity)
+    return fig
@@ -0,0 +1,189 @@
+"""City name normalization.
+
+Raw city values are factorized first, so stripping, title-casing, alias
+lookup and the optional fuzzy match run once per distinct value rather than
+once per row. The results are cached on the normalizer and reused across
+sheets and reloads, and the codes are then mapped back to the rows as a
+categorical column.
+
+Spellings that are neither canonical nor a known alias are kept as they
+are. With fuzzy matching turned on they are instead resolved by CityResolver
+against the canonical list and memoized in a persistent alias store. Only
+turn it on with a complete canonical list: a real city missing from the list
+would otherwise be rewritten to its nearest neighbour ('Raipur' to
+'Jaipur'). Extra aliases and canonical names, and the fuzzy switch, are read
+from ``data/city_aliases.json``:
+
+    {"aliases": {"Bombay": "Mumbai"}, "canonical": ["Lucknow"], "fuzzy": true}
+"""
+import collections
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+ALIAS_FILE = 'data/city_aliases.json'
+ALIAS_STORE = '.cache/city_alias_store.json'
+
+DEFAULT_CITY_ALIASES = {
+    'Surrat': 'Surat', 'Chennnai': 'Chennai', 'Kalkata': 'Kolkata',
+    'Calcutta': 'Kolkata', 'Mumbay': 'Mumbai', 'Mumbaai': 'Mumbai',
+    'Bengluru': 'Bengaluru', 'Poona': 'Pune', 'Jaypur': 'Jaipur',
+    'Ahemdabad': 'Ahmedabad', 'Dehli': 'Delhi', 'New Delhi': 'Delhi',
+    'Nodia': 'Noida', 'Hyderbad': 'Hyderabad', 'Gurugram': 'Gurgaon'
+}
+
+
+def ngrams(text, n=3):
+    """Character n-grams of text, padded so short names still produce grams"""
+    padded = f"^{text}$"
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class CityResolver:
+    """Resolves unseen spellings to canonical cities through a character n-gram index
+
+    Candidates are the canonical names sharing the most n-grams with the
+    spelling; the closest one by edit distance wins if it is within
+    max_distance_ratio of the name's length. Every resolution, including "no
+    match", is memoized in a persistent alias store so each spelling is only
+    ever resolved once. The store records a hash of the canonical list it was
+    learned against and is discarded when the list changes.
+    """
+
+    def __init__(self, canonical, n=3, max_distance_ratio=0.25, candidates=5, store_path=ALIAS_STORE):
+        self.canonical = sorted(canonical)
+        self.n = n
+        self.max_distance_ratio = max_distance_ratio
+        self.candidates = candidates
+        self.store_path = store_path
+
+        self._index = collections.defaultdict(list)
+        for position, name in enumerate(self.canonical):
+            for gram in ngrams(name.lower(), n):
+                self._index[gram].append(position)
+
+        self.canonical_digest = hashlib.sha256(json.dumps(self.canonical).encode()).hexdigest()[:16]
+        self.learned = self._load_store()
+        self._dirty = False
+
+    def _load_store(self):
+        if not self.store_path or not os.path.exists(self.store_path):
+            return {}
+        try:
+            with open(self.store_path) as f:
+                store = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Resolutions learned against another canonical list may now be wrong
+        if not isinstance(store, dict) or store.get('canonical') != self.canonical_digest:
+            return {}
+        return store.get('aliases', {})
+
+    def save(self):
+        """Persist newly learned aliases; a read-only store is silently skipped"""
+        if not self._dirty or not self.store_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.store_path) or '.', exist_ok=True)
+            tmp_path = self.store_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'canonical': self.canonical_digest, 'aliases': self.learned}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.store_path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def resolve(self, name):
+        """Canonical city for name, or name itself when nothing is close enough"""
+        if name in self.learned:
+            return self.learned[name]
+
+        key = name.lower()
+        shared = collections.Counter()
+        for gram in ngrams(key, self.n):
+            shared.update(self._index.get(gram, ()))
+
+        limit = max(1, int(len(key) * self.max_distance_ratio))
+        best, best_distance = name, limit + 1
+        for position, _ in shared.most_common(self.candidates):
+            candidate = self.canonical[position]
+            distance = edit_distance(key, candidate.lower(), limit)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+
+        self.learned[name] = best
+        self._dirty = True
+        return best
+
+
+class CityNormalizer:
+    """Maps raw city values to canonical names, caching the result per distinct value"""
+
+    def __init__(self, aliases=None, canonical=None, fuzzy=False, store_path=ALIAS_STORE):
+        self.aliases = dict(DEFAULT_CITY_ALIASES)
+        self.aliases.update({key.strip().title(): value for key, value in (aliases or {}).items()})
+        self.canonical = set(self.aliases.values()) | set(canonical or [])
+        self.resolver = CityResolver(self.canonical, store_path=store_path) if fuzzy else None
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, path=ALIAS_FILE, **kwargs):
+        """Default aliases extended with the alias file, if it exists"""
+        config = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                config = json.load(f)
+        kwargs.setdefault('fuzzy', config.get('fuzzy', False))
+        return cls(aliases=config.get('aliases'), canonical=config.get('canonical'), **kwargs)
+
+    def save(self):
+        """Persist aliases learned by the fuzzy resolver"""
+        if self.resolver is not None:
+            self.resolver.save()
+
+    def normalize_value(self, raw):
+        """Canonical name for one raw value"""
+        if raw in self._cache:
+            return self._cache[raw]
+
+        if not isinstance(raw, str):
+            return raw
+        name = raw.strip().title()
+        name = self.aliases.get(name, name)
+        if self.resolver is not None and name not in self.canonical:
+            name = self.resolver.resolve(name)
+
+        self._cache[raw] = name
+        return name
+
+    def normalize(self, series):
+        """Normalize a column of city names, doing the work once per distinct value"""
+        codes, uniques = pd.factorize(series)
+        normalized = [self.normalize_value(value) for value in uniques]
+
+        # Several raw spellings can share a canonical name, so re-code the names
+        name_codes, names = pd.factorize(pd.Series(normalized, dtype=object))
+        row_codes = np.full(len(codes), -1, dtype=np.intp)
+        valid = codes >= 0
+        row_codes[valid] = name_codes[codes[valid]]
+        values = pd.Categorical.from_codes(row_codes, categories=names)
+        return pd.Series(values, index=series.index, name=series.name)
@@ -0,0 +1,106 @@
+"""Schema-driven dtype compaction for the cleaned sheets.
+
+Sheets come out of the workbook as float64/object columns. After cleaning,
+repeated strings become categoricals, IDs and counts the smallest integer
+type that holds them, scores and rates float32, and Yes/No amenity flags
+bool. Prices and incomes stay float64 so money keeps full precision.
+"""
+import numpy as np
+import pandas as pd
+
+# Column kind for every known column; unknown columns are inferred
+SCHEMA = {
+    'city': 'category',
+    'status': 'category',
+    'segment': 'category',
+    'property_type': 'category',
+    'agency': 'category',
+    'mortgage': 'category',
+    'condition': 'category',
+    'bedrooms': 'count',
+    'bathrooms': 'count',
+    'experience_years': 'count',
+    'year_built': 'count',
+    'rating': 'score',
+    'school_score': 'score',
+    'walk_score': 'score',
+    'loan_rate': 'score'
+}
+
+# Strings with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+YES_NO = {'Yes', 'No'}
+
+
+def _is_string(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series)
+
+
+def _to_category(series):
+    return series.astype('category')
+
+
+def _to_smallest_int(series):
+    """Smallest integer dtype, or the series unchanged if it has gaps or fractions"""
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    if series.isna().any():
+        return series
+    values = series.to_numpy()
+    if values.dtype.kind == 'f' and not np.array_equal(values, np.floor(values)):
+        return series
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _to_float32(series):
+    if not pd.api.types.is_numeric_dtype(series):
+        return series
+    return series.astype('float32')
+
+
+def _infer_kind(name, series):
+    if name.endswith('_id'):
+        return 'count'
+    if _is_string(series):
+        values = set(series.dropna().unique())
+        if values and values <= YES_NO and not series.isna().any():
+            return 'flag'
+        if len(series) and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+            return 'category'
+    return None
+
+
+def compact_frame(df):
+    """Return a copy of df with compact dtypes"""
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        kind = SCHEMA.get(name) or _infer_kind(name, series)
+        if kind == 'category' and _is_string(series):
+            series = _to_category(series)
+        elif kind == 'count':
+            series = _to_smallest_int(series)
+        elif kind == 'score':
+            series = _to_float32(series)
+        elif kind == 'flag':
+            series = series == 'Yes'
+        columns[name] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def compact_dataframes(dataframes):
+    """Compact every sheet, returning the new sheets and a per-sheet memory report"""
+    compacted = {}
+    report = []
+    for name, df in dataframes.items():
+        before = df.memory_usage(deep=True).sum()
+        compacted[name] = compact_frame(df)
+        after = compacted[name].memory_usage(deep=True).sum()
+        report.append({
+            'Dataset': name,
+            'Before (MB)': before / 1e6,
+            'After (MB)': after / 1e6,
+            'Reduction': before / after if after else np.nan
+        })
+    return compacted, pd.DataFrame(report)
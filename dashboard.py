@@ -1,12 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
+from lazy_imports import lazy_import
+from chart_data import (binned_histogram_figure, box_figure, box_stats_figure, histogram_figure, histogram_trace,
+                        scatter_figure)
+from instrumentation import current_trace, end_trace, span, start_trace
 import warnings
 warnings.filterwarnings('ignore')
 
+# Plotly is imported the first time a page draws a chart
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
 # Page configuration
 st.set_page_config(
     page_title="Real Estate Analytics Dashboard",
@@ -29,12 +34,53 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-@st.cache_data(show_spinner="Loading data...")
-def load_data():
+EXCEL_FILE = 'data/real_estate_curation_project.xlsx'
+
+# Most points each scatter sends to the browser; larger inputs are downsampled
+SCATTER_POINT_BUDGETS = {
+    'amenity': 3000,
+    'prediction': 5000,
+    'residuals': 5000
+}
+
+# Set to 1 (or open the app with ?dev=1) for the developer performance panel
+DEV_PANEL_ENV = 'DASHBOARD_DEV_PANEL'
+# Spans kept per session for the panel's download
+DEV_PANEL_MAX_SPANS = 5000
+
+# Page name -> the function that renders it, as spans are named
+PAGE_FUNCTIONS = {
+    "Overview": 'show_overview',
+    "Customers": 'show_customers',
+    "Properties": 'show_properties',
+    "Brokers": 'show_brokers',
+    "Deals": 'show_deals',
+    "Analytics": 'show_analytics',
+    "Predictive Models": 'show_predictive_models'
+}
+
+PREDICTIVE_VIEWS = ["KPI Dashboard", "Model Comparison", "Price Prediction",
+                    "Feature Importance", "Deal Status Prediction", "Model Performance"]
+
+def get_data_version():
+    """Cheap version token for the workbook and deal partitions, used to key cached data"""
+    import os
+    from ingest import partition_files
+    try:
+        stat = os.stat(EXCEL_FILE)
+    except OSError:
+        return None
+    version = f"{stat.st_mtime_ns}-{stat.st_size}"
+    for path in partition_files():
+        stat = os.stat(path)
+        version += f"|{path}:{stat.st_mtime_ns}-{stat.st_size}"
+    return version
+
+def load_data(data_version=None):
     """Load and process data from Excel file"""
     import os
     try:
-        excel_file = 'data/real_estate_curation_project.xlsx'
+        excel_file = EXCEL_FILE
         
         # Check if file exists
         if not os.path.exists(excel_file):
@@ -46,8 +92,10 @@ def load_data():
                 st.error("data/ folder not found!")
             return None
         
-        # Load Excel file
-        dataframes = pd.read_excel(excel_file, sheet_name=None, engine='openpyxl')
+        # Load from the columnar snapshot, parsing the workbook only when it changed
+        from snapshot import load_workbook
+        with span('load_data', stage='load'):
+            dataframes = load_workbook(excel_file)
         return dataframes
     except Exception as e:
         st.error(f"Error loading data: {e}")
@@ -55,30 +103,90 @@ def load_data():
         st.code(traceback.format_exc())
         return None
 
-def clean_city_names(df, city_mapping):
+@st.cache_resource
+def get_change_tracker():
+    """Shared tracker of sheet and partition content, so reloads only rebuild what changed"""
+    from changes import ChangeTracker
+    return ChangeTracker()
+
+def prepare_sheets(dataframes):
+    """Clean and dtype-compact sheets, returning them with their memory report"""
+    from compaction import compact_dataframes
+    with span('prepare_data', stage='prepare'):
+        dataframes = prepare_data(dataframes)
+    with span('compact_dataframes', stage='prepare'):
+        return compact_dataframes(dataframes)
+
+def get_prepared_data(data_version):
+    """Cleaned, dtype-compacted sheets and their memory report, shared read-only per data version"""
+    tracker = get_change_tracker()
+    if tracker.version == data_version and tracker.dataframes is not None:
+        return tracker.dataframes, tracker.memory_report
+    with st.spinner("Loading data..."):
+        return tracker.sheets(data_version, lambda: load_data(data_version), prepare_sheets)
+
+@st.cache_resource
+def get_sql_store():
+    """On-disk SQL store of the cleaned sheets, shared by every session and worker"""
+    from query_store import SQLiteStore
+    return SQLiteStore()
+
+def get_query_store(dataframes):
+    """SQL store synced to the current sheets, or an in-memory store if it cannot be written"""
+    import sqlite3
+    from query_store import FrameStore
+    try:
+        with span('sync SQL store', stage='query'):
+            tracker = get_change_tracker()
+            return get_sql_store().sync(dataframes, tracker.digests, tracker.row_hashes)
+    except (sqlite3.Error, OSError):
+        return FrameStore(dataframes)
+
+@st.cache_resource
+def get_city_normalizer():
+    """City normalizer whose per-value cache is shared by every reload"""
+    from cities import CityNormalizer
+    return CityNormalizer.from_file()
+
+def clean_city_names(df, normalizer):
     """Standardize city names"""
     if 'city' in df.columns:
-        df['city'] = df['city'].str.strip().str.title()
-        df['city'] = df['city'].replace(city_mapping)
+        df['city'] = normalizer.normalize(df['city'])
     return df
 
-def prepare_data(dataframes):
+def prepare_data(dataframes, normalizer=None):
     """Clean and prepare data"""
-    city_mapping = {
-        'Surrat': 'Surat', 'Chennnai': 'Chennai', 'Kalkata': 'Kolkata',
-        'Calcutta': 'Kolkata', 'Mumbay': 'Mumbai', 'Mumbaai': 'Mumbai',
-        'Bengluru': 'Bengaluru', 'Poona': 'Pune', 'Jaypur': 'Jaipur',
-        'Ahemdabad': 'Ahmedabad', 'Dehli': 'Delhi', 'New Delhi': 'Delhi',
-        'Nodia': 'Noida', 'Hyderbad': 'Hyderabad', 'Gurugram': 'Gurgaon'
-    }
+    normalizer = normalizer or get_city_normalizer()
     
     for name in ['Customers', 'Brokers', 'Properties']:
         if name in dataframes:
-            dataframes[name] = clean_city_names(dataframes[name], city_mapping)
+            dataframes[name] = clean_city_names(dataframes[name], normalizer)
+    
+    # Remember spellings the fuzzy resolver fixed (if enabled) so later loads skip the lookup
+    normalizer.save()
     
     return dataframes
 
 def main():
+    import os
+    from instrumentation import TRACE_LOG_ENV
+    dev_panel = os.environ.get(DEV_PANEL_ENV) == '1' or st.query_params.get('dev') == '1'
+    
+    # Spans are only recorded when someone will look at them
+    trace = None
+    if dev_panel or os.environ.get(TRACE_LOG_ENV):
+        trace = start_trace(None, session=get_session_id())
+    try:
+        show_dashboard()
+    finally:
+        if trace is not None:
+            end_trace()
+    
+    if dev_panel and trace is not None:
+        show_dev_panel(trace)
+
+def show_dashboard():
+    """Load the data and render the selected page"""
     st.title("🏠 Real Estate Analytics Dashboard")
     st.markdown("---")
     
@@ -87,7 +195,8 @@ def main():
     status_placeholder.info("🔄 Initializing dashboard...")
     
     # Load data
-    dataframes = load_data()
+    data_version = get_data_version()
+    dataframes, memory_report = get_prepared_data(data_version)
     
     # Clear status message
     status_placeholder.empty()
@@ -97,51 +206,204 @@ def main():
         st.info("Expected file location: data/real_estate_curation_project.xlsx")
         return
     
-    # Prepare data
-    dataframes = prepare_data(dataframes)
-    
     # Sidebar
     st.sidebar.title("Navigation")
     page = st.sidebar.radio("Select Page", 
                            ["Overview", "Customers", "Properties", "Brokers", "Deals", "Analytics", "Predictive Models"])
-    
-    if page == "Overview":
-        show_overview(dataframes)
-    elif page == "Customers":
-        show_customers(dataframes)
-    elif page == "Properties":
-        show_properties(dataframes)
-    elif page == "Brokers":
-        show_brokers(dataframes)
-    elif page == "Deals":
-        show_deals(dataframes)
-    elif page == "Analytics":
-        show_analytics(dataframes)
-    elif page == "Predictive Models":
-        show_predictive_models(dataframes)
+    trace = current_trace()
+    if trace is not None:
+        trace.page = page
+    
+    # Filters over the deal fact table, applied to every page
+    tracker = get_change_tracker()
+    facts = None
+    if 'Deals' in dataframes:
+        with span('deal facts', stage='merge'):
+            facts = tracker.deal_facts()
+    selection, positions = {}, None
+    if facts is not None:
+        with span('filter index', stage='filter'):
+            filter_index = get_filter_index(tracker.facts_version, facts)
+        selection = show_filters(filter_index)
+        with span('filter positions', stage='filter'):
+            positions = filter_index.positions(selection)
+    if positions is not None:
+        st.sidebar.caption(f"{len(positions):,} of {filter_index.size:,} deals match")
+    
+    if page in ["Overview", "Customers", "Properties", "Brokers"]:
+        if positions is None:
+            store = get_query_store(dataframes)
+        else:
+            from filters import filter_sheets
+            from query_store import FrameStore
+            store = FrameStore(filter_sheets(dataframes, facts, positions))
+    
+    with span(PAGE_FUNCTIONS[page], stage='page'):
+        if page == "Overview":
+            show_overview(store, memory_report)
+        elif page == "Customers":
+            show_customers(store)
+        elif page == "Properties":
+            show_properties(store)
+        elif page == "Brokers":
+            show_brokers(store)
+        elif page == "Deals":
+            show_deals(get_deals_summary(data_version, selection))
+        elif page == "Analytics":
+            show_analytics(get_deals_cube(data_version, selection))
+        elif page == "Predictive Models":
+            # Models always train on every deal; the KPI tab follows the filters
+            with span('kpi cube', stage='groupby'):
+                if positions is None:
+                    kpi_facts, kpi_cube = facts, tracker.kpi_cube()
+                else:
+                    kpi_facts = facts.iloc[positions]
+                    kpi_cube = get_filtered_cube(tracker.facts_version, selection, kpi_facts)
+            show_predictive_models(dataframes, facts, kpi_cube, tracker.facts_version, kpi_facts, selection)
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart, timed as the figure's serialization"""
+    with span('plotly_chart', stage='serialize'):
+        st.plotly_chart(fig, **kwargs)
+
+def get_session_id():
+    """Id of this browser session, tagging its spans in the trace log"""
+    import uuid
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex[:12]
+    return st.session_state['session_id']
+
+def show_dev_panel(trace):
+    """Developer sidebar panel with the spans of the last run, per stage"""
+    import json
+    spans = trace.to_frame()
+    history = st.session_state.setdefault('trace_records', [])
+    history.extend(trace.records())
+    del history[:-DEV_PANEL_MAX_SPANS]
+    
+    with st.sidebar.expander("⏱️ Performance"):
+        total = spans.loc[spans['depth'] == 0, 'seconds'].sum()
+        st.caption(f"{trace.page}: {total:.2f}s over {len(spans)} spans")
+        
+        by_stage = spans.groupby('stage').agg(
+            calls=('seconds', 'size'),
+            seconds=('seconds', 'sum'),
+            peak_rss_mb=('rss_peak_mb', 'max')
+        ).sort_values('seconds', ascending=False)
+        st.dataframe(by_stage.style.format({'seconds': '{:.3f}', 'peak_rss_mb': '{:,.0f}'}),
+                     use_container_width=True)
+        
+        # Nested spans include their children's time
+        slowest = spans[spans['stage'] != 'serialize'].nlargest(10, 'seconds')
+        st.dataframe(slowest[['span', 'stage', 'parent', 'seconds', 'rss_delta_mb']].style.format({
+            'seconds': '{:.3f}',
+            'rss_delta_mb': '{:+,.1f}'
+        }, na_rep='-'), use_container_width=True, hide_index=True)
+        
+        st.download_button("Download session trace (JSON lines)",
+                           ''.join(json.dumps(record, default=str) + '\n' for record in history),
+                           file_name=f"trace-{get_session_id()}.jsonl", mime='application/json')
+
+def show_filters(filter_index):
+    """Sidebar filters; returns the active selection"""
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Filters")
+    
+    selection = {}
+    for name, label in [('city', 'City'), ('property_type', 'Property Type'),
+                        ('status', 'Status'), ('segment', 'Segment')]:
+        if name in filter_index.values:
+            chosen = st.sidebar.multiselect(label, filter_index.values[name])
+            if chosen:
+                selection[name] = tuple(chosen)
+    
+    date_range = filter_index.date_range
+    if date_range is not None:
+        chosen = st.sidebar.date_input("Deal Date", value=date_range,
+                                       min_value=date_range[0], max_value=date_range[1])
+        # The picker returns a single date while the range is still being chosen
+        if isinstance(chosen, (list, tuple)) and len(chosen) == 2 and tuple(chosen) != date_range:
+            selection['deal_date'] = tuple(chosen)
+    
+    return selection
 
-def show_overview(dataframes):
+@st.cache_resource(show_spinner="Indexing deals for filtering...", max_entries=2)
+def get_filter_index(facts_version, _facts):
+    """Bitmap and date indexes over the deal fact table, built once per fact table version"""
+    from filters import FilterIndex
+    return FilterIndex(_facts)
+
+@st.cache_resource(show_spinner="Applying filters...", max_entries=8)
+def get_filtered_cube(facts_version, selection, _facts):
+    """KPI cube over the filtered deals"""
+    from kpi_cube import KPICube
+    return KPICube.from_facts(_facts)
+
+def get_deals_summary(data_version, selection):
+    """Deals summary, for every deal or only the filtered ones"""
+    tracker = get_change_tracker()
+    with span('deal aggregates', stage='groupby'):
+        if not selection:
+            return tracker.deal_aggregates(get_city_normalizer())[0]
+        # Histograms are not kept per cube cell, so partitions are rescanned
+        return get_filtered_aggregates(data_version, tracker.facts_version, selection)[0]
+
+def get_deals_cube(data_version, selection):
+    """KPI cube, for every deal or only the filtered ones"""
+    from ingest import has_partitions
+    tracker = get_change_tracker()
+    with span('deal aggregates', stage='groupby'):
+        cube = tracker.deal_aggregates(get_city_normalizer())[1]
+        if not selection or cube is None:
+            return cube
+        # Partitioned deals are filtered by rolling up the streamed cube, not by a rescan
+        if has_partitions():
+            filtered = cube.filter(selection)
+            if filtered is not None:
+                return filtered
+        return get_filtered_aggregates(data_version, tracker.facts_version, selection)[1]
+
+@st.cache_resource(show_spinner="Applying filters...", max_entries=8)
+def get_filtered_aggregates(data_version, facts_version, selection):
+    """Deals summary and KPI cube over the deals matching selection"""
+    from aggregates import DealsSummary
+    from filters import mask_frame
+    from ingest import has_partitions, ingest_deals
+    tracker = get_change_tracker()
+    if has_partitions():
+        return ingest_deals(tracker.dataframes, normalizer=get_city_normalizer(),
+                            row_filter=lambda facts: mask_frame(facts, selection))
+    if 'Deals' not in tracker.dataframes:
+        return None, None
+    facts = tracker.deal_facts()
+    positions = get_filter_index(facts_version, facts).positions(selection)
+    matched = facts.iloc[positions]
+    return DealsSummary().add(matched), get_filtered_cube(facts_version, selection, matched)
+
+def show_overview(store, memory_report=None):
     """Display overview page"""
     st.header("📊 Data Overview")
     
+    tables = store.tables()
+    
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        if 'Customers' in dataframes:
-            st.metric("Total Customers", len(dataframes['Customers']))
+        if 'Customers' in tables:
+            st.metric("Total Customers", store.row_count('Customers'))
     
     with col2:
-        if 'Properties' in dataframes:
-            st.metric("Total Properties", len(dataframes['Properties']))
+        if 'Properties' in tables:
+            st.metric("Total Properties", store.row_count('Properties'))
     
     with col3:
-        if 'Brokers' in dataframes:
-            st.metric("Total Brokers", len(dataframes['Brokers']))
+        if 'Brokers' in tables:
+            st.metric("Total Brokers", store.row_count('Brokers'))
     
     with col4:
-        if 'Deals' in dataframes:
-            closed_deals = len(dataframes['Deals'][dataframes['Deals']['status'] == 'Closed'])
+        if 'Deals' in tables:
+            closed_deals = store.row_count('Deals', status='Closed')
             st.metric("Closed Deals", closed_deals)
     
     st.markdown("---")
@@ -149,202 +411,208 @@ def show_overview(dataframes):
     # Dataset sizes
     st.subheader("Dataset Sizes")
     table_data = []
-    for name, df in dataframes.items():
+    for name in tables:
         table_data.append({
             'Dataset': name,
-            'Rows': len(df),
-            'Columns': len(df.columns)
+            'Rows': store.row_count(name),
+            'Columns': len(store.columns(name))
         })
     
     df_summary = pd.DataFrame(table_data)
     
+    if memory_report is not None:
+        with st.expander("Memory Footprint"):
+            st.dataframe(memory_report.style.format({
+                'Before (MB)': '{:,.2f}',
+                'After (MB)': '{:,.2f}',
+                'Reduction': '{:.1f}x'
+            }), use_container_width=True)
+    
     fig = px.bar(df_summary, x='Dataset', y='Rows', 
                  title='Number of Records per Dataset',
                  color='Rows',
                  color_continuous_scale='Blues')
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
     
     # Show sample data
     st.subheader("Sample Data Preview")
-    selected_table = st.selectbox("Select Dataset", list(dataframes.keys()))
-    st.dataframe(dataframes[selected_table].head(10), use_container_width=True)
+    selected_table = st.selectbox("Select Dataset", tables)
+    st.dataframe(store.select(selected_table, limit=10), use_container_width=True)
 
-def show_customers(dataframes):
+def show_customers(store):
     """Display customer analytics"""
     st.header("👥 Customer Analytics")
     
-    if 'Customers' not in dataframes:
+    if 'Customers' not in store.tables():
         st.error("Customers data not found")
         return
     
-    df = dataframes['Customers']
+    columns = store.columns('Customers')
     
     col1, col2 = st.columns(2)
     
     with col1:
         # City distribution
-        if 'city' in df.columns:
-            city_counts = df['city'].value_counts().head(10)
+        if 'city' in columns:
+            city_counts = store.value_counts('Customers', 'city', limit=10)
             fig = px.bar(x=city_counts.index, y=city_counts.values,
                         title='Top 10 Cities by Customer Count',
                         labels={'x': 'City', 'y': 'Count'},
                         color=city_counts.values,
                         color_continuous_scale='Viridis')
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Segment distribution
-        if 'segment' in df.columns:
-            segment_counts = df['segment'].value_counts()
+        if 'segment' in columns:
+            segment_counts = store.value_counts('Customers', 'segment')
             fig = px.pie(values=segment_counts.values, names=segment_counts.index,
                         title='Customer Segments Distribution',
                         hole=0.4)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
     # Income analysis
-    if 'annual_income' in df.columns and 'segment' in df.columns:
+    if 'annual_income' in columns and 'segment' in columns:
         st.subheader("Income Analysis by Segment")
-        fig = px.box(df, x='segment', y='annual_income',
-                    title='Annual Income Distribution by Segment',
-                    color='segment')
-        st.plotly_chart(fig, use_container_width=True)
+        fig = box_stats_figure(store.box_stats('Customers', 'segment', 'annual_income'),
+                        title='Annual Income Distribution by Segment',
+                        x_label='segment', y_label='annual_income')
+        plotly_chart(fig, use_container_width=True)
 
-def show_properties(dataframes):
+def show_properties(store):
     """Display property analytics"""
     st.header("🏘️ Property Analytics")
     
-    if 'Properties' not in dataframes:
+    if 'Properties' not in store.tables():
         st.error("Properties data not found")
         return
     
-    df = dataframes['Properties']
+    columns = store.columns('Properties')
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Property type distribution
-        if 'property_type' in df.columns:
-            type_counts = df['property_type'].value_counts()
+        if 'property_type' in columns:
+            type_counts = store.value_counts('Properties', 'property_type')
             fig = px.pie(values=type_counts.values, names=type_counts.index,
                         title='Property Types Distribution',
                         hole=0.4)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
     with col2:
         # City distribution
-        if 'city' in df.columns:
-            city_counts = df['city'].value_counts().head(10)
+        if 'city' in columns:
+            city_counts = store.value_counts('Properties', 'city', limit=10)
             fig = px.bar(x=city_counts.index, y=city_counts.values,
                         title='Top 10 Cities by Property Count',
                         labels={'x': 'City', 'y': 'Count'},
                         color=city_counts.values,
                         color_continuous_scale='Reds')
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
     # Area analysis
-    if 'area_sqft' in df.columns and 'property_type' in df.columns:
+    if 'area_sqft' in columns and 'property_type' in columns:
         st.subheader("Property Area Analysis")
-        fig = px.box(df, x='property_type', y='area_sqft',
-                    title='Area Distribution by Property Type',
-                    color='property_type')
-        st.plotly_chart(fig, use_container_width=True)
+        fig = box_stats_figure(store.box_stats('Properties', 'property_type', 'area_sqft'),
+                        title='Area Distribution by Property Type',
+                        x_label='property_type', y_label='area_sqft')
+        plotly_chart(fig, use_container_width=True)
     
     # Bedrooms vs Bathrooms
-    if 'bedrooms' in df.columns and 'bathrooms' in df.columns:
+    if 'bedrooms' in columns and 'bathrooms' in columns:
         col1, col2 = st.columns(2)
         with col1:
-            bedroom_counts = df['bedrooms'].value_counts().sort_index()
+            bedroom_counts = store.value_counts('Properties', 'bedrooms', by_value=True)
             fig = px.bar(x=bedroom_counts.index, y=bedroom_counts.values,
                         title='Bedroom Distribution',
                         labels={'x': 'Bedrooms', 'y': 'Count'})
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
         
         with col2:
-            bathroom_counts = df['bathrooms'].value_counts().sort_index()
+            bathroom_counts = store.value_counts('Properties', 'bathrooms', by_value=True)
             fig = px.bar(x=bathroom_counts.index, y=bathroom_counts.values,
                         title='Bathroom Distribution',
                         labels={'x': 'Bathrooms', 'y': 'Count'})
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
-def show_brokers(dataframes):
+def show_brokers(store):
     """Display broker analytics"""
     st.header("🤝 Broker Analytics")
     
-    if 'Brokers' not in dataframes:
+    if 'Brokers' not in store.tables():
         st.error("Brokers data not found")
         return
     
-    df = dataframes['Brokers']
+    columns = store.columns('Brokers')
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Agency distribution
-        if 'agency' in df.columns:
-            agency_counts = df['agency'].value_counts().head(10)
+        if 'agency' in columns:
+            agency_counts = store.value_counts('Brokers', 'agency', limit=10)
             fig = px.bar(x=agency_counts.index, y=agency_counts.values,
                         title='Top 10 Agencies by Broker Count',
                         labels={'x': 'Agency', 'y': 'Count'},
                         color=agency_counts.values,
                         color_continuous_scale='Greens')
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Rating distribution
-        if 'rating' in df.columns:
-            fig = px.histogram(df, x='rating',
-                             title='Broker Rating Distribution',
-                             nbins=20,
-                             color_discrete_sequence=['#2ecc71'])
-            st.plotly_chart(fig, use_container_width=True)
+        if 'rating' in columns:
+            fig = binned_histogram_figure(*store.histogram('Brokers', 'rating', bins=20),
+                                  title='Broker Rating Distribution',
+                                  x_label='rating',
+                                  color='#2ecc71')
+            plotly_chart(fig, use_container_width=True)
     
     # Experience analysis
-    if 'experience_years' in df.columns:
+    if 'experience_years' in columns:
         st.subheader("Experience Analysis")
-        fig = px.histogram(df, x='experience_years',
-                         title='Broker Experience Distribution (Years)',
-                         nbins=20,
-                         color_discrete_sequence=['#3498db'])
-        st.plotly_chart(fig, use_container_width=True)
+        fig = binned_histogram_figure(*store.histogram('Brokers', 'experience_years', bins=20),
+                              title='Broker Experience Distribution (Years)',
+                              x_label='experience_years',
+                              color='#3498db')
+        plotly_chart(fig, use_container_width=True)
     
     # City distribution
-    if 'city' in df.columns:
-        city_counts = df['city'].value_counts().head(10)
+    if 'city' in columns:
+        city_counts = store.value_counts('Brokers', 'city', limit=10)
         fig = px.bar(x=city_counts.index, y=city_counts.values,
                     title='Top 10 Cities by Broker Count',
                     labels={'x': 'City', 'y': 'Count'},
                     color=city_counts.values,
                     color_continuous_scale='Oranges')
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
-def show_deals(dataframes):
+def show_deals(summary):
     """Display deals analytics"""
     st.header("💼 Deals Analytics")
     
-    if 'Deals' not in dataframes:
+    if summary is None:
         st.error("Deals data not found")
         return
     
-    df = dataframes['Deals']
-    
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_deals = len(df)
+        total_deals = summary.total
         st.metric("Total Deals", total_deals)
     
     with col2:
-        closed_deals = len(df[df['status'] == 'Closed'])
+        closed_deals = summary.closed
         st.metric("Closed Deals", closed_deals)
     
     with col3:
-        if 'final_price' in df.columns:
-            avg_price = df['final_price'].mean()
+        if summary.final_price_count:
+            avg_price = summary.avg_final_price
             st.metric("Avg Final Price", f"₹{avg_price:,.0f}")
     
     with col4:
-        if 'status' in df.columns:
+        if summary.has_status:
             closure_rate = (closed_deals / total_deals * 100) if total_deals > 0 else 0
             st.metric("Closure Rate", f"{closure_rate:.1f}%")
     
@@ -354,113 +622,101 @@ def show_deals(dataframes):
     
     with col1:
         # Status distribution
-        if 'status' in df.columns:
-            status_counts = df['status'].value_counts()
+        if summary.status_counts:
+            status_counts = pd.Series(summary.status_counts).loc[lambda counts: counts > 0].sort_values(ascending=False)
             fig = px.pie(values=status_counts.values, names=status_counts.index,
                         title='Deal Status Distribution',
                         hole=0.4,
                         color_discrete_sequence=px.colors.sequential.RdBu)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Mortgage distribution
-        if 'mortgage' in df.columns:
-            mortgage_counts = df['mortgage'].value_counts()
+        if summary.mortgage_counts:
+            mortgage_counts = pd.Series(summary.mortgage_counts).loc[lambda counts: counts > 0].sort_values(ascending=False)
             fig = px.pie(values=mortgage_counts.values, names=mortgage_counts.index,
                         title='Mortgage Distribution',
                         hole=0.4,
                         color_discrete_sequence=px.colors.sequential.Purp)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
     
-    # Price analysis
-    if 'offer_price' in df.columns and 'final_price' in df.columns:
+    # Price analysis, drawn from the pre-binned histograms
+    offer_hist = summary.histograms['offer_price']
+    final_hist = summary.histograms['final_price']
+    if not offer_hist.empty and not final_hist.empty:
         st.subheader("Price Analysis")
         fig = go.Figure()
-        fig.add_trace(go.Histogram(x=df['offer_price'], name='Offer Price', opacity=0.7))
-        fig.add_trace(go.Histogram(x=df['final_price'], name='Final Price', opacity=0.7))
+        for name, hist in [('Offer Price', offer_hist), ('Final Price', final_hist)]:
+            fig.add_trace(histogram_trace(hist.edges, hist.counts, name=name, opacity=0.7))
         fig.update_layout(title='Offer Price vs Final Price Distribution',
                          xaxis_title='Price',
                          yaxis_title='Count',
                          barmode='overlay')
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     # Loan rate analysis
-    if 'loan_rate' in df.columns:
+    loan_hist = summary.histograms['loan_rate']
+    if not loan_hist.empty:
         st.subheader("Loan Rate Analysis")
-        fig = px.histogram(df, x='loan_rate',
-                         title='Loan Rate Distribution',
-                         nbins=30,
-                         color_discrete_sequence=['#e74c3c'])
-        st.plotly_chart(fig, use_container_width=True)
+        fig = go.Figure(histogram_trace(loan_hist.edges, loan_hist.counts, marker_color='#e74c3c'))
+        fig.update_layout(title='Loan Rate Distribution',
+                         xaxis_title='loan_rate',
+                         yaxis_title='count',
+                         bargap=0)
+        plotly_chart(fig, use_container_width=True)
 
-def show_analytics(dataframes):
+def show_analytics(cube):
     """Display advanced analytics"""
     st.header("📈 Advanced Analytics")
     
+    if cube is None:
+        st.error("Deals data not found")
+        return
+    
     # Price per square foot
-    if 'Properties' in dataframes and 'Deals' in dataframes:
+    if 'ppsf_mean' in cube.rollup().columns:
         st.subheader("Price per Square Foot Analysis")
         
-        properties = dataframes['Properties']
-        deals = dataframes['Deals']
-        
-        if 'property_id' in properties.columns and 'property_id' in deals.columns:
-            merged = deals.merge(properties, on='property_id', how='left')
-            
-            if 'final_price' in merged.columns and 'area_sqft' in merged.columns:
-                merged['price_per_sqft'] = merged['final_price'] / merged['area_sqft']
-                merged_clean = merged[merged['price_per_sqft'].notna()]
-                
-                if 'city_y' in merged_clean.columns:
-                    city_avg = merged_clean.groupby('city_y')['price_per_sqft'].mean().sort_values(ascending=False).head(10)
-                    fig = px.bar(x=city_avg.index, y=city_avg.values,
-                                title='Top 10 Cities by Average Price per Sq Ft',
-                                labels={'x': 'City', 'y': 'Price per Sq Ft (₹)'},
-                                color=city_avg.values,
-                                color_continuous_scale='Plasma')
-                    st.plotly_chart(fig, use_container_width=True)
+        city_avg = cube.rollup('city')['ppsf_mean'].dropna().sort_values(ascending=False).head(10)
+        fig = px.bar(x=city_avg.index, y=city_avg.values,
+                    title='Top 10 Cities by Average Price per Sq Ft',
+                    labels={'x': 'City', 'y': 'Price per Sq Ft (₹)'},
+                    color=city_avg.values,
+                    color_continuous_scale='Plasma')
+        plotly_chart(fig, use_container_width=True)
     
     # Broker success rate
-    if 'Brokers' in dataframes and 'Deals' in dataframes:
+    if cube.selection and cube.brokers is None:
+        st.info("Broker success rates only follow the Status filter for partitioned deals; "
+                "clear the other filters to see them.")
+    if cube.has_dimension('broker_id'):
         st.subheader("Broker Success Rate")
         
-        brokers = dataframes['Brokers']
-        deals = dataframes['Deals']
+        broker_deals = cube.rollup('broker_id')[['deals', 'closed', 'closure_rate']].reset_index()
+        broker_deals.columns = ['broker_id', 'total_deals', 'closed_deals', 'success_rate']
         
-        if 'broker_id' in deals.columns:
-            broker_deals = deals.groupby('broker_id').agg({
-                'deal_id': 'count',
-                'status': lambda x: (x == 'Closed').sum()
-            }).reset_index()
-            broker_deals.columns = ['broker_id', 'total_deals', 'closed_deals']
-            broker_deals['success_rate'] = (broker_deals['closed_deals'] / broker_deals['total_deals'] * 100)
-            
-            top_brokers = broker_deals.nlargest(10, 'success_rate')
-            
-            fig = px.bar(top_brokers, x='broker_id', y='success_rate',
-                        title='Top 10 Brokers by Success Rate',
-                        labels={'broker_id': 'Broker ID', 'success_rate': 'Success Rate (%)'},
-                        color='success_rate',
-                        color_continuous_scale='Greens')
-            st.plotly_chart(fig, use_container_width=True)
+        top_brokers = broker_deals.nlargest(10, 'success_rate')
+        
+        fig = px.bar(top_brokers, x='broker_id', y='success_rate',
+                    title='Top 10 Brokers by Success Rate',
+                    labels={'broker_id': 'Broker ID', 'success_rate': 'Success Rate (%)'},
+                    color='success_rate',
+                    color_continuous_scale='Greens')
+        plotly_chart(fig, use_container_width=True)
     
     # Deal trends over time
-    if 'Deals' in dataframes and 'deal_date' in dataframes['Deals'].columns:
+    if cube.has_dimension('month'):
         st.subheader("Deal Trends Over Time")
         
-        deals = dataframes['Deals'].copy()
-        deals['deal_date'] = pd.to_datetime(deals['deal_date'], errors='coerce')
-        deals['year_month'] = deals['deal_date'].dt.to_period('M').astype(str)
-        
-        monthly_deals = deals.groupby('year_month').size().reset_index(name='count')
+        monthly_deals = cube.rollup('month')['deals'].sort_index().rename_axis('year_month').reset_index(name='count')
         
         fig = px.line(monthly_deals, x='year_month', y='count',
                      title='Monthly Deal Trends',
                      labels={'year_month': 'Month', 'count': 'Number of Deals'},
                      markers=True)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
-def show_predictive_models(dataframes):
+def show_predictive_models(dataframes, facts, cube, facts_version=None, kpi_facts=None, selection=None):
     """Display predictive modeling page"""
     st.header("🤖 Predictive Models")
     
@@ -469,297 +725,331 @@ def show_predictive_models(dataframes):
         st.error("Required data not found")
         return
     
+    # Only the selected view is built on a rerun; st.tabs would run all six
+    view = st.radio("View", PREDICTIVE_VIEWS, horizontal=True, key='predictive_view')
+    
+    if view == "KPI Dashboard":
+        # The KPI view reads the fact table and cube only, so it needs no models
+        df_kpi = kpi_facts if kpi_facts is not None else facts
+        with span('kpi data', stage='figure'):
+            kpi_data = get_kpi_data(facts_version, selection or {}, df_kpi)
+        show_kpi_dashboard(dataframes, df_kpi, cube, kpi_data)
+        return
+    
     # Prepare transformed data
-    with st.spinner("Preparing data and training models..."):
-        df_transformed = prepare_transformed_data(dataframes)
+    with st.spinner("Preparing data and loading models..."):
+        with span('prepare_transformed_data', stage='prepare'):
+            df_transformed, model_key = get_model_inputs(facts_version, facts)
         
         if df_transformed is None:
             st.error("Could not prepare data for modeling")
             return
         
-        # Import models
-        from models import RealEstateModels
-        
-        # Initialize and train models
-        re_models = RealEstateModels(df_transformed)
-        
+        # Load models from the registry, training only when data or config changed
         try:
-            results = re_models.train_all_models()
+            with span('load_trained_models', stage='train'):
+                re_models = load_trained_models(model_key, df_transformed)
+            results = re_models.results
         except Exception as e:
             st.error(f"Error training models: {e}")
             return
     
     st.success("✅ All models trained successfully!")
     
-    # Model selection tabs
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "KPI Dashboard",
-        "Model Comparison", 
-        "Price Prediction", 
-        "Feature Importance",
-        "Deal Status Prediction",
-        "Model Performance"
-    ])
-    
-    with tab1:
-        st.subheader("📊 Key Performance Indicators (KPIs)")
-        
-        # Prepare merged data for KPIs
-        deals = dataframes['Deals'].copy()
-        properties = dataframes['Properties'].copy()
-        customers = dataframes['Customers'].copy()
-        brokers = dataframes['Brokers'].copy()
-        
-        # Merge for comprehensive analysis
-        df_kpi = deals.merge(properties, on='property_id', how='left', suffixes=('', '_prop'))
-        df_kpi = df_kpi.merge(customers, on='customer_id', how='left', suffixes=('', '_cust'))
-        df_kpi = df_kpi.merge(brokers, on='broker_id', how='left', suffixes=('', '_broker'))
-        
-        # KPI 1: Price per Square Foot
-        st.markdown("### 1️⃣ Price per Square Foot")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if 'final_price' in df_kpi.columns and 'area_sqft' in df_kpi.columns:
-                df_kpi['price_per_sqft'] = df_kpi['final_price'] / df_kpi['area_sqft']
-                avg_price_sqft = df_kpi['price_per_sqft'].mean()
-                median_price_sqft = df_kpi['price_per_sqft'].median()
-                
-                st.metric("Average Price/Sqft", f"₹{avg_price_sqft:,.2f}")
-                st.metric("Median Price/Sqft", f"₹{median_price_sqft:,.2f}")
-                
-                # Top cities by price/sqft
-                if 'city_prop' in df_kpi.columns:
-                    city_price = df_kpi.groupby('city_prop')['price_per_sqft'].mean().sort_values(ascending=False).head(10)
-                    fig = px.bar(x=city_price.index, y=city_price.values,
-                                title='Top 10 Cities by Avg Price/Sqft',
-                                labels={'x': 'City', 'y': 'Price per Sqft (₹)'},
-                                color=city_price.values,
-                                color_continuous_scale='Viridis')
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            if 'price_per_sqft' in df_kpi.columns and 'property_type' in df_kpi.columns:
-                type_price = df_kpi.groupby('property_type')['price_per_sqft'].mean().sort_values(ascending=False)
-                fig = px.bar(x=type_price.index, y=type_price.values,
-                            title='Avg Price/Sqft by Property Type',
-                            labels={'x': 'Property Type', 'y': 'Price per Sqft (₹)'},
-                            color=type_price.values,
-                            color_continuous_scale='Blues')
-                st.plotly_chart(fig, use_container_width=True)
-        
-        st.markdown("---")
+    if view == "Model Comparison":
+        show_model_comparison(re_models)
+    elif view == "Price Prediction":
+        show_price_prediction(re_models)
+    elif view == "Feature Importance":
+        show_feature_importance(results)
+    elif view == "Deal Status Prediction":
+        show_status_prediction(re_models, results)
+    elif view == "Model Performance":
+        show_model_performance(results, model_key)
+
+def show_kpi_dashboard(dataframes, df_kpi, cube, kpi_data):
+    """Display the KPI dashboard view"""
+    st.subheader("📊 Key Performance Indicators (KPIs)")
+    
+    # The shared fact table already joins properties, customers and brokers;
+    # the charts are roll-ups of the KPI cube built from it
+    kpi_totals = cube.rollup().iloc[0]
+    
+    # KPI 1: Price per Square Foot
+    st.markdown("### 1️⃣ Price per Square Foot")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if 'price_per_sqft' in df_kpi.columns:
+            avg_price_sqft = kpi_totals['ppsf_mean']
+            median_price_sqft = kpi_data['median_ppsf']
+            
+            st.metric("Average Price/Sqft", f"₹{avg_price_sqft:,.2f}")
+            st.metric("Median Price/Sqft", f"₹{median_price_sqft:,.2f}")
+            
+            # Top cities by price/sqft
+            if 'property_city' in df_kpi.columns:
+                city_price = cube.rollup('city')['ppsf_mean'].dropna().sort_values(ascending=False).head(10)
+                fig = px.bar(x=city_price.index, y=city_price.values,
+                            title='Top 10 Cities by Avg Price/Sqft',
+                            labels={'x': 'City', 'y': 'Price per Sqft (₹)'},
+                            color=city_price.values,
+                            color_continuous_scale='Viridis')
+                plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        if 'price_per_sqft' in df_kpi.columns and 'property_type' in df_kpi.columns:
+            type_price = cube.rollup('property_type')['ppsf_mean'].dropna().sort_values(ascending=False)
+            fig = px.bar(x=type_price.index, y=type_price.values,
+                        title='Avg Price/Sqft by Property Type',
+                        labels={'x': 'Property Type', 'y': 'Price per Sqft (₹)'},
+                        color=type_price.values,
+                        color_continuous_scale='Blues')
+            plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # KPI 2: Broker Success Rate
+    st.markdown("### 2️⃣ Broker Success Rate")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if 'status' in df_kpi.columns and 'broker_id' in df_kpi.columns:
+            broker_stats = cube.rollup('broker_id')[['deals', 'closed', 'closure_rate']].reset_index()
+            broker_stats.columns = ['broker_id', 'total_deals', 'closed_deals', 'success_rate']
+            
+            avg_success_rate = broker_stats['success_rate'].mean()
+            st.metric("Average Broker Success Rate", f"{avg_success_rate:.1f}%")
+            
+            # Top brokers
+            top_brokers = broker_stats.nlargest(10, 'success_rate')
+            fig = px.bar(top_brokers, x='broker_id', y='success_rate',
+                        title='Top 10 Brokers by Success Rate',
+                        labels={'broker_id': 'Broker ID', 'success_rate': 'Success Rate (%)'},
+                        color='success_rate',
+                        color_continuous_scale='Greens')
+            plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        if 'success_rate' in broker_stats.columns:
+            fig = histogram_figure(broker_stats['success_rate'], bins=20,
+                                  title='Distribution of Broker Success Rates',
+                                  x_label='Success Rate (%)',
+                                  y_label='Number of Brokers',
+                                  color='#2ecc71')
+            plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # KPI 3: Customer Income Segments
+    st.markdown("### 3️⃣ Customer Income Segments")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if 'segment' in df_kpi.columns:
+            segment_counts = cube.rollup('segment')['deals'].sort_values(ascending=False)
+            fig = px.pie(values=segment_counts.values, names=segment_counts.index,
+                        title='Customer Distribution by Segment',
+                        hole=0.4,
+                        color_discrete_sequence=px.colors.sequential.RdBu)
+            plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        if 'annual_income' in df_kpi.columns and 'segment' in df_kpi.columns:
+            plotly_chart(kpi_data['income_box'], use_container_width=True)
+    
+    # Income statistics by segment
+    if 'annual_income' in df_kpi.columns and 'segment' in df_kpi.columns:
+        # Medians are not additive, so they still come from the fact table
+        segment_income = cube.rollup('segment')
+        income_stats = pd.DataFrame({
+            'mean': segment_income['income_mean'],
+            'median': kpi_data['income_median'],
+            'count': segment_income['income_count']
+        }).rename_axis('segment').reset_index()
+        income_stats.columns = ['Segment', 'Avg Income', 'Median Income', 'Count']
+        st.dataframe(income_stats.style.format({
+            'Avg Income': '₹{:,.0f}',
+            'Median Income': '₹{:,.0f}',
+            'Count': '{:,}'
+        }), use_container_width=True)
+    
+    st.markdown("---")
+    
+    # KPI 4: Deal Closure Probability
+    st.markdown("### 4️⃣ Deal Closure Probability")
+    
+    if 'status' in df_kpi.columns:
+        total_deals = int(kpi_totals['deals'])
+        closed_deals = int(kpi_totals.get('status_Closed', 0))
+        pending_deals = int(kpi_totals.get('status_Pending', 0))
+        cancelled_deals = int(kpi_totals.get('status_Cancelled', 0))
         
-        # KPI 2: Broker Success Rate
-        st.markdown("### 2️⃣ Broker Success Rate")
-        col1, col2 = st.columns(2)
+        closure_rate = (closed_deals / total_deals * 100) if total_deals > 0 else 0
         
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            if 'status' in df_kpi.columns and 'broker_id' in df_kpi.columns:
-                broker_stats = df_kpi.groupby('broker_id').agg({
-                    'deal_id': 'count',
-                    'status': lambda x: (x == 'Closed').sum()
-                }).reset_index()
-                broker_stats.columns = ['broker_id', 'total_deals', 'closed_deals']
-                broker_stats['success_rate'] = (broker_stats['closed_deals'] / broker_stats['total_deals'] * 100)
-                
-                avg_success_rate = broker_stats['success_rate'].mean()
-                st.metric("Average Broker Success Rate", f"{avg_success_rate:.1f}%")
-                
-                # Top brokers
-                top_brokers = broker_stats.nlargest(10, 'success_rate')
-                fig = px.bar(top_brokers, x='broker_id', y='success_rate',
-                            title='Top 10 Brokers by Success Rate',
-                            labels={'broker_id': 'Broker ID', 'success_rate': 'Success Rate (%)'},
-                            color='success_rate',
-                            color_continuous_scale='Greens')
-                st.plotly_chart(fig, use_container_width=True)
-        
+            st.metric("Total Deals", f"{total_deals:,}")
         with col2:
-            if 'success_rate' in broker_stats.columns:
-                fig = px.histogram(broker_stats, x='success_rate',
-                                 title='Distribution of Broker Success Rates',
-                                 labels={'success_rate': 'Success Rate (%)', 'count': 'Number of Brokers'},
-                                 nbins=20,
-                                 color_discrete_sequence=['#2ecc71'])
-                st.plotly_chart(fig, use_container_width=True)
-        
-        st.markdown("---")
+            st.metric("Closed Deals", f"{closed_deals:,}", f"{closure_rate:.1f}%")
+        with col3:
+            st.metric("Pending Deals", f"{pending_deals:,}")
+        with col4:
+            st.metric("Cancelled Deals", f"{cancelled_deals:,}")
         
-        # KPI 3: Customer Income Segments
-        st.markdown("### 3️⃣ Customer Income Segments")
         col1, col2 = st.columns(2)
         
         with col1:
-            if 'segment' in df_kpi.columns:
-                segment_counts = df_kpi['segment'].value_counts()
-                fig = px.pie(values=segment_counts.values, names=segment_counts.index,
-                            title='Customer Distribution by Segment',
-                            hole=0.4,
-                            color_discrete_sequence=px.colors.sequential.RdBu)
-                st.plotly_chart(fig, use_container_width=True)
+            # Status distribution
+            status_counts = pd.Series({status: kpi_totals[f"status_{status}"]
+                                       for status in cube.statuses}).sort_values(ascending=False)
+            fig = px.pie(values=status_counts.values, names=status_counts.index,
+                        title='Deal Status Distribution',
+                        hole=0.4,
+                        color_discrete_sequence=px.colors.sequential.Teal)
+            plotly_chart(fig, use_container_width=True)
         
         with col2:
-            if 'annual_income' in df_kpi.columns and 'segment' in df_kpi.columns:
-                fig = px.box(df_kpi, x='segment', y='annual_income',
-                            title='Income Distribution by Segment',
-                            labels={'segment': 'Customer Segment', 'annual_income': 'Annual Income (₹)'},
-                            color='segment')
-                st.plotly_chart(fig, use_container_width=True)
-        
-        # Income statistics by segment
-        if 'annual_income' in df_kpi.columns and 'segment' in df_kpi.columns:
-            income_stats = df_kpi.groupby('segment')['annual_income'].agg(['mean', 'median', 'count']).reset_index()
-            income_stats.columns = ['Segment', 'Avg Income', 'Median Income', 'Count']
-            st.dataframe(income_stats.style.format({
-                'Avg Income': '₹{:,.0f}',
-                'Median Income': '₹{:,.0f}',
-                'Count': '{:,}'
-            }), use_container_width=True)
-        
-        st.markdown("---")
+            # Closure rate by property type
+            if 'property_type' in df_kpi.columns:
+                closure_by_type = cube.rollup('property_type')['closure_rate'].sort_values(ascending=False)
+                
+                fig = px.bar(x=closure_by_type.index, y=closure_by_type.values,
+                            title='Closure Rate by Property Type',
+                            labels={'x': 'Property Type', 'y': 'Closure Rate (%)'},
+                            color=closure_by_type.values,
+                            color_continuous_scale='Blues')
+                plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("---")
+    
+    # KPI 5: Amenity Co-occurrence Patterns
+    st.markdown("### 5️⃣ Amenity Co-occurrence Patterns")
+    
+    if 'PropertyDetails' in dataframes:
+        prop_details = dataframes['PropertyDetails']
         
-        # KPI 4: Deal Closure Probability
-        st.markdown("### 4️⃣ Deal Closure Probability")
+        # Check for amenity columns
+        amenity_cols = [col for col in prop_details.columns if 'amenity' in col.lower() or 
+                      col in ['parking', 'gym', 'pool', 'garden', 'security', 'elevator']]
         
-        if 'status' in df_kpi.columns:
-            total_deals = len(df_kpi)
-            closed_deals = len(df_kpi[df_kpi['status'] == 'Closed'])
-            pending_deals = len(df_kpi[df_kpi['status'] == 'Pending'])
-            cancelled_deals = len(df_kpi[df_kpi['status'] == 'Cancelled'])
-            
-            closure_rate = (closed_deals / total_deals * 100) if total_deals > 0 else 0
+        if amenity_cols:
+            st.info(f"Found {len(amenity_cols)} amenity features")
             
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Deals", f"{total_deals:,}")
-            with col2:
-                st.metric("Closed Deals", f"{closed_deals:,}", f"{closure_rate:.1f}%")
-            with col3:
-                st.metric("Pending Deals", f"{pending_deals:,}")
-            with col4:
-                st.metric("Cancelled Deals", f"{cancelled_deals:,}")
+            # Amenity frequency
+            amenity_counts = {}
+            for col in amenity_cols:
+                if prop_details[col].dtype == 'bool' or prop_details[col].dtype == 'object':
+                    amenity_counts[col] = prop_details[col].sum() if prop_details[col].dtype == 'bool' else len(prop_details[prop_details[col] == 'Yes'])
             
-            col1, col2 = st.columns(2)
+            if amenity_counts:
+                amenity_df = pd.DataFrame(list(amenity_counts.items()), columns=['Amenity', 'Count'])
+                amenity_df = amenity_df.sort_values('Count', ascending=False)
+                
+                fig = px.bar(amenity_df, x='Amenity', y='Count',
+                            title='Amenity Frequency',
+                            labels={'Amenity': 'Amenity Type', 'Count': 'Number of Properties'},
+                            color='Count',
+                            color_continuous_scale='Purples')
+                plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Amenity data not available in standard format. Showing property features instead.")
             
-            with col1:
-                # Status distribution
-                status_counts = df_kpi['status'].value_counts()
-                fig = px.pie(values=status_counts.values, names=status_counts.index,
-                            title='Deal Status Distribution',
-                            hole=0.4,
-                            color_discrete_sequence=px.colors.sequential.Teal)
-                st.plotly_chart(fig, use_container_width=True)
+            # Show property condition and other features
+            if 'condition' in prop_details.columns:
+                condition_counts = prop_details['condition'].value_counts()
+                fig = px.pie(values=condition_counts.values, names=condition_counts.index,
+                            title='Property Condition Distribution',
+                            hole=0.4)
+                plotly_chart(fig, use_container_width=True)
             
-            with col2:
-                # Closure rate by property type
-                if 'property_type' in df_kpi.columns:
-                    closure_by_type = df_kpi.groupby('property_type').apply(
-                        lambda x: (x['status'] == 'Closed').sum() / len(x) * 100
-                    ).sort_values(ascending=False)
+            # Show correlation with price if available
+            if 'property_id' in prop_details.columns and 'final_price' in df_kpi.columns:
+                # Property details are already part of the fact table
+                if 'amenity_scatters' in kpi_data:
+                    school_fig, walk_fig = kpi_data['amenity_scatters']
+                    col1, col2 = st.columns(2)
                     
-                    fig = px.bar(x=closure_by_type.index, y=closure_by_type.values,
-                                title='Closure Rate by Property Type',
-                                labels={'x': 'Property Type', 'y': 'Closure Rate (%)'},
-                                color=closure_by_type.values,
-                                color_continuous_scale='Blues')
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        st.markdown("---")
-        
-        # KPI 5: Amenity Co-occurrence Patterns
-        st.markdown("### 5️⃣ Amenity Co-occurrence Patterns")
-        
-        if 'PropertyDetails' in dataframes:
-            prop_details = dataframes['PropertyDetails'].copy()
-            
-            # Check for amenity columns
-            amenity_cols = [col for col in prop_details.columns if 'amenity' in col.lower() or 
-                          col in ['parking', 'gym', 'pool', 'garden', 'security', 'elevator']]
-            
-            if amenity_cols:
-                st.info(f"Found {len(amenity_cols)} amenity features")
-                
-                # Amenity frequency
-                amenity_counts = {}
-                for col in amenity_cols:
-                    if prop_details[col].dtype == 'bool' or prop_details[col].dtype == 'object':
-                        amenity_counts[col] = prop_details[col].sum() if prop_details[col].dtype == 'bool' else len(prop_details[prop_details[col] == 'Yes'])
-                
-                if amenity_counts:
-                    amenity_df = pd.DataFrame(list(amenity_counts.items()), columns=['Amenity', 'Count'])
-                    amenity_df = amenity_df.sort_values('Count', ascending=False)
+                    with col1:
+                        plotly_chart(school_fig, use_container_width=True)
                     
-                    fig = px.bar(amenity_df, x='Amenity', y='Count',
-                                title='Amenity Frequency',
-                                labels={'Amenity': 'Amenity Type', 'Count': 'Number of Properties'},
-                                color='Count',
-                                color_continuous_scale='Purples')
-                    st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("Amenity data not available in standard format. Showing property features instead.")
-                
-                # Show property condition and other features
-                if 'condition' in prop_details.columns:
-                    condition_counts = prop_details['condition'].value_counts()
-                    fig = px.pie(values=condition_counts.values, names=condition_counts.index,
-                                title='Property Condition Distribution',
-                                hole=0.4)
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                # Show correlation with price if available
-                if 'property_id' in prop_details.columns and 'final_price' in df_kpi.columns:
-                    df_amenity = df_kpi.merge(prop_details, on='property_id', how='left')
-                    
-                    if 'school_score' in df_amenity.columns and 'walk_score' in df_amenity.columns:
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            fig = px.scatter(df_amenity, x='school_score', y='final_price',
-                                           title='School Score vs Property Price',
-                                           labels={'school_score': 'School Score', 'final_price': 'Final Price (₹)'},
-                                           opacity=0.5)
-                            st.plotly_chart(fig, use_container_width=True)
-                        
-                        with col2:
-                            fig = px.scatter(df_amenity, x='walk_score', y='final_price',
-                                           title='Walk Score vs Property Price',
-                                           labels={'walk_score': 'Walk Score', 'final_price': 'Final Price (₹)'},
-                                           opacity=0.5)
-                            st.plotly_chart(fig, use_container_width=True)
-    
-    with tab2:
-        st.subheader("📊 Regression Model Comparison")
-        comparison_df = re_models.get_model_comparison()
-        
-        # Display comparison table
-        st.dataframe(comparison_df.style.format({
-            'R² Score': '{:.4f}',
-            'RMSE': '₹{:,.2f}',
-            'MAPE': '{:.2%}',
-            'Accuracy %': '{:.2f}%'
-        }), use_container_width=True)
-        
-        # Visualize comparison
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig = px.bar(comparison_df, x='Model', y='R² Score',
-                        title='R² Score Comparison',
-                        color='R² Score',
-                        color_continuous_scale='Blues')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            fig = px.bar(comparison_df, x='Model', y='MAPE',
-                        title='MAPE Comparison (Lower is Better)',
-                        color='MAPE',
-                        color_continuous_scale='Reds_r')
-            st.plotly_chart(fig, use_container_width=True)
-    
-    with tab3:
-        st.subheader("💰 Price Prediction Tool")
-        
+                    with col2:
+                        plotly_chart(walk_fig, use_container_width=True)
+
+@st.cache_resource(show_spinner="Building KPI charts...", max_entries=8)
+def get_kpi_data(facts_version, selection, _df_kpi):
+    """KPI statistics and figures that scan the deals, built once per fact table version and filter"""
+    kpi_data = {}
+    if 'price_per_sqft' in _df_kpi.columns:
+        kpi_data['median_ppsf'] = _df_kpi['price_per_sqft'].median()
+    
+    if 'annual_income' in _df_kpi.columns and 'segment' in _df_kpi.columns:
+        kpi_data['income_median'] = _df_kpi.groupby('segment')['annual_income'].median()
+        kpi_data['income_box'] = box_figure(_df_kpi['segment'], _df_kpi['annual_income'],
+                                           title='Income Distribution by Segment',
+                                           x_label='Customer Segment', y_label='Annual Income (₹)')
+    
+    if all(col in _df_kpi.columns for col in ['school_score', 'walk_score', 'final_price']):
+        kpi_data['amenity_scatters'] = tuple(
+            scatter_figure(_df_kpi[col], _df_kpi['final_price'],
+                           title=f"{label} vs Property Price",
+                           x_label=label, y_label='Final Price (₹)',
+                           budget=SCATTER_POINT_BUDGETS['amenity'],
+                           opacity=0.5)
+            for col, label in [('school_score', 'School Score'), ('walk_score', 'Walk Score')]
+        )
+    return kpi_data
+
+def show_model_comparison(re_models):
+    """Display the regression model comparison view"""
+    st.subheader("📊 Regression Model Comparison")
+    comparison_df = re_models.get_model_comparison()
+    
+    # Display comparison table
+    st.dataframe(comparison_df.style.format({
+        'R² Score': '{:.4f}',
+        'RMSE': '₹{:,.2f}',
+        'MAPE': '{:.2%}',
+        'Accuracy %': '{:.2f}%'
+    }), use_container_width=True)
+    
+    # Visualize comparison
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig = px.bar(comparison_df, x='Model', y='R² Score',
+                    title='R² Score Comparison',
+                    color='R² Score',
+                    color_continuous_scale='Blues')
+        plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        fig = px.bar(comparison_df, x='Model', y='MAPE',
+                    title='MAPE Comparison (Lower is Better)',
+                    color='MAPE',
+                    color_continuous_scale='Reds_r')
+        plotly_chart(fig, use_container_width=True)
+    
+    # Training cost per model
+    training_report = re_models.get_training_report()
+    if not training_report.empty:
+        with st.expander("Training Time per Model"):
+            st.dataframe(training_report.style.format({
+                'Wall Time (s)': '{:.2f}',
+                'CPU Time (s)': '{:.2f}'
+            }), use_container_width=True)
+
+def show_price_prediction(re_models):
+    """Display the price prediction view"""
+    st.subheader("💰 Price Prediction Tool")
+    
+    price_prediction_form(re_models)
+
+@st.fragment
+def price_prediction_form(re_models):
+    """Price prediction inputs and result; submitting reruns only this fragment"""
+    # Inputs are batched in a form, so changing them sends nothing until Predict
+    with st.form("price_prediction"):
         col1, col2, col3 = st.columns(3)
         
         with col1:
@@ -783,288 +1073,320 @@ def show_predictive_models(dataframes):
         model_choice = st.selectbox("Select Model", 
                                    ["Simple Regression", "Multiple Regression", "Random Forest"])
         
-        if st.button("Predict Price", type="primary"):
-            features = {
-                'area_sqft': area_sqft,
-                'bedrooms': bedrooms,
-                'bathrooms': bathrooms,
-                'property_age_at_deal': property_age,
-                'experience_years': experience_years,
-                'rating': rating,
-                'hoa_fee': hoa_fee,
-                'school_score': school_score,
-                'walk_score': walk_score,
-                'offer_price': offer_price,
-                'loan_rate': loan_rate
-            }
+        submitted = st.form_submit_button("Predict Price", type="primary")
+    
+    if submitted:
+        features = {
+            'area_sqft': area_sqft,
+            'bedrooms': bedrooms,
+            'bathrooms': bathrooms,
+            'property_age_at_deal': property_age,
+            'experience_years': experience_years,
+            'rating': rating,
+            'hoa_fee': hoa_fee,
+            'school_score': school_score,
+            'walk_score': walk_score,
+            'offer_price': offer_price,
+            'loan_rate': loan_rate
+        }
+        
+        model_map = {
+            "Simple Regression": "simple_regression",
+            "Multiple Regression": "multiple_regression",
+            "Random Forest": "random_forest_regression"
+        }
+        
+        try:
+            predicted_price = re_models.predict_price(model_map[model_choice], features)
             
-            model_map = {
-                "Simple Regression": "simple_regression",
-                "Multiple Regression": "multiple_regression",
-                "Random Forest": "random_forest_regression"
-            }
+            st.success(f"### Predicted Price: ₹{predicted_price:,.2f}")
             
-            try:
-                predicted_price = re_models.predict_price(model_map[model_choice], features)
-                
-                st.success(f"### Predicted Price: ₹{predicted_price:,.2f}")
-                
-                # Show price per sqft
-                price_per_sqft = predicted_price / area_sqft
-                st.info(f"Price per sqft: ₹{price_per_sqft:,.2f}")
-                
-            except Exception as e:
-                st.error(f"Prediction error: {e}")
+            # Show price per sqft
+            price_per_sqft = predicted_price / area_sqft
+            st.info(f"Price per sqft: ₹{price_per_sqft:,.2f}")
+            
+        except Exception as e:
+            st.error(f"Prediction error: {e}")
+
+def show_feature_importance(results):
+    """Display the feature importance view"""
+    st.subheader("📈 Feature Importance Analysis")
     
-    with tab4:
-        st.subheader("📈 Feature Importance Analysis")
+    model_select = st.selectbox("Select Model for Feature Importance",
+                               ["Multiple Regression", "Random Forest Regression"])
+    
+    if model_select == "Multiple Regression" and 'multiple_regression' in results:
+        importance_df = results['multiple_regression']['feature_importance']
         
-        model_select = st.selectbox("Select Model for Feature Importance",
-                                   ["Multiple Regression", "Random Forest Regression"])
+        fig = px.bar(importance_df.head(10), 
+                    x='coefficient', 
+                    y='feature',
+                    orientation='h',
+                    title='Top 10 Feature Coefficients (Multiple Regression)',
+                    labels={'coefficient': 'Coefficient Value', 'feature': 'Feature'},
+                    color='coefficient',
+                    color_continuous_scale='RdBu')
+        plotly_chart(fig, use_container_width=True)
         
-        if model_select == "Multiple Regression" and 'multiple_regression' in results:
-            importance_df = results['multiple_regression']['feature_importance']
-            
-            fig = px.bar(importance_df.head(10), 
-                        x='coefficient', 
-                        y='feature',
-                        orientation='h',
-                        title='Top 10 Feature Coefficients (Multiple Regression)',
-                        labels={'coefficient': 'Coefficient Value', 'feature': 'Feature'},
-                        color='coefficient',
-                        color_continuous_scale='RdBu')
-            st.plotly_chart(fig, use_container_width=True)
-            
-            st.dataframe(importance_df, use_container_width=True)
+        st.dataframe(importance_df, use_container_width=True)
+    
+    elif model_select == "Random Forest Regression" and 'random_forest_regression' in results:
+        importance_df = results['random_forest_regression']['feature_importance']
         
-        elif model_select == "Random Forest Regression" and 'random_forest_regression' in results:
-            importance_df = results['random_forest_regression']['feature_importance']
-            
-            fig = px.bar(importance_df.head(10), 
-                        x='importance', 
-                        y='feature',
-                        orientation='h',
-                        title='Top 10 Feature Importances (Random Forest)',
-                        labels={'importance': 'Importance Score', 'feature': 'Feature'},
-                        color='importance',
-                        color_continuous_scale='Viridis')
-            st.plotly_chart(fig, use_container_width=True)
-            
-            st.dataframe(importance_df, use_container_width=True)
+        fig = px.bar(importance_df.head(10), 
+                    x='importance', 
+                    y='feature',
+                    orientation='h',
+                    title='Top 10 Feature Importances (Random Forest)',
+                    labels={'importance': 'Importance Score', 'feature': 'Feature'},
+                    color='importance',
+                    color_continuous_scale='Viridis')
+        plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(importance_df, use_container_width=True)
+
+def show_status_prediction(re_models, results):
+    """Display the deal status prediction view"""
+    st.subheader("🎯 Deal Status Prediction")
     
-    with tab5:
-        st.subheader("🎯 Deal Status Prediction")
+    if 'status_classifier' in results:
+        # Show classifier metrics
+        clf_results = results['status_classifier']
         
-        if 'status_classifier' in results:
-            # Show classifier metrics
-            clf_results = results['status_classifier']
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Overall Accuracy", f"{clf_results['accuracy']:.2%}")
-            with col2:
-                st.metric("Number of Classes", len(clf_results['classes']))
-            with col3:
-                st.metric("Test Samples", len(clf_results['y_test']))
-            
-            # Confusion Matrix
-            st.subheader("Confusion Matrix")
-            cm = clf_results['confusion_matrix']
-            
-            fig = px.imshow(cm,
-                           labels=dict(x="Predicted", y="Actual", color="Count"),
-                           x=clf_results['classes'],
-                           y=clf_results['classes'],
-                           title="Confusion Matrix",
-                           color_continuous_scale='Blues',
-                           text_auto=True)
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Classification Report
-            st.subheader("Classification Report")
-            report_df = pd.DataFrame(clf_results['classification_report']).transpose()
-            st.dataframe(report_df.style.format("{:.2f}"), use_container_width=True)
-            
-            # Feature Importance for Classifier
-            st.subheader("Feature Importance for Status Prediction")
-            importance_df = clf_results['feature_importance']
-            
-            fig = px.bar(importance_df.head(10), 
-                        x='importance', 
-                        y='feature',
-                        orientation='h',
-                        title='Top 10 Features for Deal Status Prediction',
-                        color='importance',
-                        color_continuous_scale='Greens')
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Interactive Prediction Tool
-            st.subheader("Predict Deal Status")
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                area_sqft_s = st.number_input("Area (sqft) ", min_value=500, max_value=10000, value=1500, key='status_area')
-                bedrooms_s = st.number_input("Bedrooms ", min_value=1, max_value=10, value=3, key='status_bed')
-                bathrooms_s = st.number_input("Bathrooms ", min_value=1, max_value=10, value=2, key='status_bath')
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Overall Accuracy", f"{clf_results['accuracy']:.2%}")
+        with col2:
+            st.metric("Number of Classes", len(clf_results['classes']))
+        with col3:
+            st.metric("Test Samples", len(clf_results['y_test']))
+        
+        # Confusion Matrix
+        st.subheader("Confusion Matrix")
+        cm = clf_results['confusion_matrix']
+        
+        fig = px.imshow(cm,
+                       labels=dict(x="Predicted", y="Actual", color="Count"),
+                       x=clf_results['classes'],
+                       y=clf_results['classes'],
+                       title="Confusion Matrix",
+                       color_continuous_scale='Blues',
+                       text_auto=True)
+        plotly_chart(fig, use_container_width=True)
+        
+        # Classification Report
+        st.subheader("Classification Report")
+        report_df = pd.DataFrame(clf_results['classification_report']).transpose()
+        st.dataframe(report_df.style.format("{:.2f}"), use_container_width=True)
+        
+        # Feature Importance for Classifier
+        st.subheader("Feature Importance for Status Prediction")
+        importance_df = clf_results['feature_importance']
+        
+        fig = px.bar(importance_df.head(10), 
+                    x='importance', 
+                    y='feature',
+                    orientation='h',
+                    title='Top 10 Features for Deal Status Prediction',
+                    color='importance',
+                    color_continuous_scale='Greens')
+        plotly_chart(fig, use_container_width=True)
+        
+        # Interactive Prediction Tool
+        st.subheader("Predict Deal Status")
+        status_prediction_form(re_models)
+
+@st.fragment
+def status_prediction_form(re_models):
+    """Deal status prediction inputs and result; submitting reruns only this fragment"""
+    with st.form("status_prediction"):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            area_sqft_s = st.number_input("Area (sqft) ", min_value=500, max_value=10000, value=1500, key='status_area')
+            bedrooms_s = st.number_input("Bedrooms ", min_value=1, max_value=10, value=3, key='status_bed')
+            bathrooms_s = st.number_input("Bathrooms ", min_value=1, max_value=10, value=2, key='status_bath')
+        
+        with col2:
+            property_age_s = st.number_input("Property Age ", min_value=0, max_value=100, value=5, key='status_age')
+            hoa_fee_s = st.number_input("HOA Fee ", min_value=0, max_value=100000, value=5000, key='status_hoa')
+            school_score_s = st.slider("School Score ", 0, 100, 75, key='status_school')
+        
+        with col3:
+            walk_score_s = st.slider("Walk Score ", 0, 100, 70, key='status_walk')
+            experience_years_s = st.number_input("Broker Experience ", min_value=0, max_value=50, value=10, key='status_exp')
+            rating_s = st.slider("Broker Rating ", 0.0, 5.0, 4.0, 0.1, key='status_rating')
+        
+        offer_price_s = st.number_input("Offer Price ", min_value=100000, max_value=50000000, value=5000000, key='status_offer')
+        loan_rate_s = st.slider("Loan Rate (%) ", 5.0, 15.0, 9.5, 0.1, key='status_loan')
+        
+        submitted = st.form_submit_button("Predict Deal Status", type="primary")
+    
+    if submitted:
+        features_s = {
+            'area_sqft': area_sqft_s,
+            'bedrooms': bedrooms_s,
+            'bathrooms': bathrooms_s,
+            'property_age_at_deal': property_age_s,
+            'experience_years': experience_years_s,
+            'rating': rating_s,
+            'hoa_fee': hoa_fee_s,
+            'school_score': school_score_s,
+            'walk_score': walk_score_s,
+            'offer_price': offer_price_s,
+            'loan_rate': loan_rate_s
+        }
+        
+        try:
+            prediction = re_models.predict_status(features_s)
             
-            with col2:
-                property_age_s = st.number_input("Property Age ", min_value=0, max_value=100, value=5, key='status_age')
-                hoa_fee_s = st.number_input("HOA Fee ", min_value=0, max_value=100000, value=5000, key='status_hoa')
-                school_score_s = st.slider("School Score ", 0, 100, 75, key='status_school')
+            st.success(f"### Predicted Status: {prediction['predicted_status']}")
             
-            with col3:
-                walk_score_s = st.slider("Walk Score ", 0, 100, 70, key='status_walk')
-                experience_years_s = st.number_input("Broker Experience ", min_value=0, max_value=50, value=10, key='status_exp')
-                rating_s = st.slider("Broker Rating ", 0.0, 5.0, 4.0, 0.1, key='status_rating')
+            # Show probabilities
+            st.subheader("Prediction Probabilities")
+            prob_df = pd.DataFrame(list(prediction['probabilities'].items()), 
+                                  columns=['Status', 'Probability'])
+            prob_df['Probability'] = prob_df['Probability'] * 100
             
-            offer_price_s = st.number_input("Offer Price ", min_value=100000, max_value=50000000, value=5000000, key='status_offer')
-            loan_rate_s = st.slider("Loan Rate (%) ", 5.0, 15.0, 9.5, 0.1, key='status_loan')
+            fig = px.bar(prob_df, x='Status', y='Probability',
+                        title='Prediction Confidence',
+                        color='Probability',
+                        color_continuous_scale='Blues')
+            plotly_chart(fig, use_container_width=True)
             
-            if st.button("Predict Deal Status", type="primary"):
-                features_s = {
-                    'area_sqft': area_sqft_s,
-                    'bedrooms': bedrooms_s,
-                    'bathrooms': bathrooms_s,
-                    'property_age_at_deal': property_age_s,
-                    'experience_years': experience_years_s,
-                    'rating': rating_s,
-                    'hoa_fee': hoa_fee_s,
-                    'school_score': school_score_s,
-                    'walk_score': walk_score_s,
-                    'offer_price': offer_price_s,
-                    'loan_rate': loan_rate_s
-                }
-                
-                try:
-                    prediction = re_models.predict_status(features_s)
-                    
-                    st.success(f"### Predicted Status: {prediction['predicted_status']}")
-                    
-                    # Show probabilities
-                    st.subheader("Prediction Probabilities")
-                    prob_df = pd.DataFrame(list(prediction['probabilities'].items()), 
-                                          columns=['Status', 'Probability'])
-                    prob_df['Probability'] = prob_df['Probability'] * 100
-                    
-                    fig = px.bar(prob_df, x='Status', y='Probability',
-                                title='Prediction Confidence',
-                                color='Probability',
-                                color_continuous_scale='Blues')
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                except Exception as e:
-                    st.error(f"Prediction error: {e}")
+        except Exception as e:
+            st.error(f"Prediction error: {e}")
+
+def show_model_performance(results, models_version):
+    """Display the model performance view"""
+    st.subheader("📉 Model Performance Visualization")
+    
+    model_perf = st.selectbox("Select Model", 
+                             ["Simple Regression", "Multiple Regression", "Random Forest Regression"])
+    
+    model_key_map = {
+        "Simple Regression": "simple_regression",
+        "Multiple Regression": "multiple_regression",
+        "Random Forest Regression": "random_forest_regression"
+    }
     
-    with tab6:
-        st.subheader("📉 Model Performance Visualization")
+    model_key = model_key_map[model_perf]
+    
+    if model_key in results:
+        with span('performance figures', stage='figure'):
+            figures = get_performance_figures(models_version, model_key, results[model_key])
         
-        model_perf = st.selectbox("Select Model", 
-                                 ["Simple Regression", "Multiple Regression", "Random Forest Regression"])
+        # Actual vs Predicted
+        st.subheader("Actual vs Predicted Prices")
+        plotly_chart(figures['line'], use_container_width=True)
         
-        model_key_map = {
-            "Simple Regression": "simple_regression",
-            "Multiple Regression": "multiple_regression",
-            "Random Forest Regression": "random_forest_regression"
-        }
+        # Scatter Plot
+        st.subheader("Prediction Scatter Plot")
+        plotly_chart(figures['scatter'], use_container_width=True)
         
-        model_key = model_key_map[model_perf]
+        # Residual Plot
+        st.subheader("Residual Analysis")
+        plotly_chart(figures['residuals'], use_container_width=True)
         
-        if model_key in results:
-            result = results[model_key]
-            
-            # Actual vs Predicted
-            st.subheader("Actual vs Predicted Prices")
-            
-            comparison_df = pd.DataFrame({
-                'Actual': result['y_test'].values[:100],
-                'Predicted': result['y_pred'][:100]
-            })
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(y=comparison_df['Actual'], 
-                                    mode='lines+markers',
-                                    name='Actual Price',
-                                    line=dict(color='blue')))
-            fig.add_trace(go.Scatter(y=comparison_df['Predicted'], 
-                                    mode='lines+markers',
-                                    name='Predicted Price',
-                                    line=dict(color='red')))
-            fig.update_layout(title='Actual vs Predicted Prices (First 100 Samples)',
-                            xaxis_title='Sample Index',
-                            yaxis_title='Price (₹)')
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Scatter Plot
-            st.subheader("Prediction Scatter Plot")
-            scatter_df = pd.DataFrame({
-                'Actual': result['y_test'].values,
-                'Predicted': result['y_pred']
-            })
-            
-            fig = px.scatter(scatter_df, x='Actual', y='Predicted',
-                           title='Actual vs Predicted Scatter Plot',
-                           labels={'Actual': 'Actual Price (₹)', 'Predicted': 'Predicted Price (₹)'},
-                           trendline='ols')
-            
-            # Add perfect prediction line
-            min_val = min(scatter_df['Actual'].min(), scatter_df['Predicted'].min())
-            max_val = max(scatter_df['Actual'].max(), scatter_df['Predicted'].max())
-            fig.add_trace(go.Scatter(x=[min_val, max_val], y=[min_val, max_val],
+        # Distribution of Residuals
+        plotly_chart(figures['residual_histogram'], use_container_width=True)
+
+@st.cache_resource(show_spinner="Building diagnostics...", max_entries=8)
+def get_performance_figures(models_version, model_key, _result):
+    """Diagnostic figures for one regression model, built once per registered model set"""
+    result = _result
+    comparison_df = pd.DataFrame({
+        'Actual': result['y_test'].values[:100],
+        'Predicted': result['y_pred'][:100]
+    })
+    
+    line_fig = go.Figure()
+    line_fig.add_trace(go.Scatter(y=comparison_df['Actual'], 
+                                 mode='lines+markers',
+                                 name='Actual Price',
+                                 line=dict(color='blue')))
+    line_fig.add_trace(go.Scatter(y=comparison_df['Predicted'], 
+                                 mode='lines+markers',
+                                 name='Predicted Price',
+                                 line=dict(color='red')))
+    line_fig.update_layout(title='Actual vs Predicted Prices (First 100 Samples)',
+                          xaxis_title='Sample Index',
+                          yaxis_title='Price (₹)')
+    
+    scatter_df = pd.DataFrame({
+        'Actual': result['y_test'].values,
+        'Predicted': result['y_pred']
+    })
+    
+    # Only a density-preserving sample of the test set is drawn; the
+    # trendline is the least-squares fit over all of it, stored with the results
+    scatter_fig = scatter_figure(scatter_df['Actual'], scatter_df['Predicted'],
+                                title='Actual vs Predicted Scatter Plot',
+                                x_label='Actual Price (₹)', y_label='Predicted Price (₹)',
+                                budget=SCATTER_POINT_BUDGETS['prediction'])
+    
+    trend = result['trendline']
+    trend_x = np.array(trend['x_range'])
+    scatter_fig.add_trace(go.Scatter(x=trend_x, y=trend['intercept'] + trend['slope'] * trend_x,
+                                    mode='lines',
+                                    name='Trendline (OLS)',
+                                    line=dict(color='orange')))
+    
+    # Add perfect prediction line
+    min_val = min(scatter_df['Actual'].min(), scatter_df['Predicted'].min())
+    max_val = max(scatter_df['Actual'].max(), scatter_df['Predicted'].max())
+    scatter_fig.add_trace(go.Scatter(x=[min_val, max_val], y=[min_val, max_val],
                                     mode='lines',
                                     name='Perfect Prediction',
                                     line=dict(color='green', dash='dash')))
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Residual Plot
-            st.subheader("Residual Analysis")
-            residuals = result['y_test'].values - result['y_pred']
-            
-            fig = px.scatter(x=result['y_pred'], y=residuals,
-                           title='Residual Plot',
-                           labels={'x': 'Predicted Price (₹)', 'y': 'Residual (Actual - Predicted)'},
-                           color=residuals,
-                           color_continuous_scale='RdBu')
-            fig.add_hline(y=0, line_dash="dash", line_color="red")
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Distribution of Residuals
-            fig = px.histogram(x=residuals, nbins=50,
-                             title='Distribution of Residuals',
-                             labels={'x': 'Residual Value'},
-                             color_discrete_sequence=['#3498db'])
-            st.plotly_chart(fig, use_container_width=True)
+    
+    residuals = result['y_test'].values - result['y_pred']
+    residual_fig = scatter_figure(result['y_pred'], residuals,
+                                 title='Residual Plot',
+                                 x_label='Predicted Price (₹)', y_label='Residual (Actual - Predicted)',
+                                 budget=SCATTER_POINT_BUDGETS['residuals'],
+                                 color=residuals,
+                                 color_scale='RdBu')
+    residual_fig.add_hline(y=0, line_dash="dash", line_color="red")
+    
+    histogram_fig = histogram_figure(residuals, bins=50,
+                                    title='Distribution of Residuals',
+                                    x_label='Residual Value',
+                                    color='#3498db')
+    
+    return {
+        'line': line_fig,
+        'scatter': scatter_fig,
+        'residuals': residual_fig,
+        'residual_histogram': histogram_fig
+    }
+
+@st.cache_resource(show_spinner="Training models...", max_entries=2)
+def load_trained_models(model_key, _df_transformed):
+    """Registered model set for model_key, shared across reruns and sessions"""
+    from model_registry import get_or_train
+    return get_or_train(_df_transformed, key=model_key)
 
-def prepare_transformed_data(dataframes):
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_model_inputs(facts_version, _facts):
+    """Modeling columns and their registry key, recomputed only when the fact table changes"""
+    from model_registry import registry_key
+    df_transformed = prepare_transformed_data(_facts)
+    if df_transformed is None:
+        return None, None
+    return df_transformed, registry_key(df_transformed)
+
+def prepare_transformed_data(facts):
     """Prepare and transform data for modeling"""
     try:
-        # Merge all dataframes
-        deals = dataframes['Deals'].copy()
-        customers = dataframes['Customers'].copy()
-        brokers = dataframes['Brokers'].copy()
-        properties = dataframes['Properties'].copy()
-        prop_details = dataframes['PropertyDetails'].copy()
-        
-        # Merge datasets
-        df = deals.merge(customers, on='customer_id', how='left', suffixes=('', '_cust'))
-        df = df.merge(brokers, on='broker_id', how='left', suffixes=('', '_broker'))
-        df = df.merge(properties, on='property_id', how='left', suffixes=('', '_prop'))
-        df = df.merge(prop_details, on='property_id', how='left', suffixes=('', '_detail'))
-        
-        # Calculate property age
-        if 'deal_date' in df.columns and 'year_built' in df.columns:
-            df['deal_date'] = pd.to_datetime(df['deal_date'], errors='coerce')
-            df['property_age_at_deal'] = df['deal_date'].dt.year - df['year_built']
-        
         # Select only numeric columns needed for modeling
         numeric_cols = ['area_sqft', 'bedrooms', 'bathrooms', 'property_age_at_deal',
                        'experience_years', 'rating', 'hoa_fee', 'school_score', 
                        'walk_score', 'offer_price', 'loan_rate', 'final_price', 'status']
         
         # Keep only available columns
-        available_cols = [col for col in numeric_cols if col in df.columns]
-        df_transformed = df[available_cols].copy()
+        available_cols = [col for col in numeric_cols if col in facts.columns]
+        df_transformed = facts[available_cols].copy()
         
         return df_transformed
         
@@ -0,0 +1,128 @@
+"""Index-based foreign key lookups into the dimension sheets.
+
+Each dimension sheet gets a sorted key index built once. Fact rows resolve
+their foreign keys to dimension row positions with ``searchsorted`` (or a
+direct key -> row table when the integer keys are dense), and
+columns are then gathered positionally with ``take``. Only the columns a
+caller asks for are materialized, so a lookup costs time linear in the
+columns used instead of rehashing and copying the whole dimension the way a
+``merge`` does.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+# Foreign key on the Deals sheet for each dimension sheet
+DEAL_KEYS = {
+    'Properties': 'property_id',
+    'Customers': 'customer_id',
+    'Brokers': 'broker_id',
+    'PropertyDetails': 'property_id'
+}
+
+
+class DimensionIndex:
+    """Sorted key index over one dimension sheet"""
+
+    def __init__(self, dimension, key):
+        self.dimension = dimension
+        self.key = key
+
+        keys = dimension[key]
+        self._numeric = pd.api.types.is_numeric_dtype(keys)
+        if self._numeric:
+            values = keys.to_numpy(dtype='float64', na_value=np.nan)
+            rows = np.flatnonzero(~np.isnan(values))
+            # A stable sort keeps the first row of any duplicated key first
+            order = np.argsort(values[rows], kind='stable')
+            self._keys = values[rows][order]
+            self._rows = rows[order]
+            self._direct = self._direct_table()
+        else:
+            # Non-numeric keys fall back to a hash index
+            first = (~keys.duplicated(keep='first') & keys.notna()).to_numpy()
+            self._rows = np.flatnonzero(first)
+            self._index = pd.Index(keys.to_numpy()[first])
+
+    def _direct_table(self):
+        """Key -> row table for dense integer keys, or None when keys are sparse"""
+        keys = self._keys
+        if len(keys) == 0 or not np.all(keys == np.floor(keys)):
+            return None
+        low, high = int(keys[0]), int(keys[-1])
+        if high - low > 4 * len(keys) + 1024:
+            return None
+        table = np.full(high - low + 1, -1, dtype=np.intp)
+        # Assign in reverse so the first row of a duplicated key wins
+        table[(keys[::-1] - low).astype(np.intp)] = self._rows[::-1]
+        self._low = low
+        return table
+
+    def positions(self, foreign_keys):
+        """Dimension row position for each foreign key, -1 where there is no match"""
+        if not self._numeric:
+            found = self._index.get_indexer(pd.Index(foreign_keys))
+            return np.where(found >= 0, self._rows[np.maximum(found, 0)], -1)
+
+        if len(self._keys) == 0:
+            return np.full(len(foreign_keys), -1, dtype=np.intp)
+        values = pd.Series(foreign_keys).to_numpy(dtype='float64', na_value=np.nan)
+        if self._direct is not None:
+            # Dense integer keys: one array lookup per row instead of a binary search
+            offsets = values - self._low
+            valid = (offsets >= 0) & (offsets < len(self._direct)) & (offsets == np.floor(offsets))
+            result = np.full(len(values), -1, dtype=np.intp)
+            result[valid] = self._direct[offsets[valid].astype(np.intp)]
+            return result
+
+        slots = np.minimum(np.searchsorted(self._keys, values), len(self._keys) - 1)
+        found = self._keys[slots] == values
+        return np.where(found, self._rows[slots], -1)
+
+    def take(self, column, positions):
+        """Values of a dimension column at positions, missing where position is -1"""
+        values = self.dimension[column].array
+        return take(values, positions, allow_fill=True)
+
+
+def build_dimension_indexes(dataframes):
+    """DimensionIndex for every dimension sheet that has its key column"""
+    return {sheet: DimensionIndex(dataframes[sheet], key)
+            for sheet, key in DEAL_KEYS.items()
+            if sheet in dataframes and key in dataframes[sheet].columns}
+
+
+class DealLookup:
+    """Resolves the Deals foreign keys once and serves dimension columns on demand
+
+    Pass prebuilt ``indexes`` to resolve many blocks of deals (e.g. ingestion
+    chunks) against the same dimension indexes.
+    """
+
+    def __init__(self, dataframes, fact_sheet='Deals', indexes=None):
+        self.facts = dataframes[fact_sheet]
+        if indexes is None:
+            indexes = build_dimension_indexes(dataframes)
+        self.indexes = {}
+        self.positions = {}
+        for sheet, index in indexes.items():
+            if index.key in self.facts.columns:
+                self.indexes[sheet] = index
+                self.positions[sheet] = index.positions(self.facts[index.key])
+
+    def column(self, sheet, column, name=None):
+        """A dimension column aligned to the fact rows"""
+        values = self.indexes[sheet].take(column, self.positions[sheet])
+        return pd.Series(values, index=self.facts.index, name=name or column)
+
+    def frame(self, fact_columns=None, **dimension_columns):
+        """Narrow frame of the requested fact and dimension columns
+
+        Example: ``lookup.frame(['final_price'], Properties=['city', 'area_sqft'])``.
+        Dimension columns are named ``<sheet>.<column>``.
+        """
+        columns = {col: self.facts[col] for col in (fact_columns or [])}
+        for sheet, sheet_columns in dimension_columns.items():
+            for col in sheet_columns:
+                columns[f"{sheet}.{col}"] = self.column(sheet, col)
+        return pd.DataFrame(columns, index=self.facts.index)
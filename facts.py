@@ -0,0 +1,53 @@
+"""Denormalized deal fact table shared by every dashboard page.
+
+Each deal row carries the columns of its property, customer, broker and
+property details. Deal columns keep their own names; a dimension column whose
+name clashes with one already in the table is prefixed with its dimension
+(``property_city``, ``customer_city``, ``broker_city``), so there is never a
+``city_y`` vs ``city_prop`` ambiguity between pages.
+"""
+import pandas as pd
+
+from dimensions import DealLookup
+
+# (sheet, prefix for clashing column names), in the order columns are added
+DIMENSIONS = [
+    ('Properties', 'property'),
+    ('Customers', 'customer'),
+    ('Brokers', 'broker'),
+    ('PropertyDetails', 'detail')
+]
+
+
+def build_deal_facts(dataframes, lookup=None):
+    """Build the deal fact table from the cleaned sheets"""
+    lookup = lookup or DealLookup(dataframes)
+    deals = lookup.facts
+
+    # Gather dimension columns positionally, then assemble the table in one step
+    columns = {}
+    taken = set(deals.columns)
+    for sheet, prefix in DIMENSIONS:
+        if sheet not in lookup.indexes:
+            continue
+        key = lookup.indexes[sheet].key
+        for col in dataframes[sheet].columns:
+            if col == key:
+                continue
+            name = f"{prefix}_{col}" if col in taken else col
+            columns[name] = lookup.column(sheet, col, name)
+            taken.add(name)
+
+    facts = pd.concat([deals, pd.DataFrame(columns, index=deals.index)], axis=1)
+
+    # Derived columns every page uses
+    if 'deal_date' in facts.columns:
+        if not pd.api.types.is_datetime64_any_dtype(facts['deal_date']):
+            facts['deal_date'] = pd.to_datetime(facts['deal_date'], errors='coerce')
+        if 'year_built' in facts.columns:
+            facts['property_age_at_deal'] = facts['deal_date'].dt.year - facts['year_built']
+
+    if 'final_price' in facts.columns and 'area_sqft' in facts.columns:
+        facts['price_per_sqft'] = facts['final_price'] / facts['area_sqft']
+
+    return facts
@@ -0,0 +1,118 @@
+"""Cross-filtering of the deal fact table through precomputed indexes.
+
+FilterIndex is built once per fact table version. Every categorical filter
+column is factorized into one packed bitmap per value (a bit per deal), and
+deal dates into a sorted position array. A selection ORs the bitmaps of the
+chosen values within a column, ANDs the columns together and with the date
+range, and unpacks the result into row positions, so changing a filter costs
+a few bit operations over n/8 bytes rather than a scan of every column.
+"""
+import numpy as np
+import pandas as pd
+
+# Filter name -> fact table column
+FILTER_COLUMNS = {
+    'city': 'property_city',
+    'property_type': 'property_type',
+    'status': 'status',
+    'segment': 'segment'
+}
+DATE_FILTER = 'deal_date'
+
+
+def _date_bounds(date_range):
+    start, end = date_range
+    # The end date is inclusive of the whole day
+    return pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+
+
+class FilterIndex:
+    """Bitmap index per filter column plus a sorted date index over the fact table"""
+
+    def __init__(self, facts):
+        self.size = len(facts)
+        self.values = {}
+        self.bitmaps = {}
+        for name, column in FILTER_COLUMNS.items():
+            if column not in facts.columns:
+                continue
+            codes, uniques = pd.factorize(facts[column], sort=True)
+            self.values[name] = list(uniques)
+            self.bitmaps[name] = np.vstack([np.packbits(codes == code) for code in range(len(uniques))]) \
+                if len(uniques) else np.zeros((0, (self.size + 7) // 8), dtype=np.uint8)
+
+        self.dates = None
+        if DATE_FILTER in facts.columns:
+            dates = pd.to_datetime(facts[DATE_FILTER], errors='coerce').to_numpy()
+            valid = np.flatnonzero(~np.isnat(dates))
+            order = valid[np.argsort(dates[valid], kind='stable')]
+            self.date_order = order
+            self.dates = dates[order]
+
+    @property
+    def date_range(self):
+        """First and last deal date, or None when deals carry no dates"""
+        if self.dates is None or len(self.dates) == 0:
+            return None
+        return pd.Timestamp(self.dates[0]).date(), pd.Timestamp(self.dates[-1]).date()
+
+    def _value_bitmap(self, name, chosen):
+        lookup = {value: code for code, value in enumerate(self.values[name])}
+        codes = [lookup[value] for value in chosen if value in lookup]
+        if not codes:
+            return np.zeros(self.bitmaps[name].shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[name][codes], axis=0)
+
+    def _date_bitmap(self, date_range):
+        start, end = _date_bounds(date_range)
+        low = np.searchsorted(self.dates, np.datetime64(start), side='left')
+        high = np.searchsorted(self.dates, np.datetime64(end), side='left')
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.date_order[low:high]] = True
+        return np.packbits(mask)
+
+    def positions(self, selection):
+        """Fact row positions matching selection, or None when no filter is active"""
+        bitmap = None
+        for name, chosen in selection.items():
+            if name == DATE_FILTER:
+                if self.dates is None:
+                    continue
+                part = self._date_bitmap(chosen)
+            elif name in self.bitmaps:
+                part = self._value_bitmap(name, chosen)
+            else:
+                continue
+            bitmap = part if bitmap is None else bitmap & part
+
+        if bitmap is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+
+
+def mask_frame(facts, selection):
+    """Boolean mask of the fact rows matching selection, for blocks without an index"""
+    mask = np.ones(len(facts), dtype=bool)
+    for name, chosen in selection.items():
+        if name == DATE_FILTER:
+            if DATE_FILTER in facts.columns:
+                start, end = _date_bounds(chosen)
+                dates = pd.to_datetime(facts[DATE_FILTER], errors='coerce')
+                mask &= ((dates >= start) & (dates < end)).to_numpy()
+        elif FILTER_COLUMNS.get(name) in facts.columns:
+            mask &= facts[FILTER_COLUMNS[name]].isin(chosen).to_numpy()
+    return mask
+
+
+def filter_sheets(dataframes, facts, positions):
+    """Sheets restricted to the filtered deals and the records those deals reference"""
+    matched = facts.iloc[positions]
+    filtered = dict(dataframes)
+    if 'Deals' in dataframes:
+        filtered['Deals'] = dataframes['Deals'].iloc[positions]
+    for sheet, key in [('Customers', 'customer_id'), ('Properties', 'property_id'),
+                       ('Brokers', 'broker_id'), ('PropertyDetails', 'property_id')]:
+        if sheet in dataframes and key in dataframes[sheet].columns and key in matched.columns:
+            df = dataframes[sheet]
+            filtered[sheet] = df[df[key].isin(matched[key].unique())]
+    return filtered
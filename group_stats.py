@@ -0,0 +1,14 @@
+"""Rate and success-percentage helpers for the KPI rollups.
+
+Per-group counts come from the additive cells of ``kpi_cube.KPICube``;
+this module turns those counts into the percentages the charts show.
+"""
+import numpy as np
+
+
+def percentage(hits, totals):
+    """hits / totals * 100, with 0 where totals is 0"""
+    hits = np.asarray(hits, dtype='float64')
+    totals = np.asarray(totals, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(totals > 0, hits / totals * 100, 0.0)
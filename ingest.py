@@ -0,0 +1,142 @@
+"""Out-of-core ingestion of deal partitions.
+
+When deal history outgrows a single in-memory DataFrame, drop it into
+``data/deals/`` as CSV and/or Parquet partitions. Deals are then read in
+fixed-size chunks. Each chunk is cleaned like ``prepare_data`` does, gets
+the fact table's derived columns (``property_age_at_deal``,
+``price_per_sqft``) from the in-memory dimension sheets, and is folded into
+the streaming aggregators behind the Deals and Analytics pages. Only one
+chunk is ever held in memory, and the aggregators' size is bounded by the
+dimensions' cardinality rather than by the number of deals, so each chunk
+costs the same to fold in as the first.
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DealsSummary
+from compaction import compact_frame
+from dimensions import DealLookup, build_dimension_indexes
+from facts import build_deal_facts
+from kpi_cube import KPICube
+
+DEALS_PARTITION_DIR = 'data/deals'
+DEFAULT_CHUNK_SIZE = 200000
+PARTITION_PATTERNS = ['*.parquet', '*.pq', '*.csv']
+
+
+def partition_files(path=DEALS_PARTITION_DIR):
+    """Sorted partition files under path (or path itself if it is a file)"""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for pattern in PARTITION_PATTERNS:
+        files.extend(glob.glob(os.path.join(path, '**', pattern), recursive=True))
+    return sorted(files)
+
+
+def has_partitions(path=DEALS_PARTITION_DIR):
+    return os.path.isdir(path) and bool(partition_files(path))
+
+
+def iter_deal_chunks(path=DEALS_PARTITION_DIR, chunk_size=DEFAULT_CHUNK_SIZE, files=None):
+    """Yield DataFrames of at most chunk_size deals from every partition (or just files)"""
+    for file in files if files is not None else partition_files(path):
+        if file.endswith('.csv'):
+            yield from pd.read_csv(file, chunksize=chunk_size)
+        else:
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+
+
+def _file_range(file, column):
+    """Min and max of column in one partition, from Parquet statistics when it has them"""
+    if file.endswith('.csv'):
+        header = pd.read_csv(file, nrows=0).columns
+        if column not in header:
+            return None
+        chunks = pd.read_csv(file, usecols=[column], chunksize=DEFAULT_CHUNK_SIZE)
+    else:
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(file)
+        if column not in parquet.schema_arrow.names:
+            return None
+        position = parquet.schema_arrow.get_field_index(column)
+        stats = [parquet.metadata.row_group(i).column(position).statistics
+                 for i in range(parquet.metadata.num_row_groups)]
+        if stats and all(s is not None and s.has_min_max for s in stats):
+            return min(s.min for s in stats), max(s.max for s in stats)
+        chunks = (batch.to_pandas() for batch in parquet.iter_batches(columns=[column]))
+
+    low = high = None
+    for chunk in chunks:
+        values = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if len(values):
+            low = values.min() if low is None else min(low, values.min())
+            high = values.max() if high is None else max(high, values.max())
+    return None if low is None else (low, high)
+
+
+def value_ranges(columns, path=DEALS_PARTITION_DIR, files=None):
+    """Min and max of each column over every partition (or just files)
+
+    Lets a streamed histogram bin on the same edges as an in-memory one. The
+    bounds go through the same dtype compaction as the chunks, so float32
+    columns round the way the values being binned do.
+    """
+    bounds = {}
+    for file in files if files is not None else partition_files(path):
+        for column in columns:
+            found = _file_range(file, column)
+            if found is None:
+                continue
+            low, high = bounds.get(column, found)
+            bounds[column] = (min(low, found[0]), max(high, found[1]))
+
+    ranges = {}
+    for column, (low, high) in bounds.items():
+        compacted = compact_frame(pd.DataFrame({column: [low, high]}))[column]
+        ranges[column] = tuple(compacted.to_numpy(dtype='float64'))
+    return ranges
+
+
+def prepare_deal_chunk(chunk, normalizer=None):
+    """Clean one chunk of deals the way prepare_data cleans the sheets"""
+    if normalizer is not None and 'city' in chunk.columns:
+        chunk['city'] = normalizer.normalize(chunk['city'])
+    if 'deal_date' in chunk.columns:
+        chunk['deal_date'] = pd.to_datetime(chunk['deal_date'], errors='coerce')
+    return compact_frame(chunk)
+
+
+def ingest_deals(dataframes, path=DEALS_PARTITION_DIR, chunk_size=DEFAULT_CHUNK_SIZE, normalizer=None,
+                 files=None, summary=None, cube=None, row_filter=None):
+    """Stream every deal partition into a DealsSummary and a KPICube
+
+    ``dataframes`` supplies the (in-memory) dimension sheets; its Deals sheet,
+    if any, is ignored in favour of the partitions. Pass ``files`` with an
+    existing ``summary`` and ``cube`` to fold only those partitions into them.
+    ``row_filter`` maps a block of fact rows to a mask of the rows to keep.
+    """
+    dimensions = {name: df for name, df in dataframes.items() if name != 'Deals'}
+    indexes = build_dimension_indexes(dimensions)
+
+    if summary is None:
+        # Filtered rows span a narrower range than the partitions do
+        ranges = value_ranges(DealsSummary.HISTOGRAMS, path, files) if row_filter is None else None
+        summary = DealsSummary(ranges)
+    for chunk in iter_deal_chunks(path, chunk_size, files):
+        chunk = prepare_deal_chunk(chunk, normalizer)
+        sheets = dict(dimensions, Deals=chunk)
+        facts = build_deal_facts(sheets, DealLookup(sheets, indexes=indexes))
+        if row_filter is not None:
+            facts = facts[row_filter(facts)]
+
+        summary.add(facts)
+        cube = KPICube.from_facts(facts) if cube is None else cube.update(facts)
+
+    return summary, cube
@@ -0,0 +1,226 @@
+"""Latency and memory instrumentation of the dashboard's hot paths.
+
+A Trace collects the spans of one script run. Code marks a stage with
+``with span('deal facts', stage='merge'):``; while a trace is active on the
+current thread (every Streamlit session runs its script on its own thread),
+the span records its wall time, the resident set size when it started and
+finished, and the peak RSS a background sampler saw in between. With no
+active trace a span does nothing, so instrumented code costs nothing when
+profiling is off.
+
+Finished traces can be appended to a JSON lines log, one span per line, and
+the log from any number of sessions summarized per page and stage:
+
+    python instrumentation.py .cache/traces.jsonl
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+TRACE_LOG_ENV = 'DASHBOARD_TRACE_LOG'
+MEMORY_SAMPLE_INTERVAL = 0.01
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Only the lifetime peak is available here; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemorySampler:
+    """Background thread polling the RSS while any span is open, tracking each span's peak"""
+
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._peaks = {}
+        self._active = threading.Event()
+        self._thread = None
+
+    def start(self, rss):
+        token = object()
+        with self._lock:
+            self._peaks[token] = rss or 0
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+                self._thread.start()
+            self._active.set()
+        return token
+
+    def stop(self, token, rss):
+        with self._lock:
+            peak = max(self._peaks.pop(token), rss or 0)
+            if not self._peaks:
+                self._active.clear()
+        return peak
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            rss = current_rss() or 0
+            with self._lock:
+                for token, peak in self._peaks.items():
+                    if rss > peak:
+                        self._peaks[token] = rss
+            time.sleep(self.interval)
+
+
+_sampler = MemorySampler()
+
+
+class Trace:
+    """Spans recorded during one run of a page"""
+
+    def __init__(self, page, session=None, sample_memory=True):
+        self.page = page
+        self.session = session
+        self.run = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.sample_memory = sample_memory
+        self.spans = []
+        self._stack = []
+
+    @contextlib.contextmanager
+    def span(self, name, stage=None, **fields):
+        """Time the enclosed block as a span, nested under any span already open"""
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(name)
+        rss_start = current_rss() if self.sample_memory else None
+        token = _sampler.start(rss_start) if self.sample_memory else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            rss_end = current_rss() if self.sample_memory else None
+            peak = _sampler.stop(token, rss_end) if self.sample_memory else None
+            self._stack.pop()
+            self.spans.append(dict(fields, **{
+                'span': name,
+                'stage': stage or name,
+                'parent': parent,
+                'depth': len(self._stack),
+                'seconds': seconds,
+                'rss_start_mb': rss_start / 2**20 if rss_start else None,
+                'rss_peak_mb': peak / 2**20 if peak else None,
+                'rss_delta_mb': (rss_end - rss_start) / 2**20 if rss_start and rss_end else None
+            }))
+
+    def records(self):
+        """Spans as JSON-serializable dicts tagged with the session, run and page"""
+        return [dict(span, session=self.session, run=self.run, page=self.page, timestamp=self.started)
+                for span in self.spans]
+
+    def to_frame(self):
+        columns = ['span', 'stage', 'parent', 'depth', 'seconds', 'rss_start_mb', 'rss_peak_mb', 'rss_delta_mb']
+        return pd.DataFrame(self.spans, columns=columns)
+
+
+def start_trace(page, session=None, sample_memory=True):
+    """Begin recording spans for this thread's script run"""
+    _local.trace = Trace(page, session, sample_memory)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def end_trace(log_path=None):
+    """Stop recording on this thread, appending the trace to log_path (or $DASHBOARD_TRACE_LOG) if set"""
+    trace = current_trace()
+    _local.trace = None
+    log_path = log_path or os.environ.get(TRACE_LOG_ENV)
+    if trace is not None and log_path:
+        write_jsonl(trace.records(), log_path)
+    return trace
+
+
+def span(name, stage=None, **fields):
+    """Span on this thread's active trace, or a no-op when nothing is being traced"""
+    trace = current_trace()
+    if trace is None:
+        return contextlib.nullcontext()
+    return trace.span(name, stage, **fields)
+
+
+def timed(name, stage=None):
+    """Decorator recording every call of a function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def write_jsonl(records, path):
+    """Append records to a JSON lines file; safe to call from several sessions at once"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    lines = ''.join(json.dumps(record, default=str) + '\n' for record in records)
+    with _log_lock, open(path, 'a') as f:
+        f.write(lines)
+
+
+def load_traces(paths):
+    """Spans from one or more JSON lines logs as a DataFrame"""
+    frames = [pd.read_json(path, lines=True) for path in ([paths] if isinstance(paths, str) else paths)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def summarize(spans, by=('page', 'stage')):
+    """Call count, latency percentiles and memory of spans grouped by page and stage, slowest first"""
+    grouped = spans.groupby(list(by))
+    summary = pd.DataFrame({
+        'calls': grouped['seconds'].size(),
+        'total_s': grouped['seconds'].sum(),
+        'p50_s': grouped['seconds'].median(),
+        'p95_s': grouped['seconds'].quantile(0.95),
+        'max_s': grouped['seconds'].max(),
+        'peak_rss_mb': grouped['rss_peak_mb'].max(),
+        'max_rss_delta_mb': grouped['rss_delta_mb'].max()
+    })
+    return summary.sort_values('total_s', ascending=False).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize dashboard trace logs per page and stage")
+    parser.add_argument('logs', nargs='+', help="JSON lines trace logs")
+    parser.add_argument('--by', default='page,stage', help="Comma-separated grouping columns")
+    parser.add_argument('--top', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    spans = load_traces(args.logs)
+    if spans.empty:
+        print("No spans recorded")
+        return 0
+    print(f"{len(spans):,} spans from {spans['run'].nunique():,} runs in {spans['session'].nunique():,} sessions")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(summarize(spans, by=args.by.split(',')).head(args.top).to_string(index=False, float_format='{:.3f}'.format))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
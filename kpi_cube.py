@@ -0,0 +1,199 @@
+"""Materialized KPI cube over the deal fact table.
+
+The cube stores additive partial aggregates (counts, sums and sums of
+squares) per property city x property type x customer segment x month x deal
+status. Each of those dimensions has a bounded number of values, so the
+number of cells depends on the calendar span and not on how many deals there
+are. Brokers grow with the business, so deal counts per broker and status
+live in a separate narrow rollup rather than multiplying every cell. Because
+every measure is additive, appending deals only folds the new rows' partials
+into the existing cells, and every KPI chart is a roll-up of those cells
+instead of a groupby over every deal.
+"""
+import numpy as np
+import pandas as pd
+
+from filters import DATE_FILTER
+from group_stats import percentage
+
+# Fact table column for each dimension
+DIMENSIONS = {
+    'city': 'property_city',
+    'property_type': 'property_type',
+    'segment': 'segment',
+    'month': 'deal_date',
+    'status': 'status',
+    'broker_id': 'broker_id'
+}
+
+# Key of the cube cells, and of the per-broker rollup
+CELL_KEY = ['city', 'property_type', 'segment', 'month', 'status']
+BROKER_KEY = ['broker_id', 'status']
+
+# Additive measures for a numeric fact column: sum, non-null count and sum of squares
+VALUE_MEASURES = {
+    'ppsf': 'price_per_sqft',
+    'income': 'annual_income'
+}
+
+
+def _partials(facts, key, values=True):
+    """Aggregates of a block of fact rows, indexed by key"""
+    columns = {}
+    for name in key:
+        column = DIMENSIONS[name]
+        if column not in facts.columns:
+            columns[name] = pd.Series(np.nan, index=facts.index, dtype=object)
+        elif name == 'month':
+            columns[name] = pd.to_datetime(facts[column], errors='coerce').dt.to_period('M')
+        else:
+            columns[name] = facts[column]
+
+    columns['deals'] = np.ones(len(facts), dtype=np.int64)
+    for name, column in VALUE_MEASURES.items():
+        if not values or column not in facts.columns:
+            continue
+        measure = facts[column].to_numpy(dtype='float64', na_value=np.nan)
+        valid = np.isfinite(measure)
+        measure = np.where(valid, measure, 0.0)
+        columns[f"{name}_sum"] = measure
+        columns[f"{name}_count"] = valid.astype(np.int64)
+        columns[f"{name}_sumsq"] = measure * measure
+
+    frame = pd.DataFrame(columns, index=facts.index)
+    cells = frame.groupby(key, dropna=False, sort=False, observed=True).sum().reset_index()
+    # Plain object keys, so the cells of different blocks line up
+    for name in key:
+        if name == 'month':
+            cells[name] = cells[name].astype(str).where(cells[name].notna())
+        else:
+            cells[name] = cells[name].astype(object)
+    return cells.set_index(key)
+
+
+def _merge(cells, partials):
+    """Fold partials into cells in place, appending only keys cells does not have yet
+
+    Costs a lookup per partial cell rather than a regroup of the whole cube,
+    so folding in a block of deals takes the same time however many came
+    before it.
+    """
+    # A measure only one side has counts as zero on the other
+    for col in partials.columns.difference(cells.columns, sort=False):
+        cells[col] = np.zeros(len(cells), dtype=partials[col].dtype)
+    partials = partials.reindex(columns=cells.columns, fill_value=0)
+
+    positions = cells.index.get_indexer(partials.index)
+    found = positions >= 0
+    if found.any():
+        rows = positions[found]
+        for j, col in enumerate(cells.columns):
+            cells.iloc[rows, j] = cells.iloc[rows, j].to_numpy() + partials[col].to_numpy()[found]
+    if not found.all():
+        cells = pd.concat([cells, partials[~found]])
+    return cells
+
+
+def _rollup(frame, by):
+    """Sum frame's cells up to the by levels, with one deal count column per status"""
+    measures = list(frame.columns)
+    per_status = frame.groupby(level=by + ['status'], dropna=False, sort=False)[measures].sum()
+    known = per_status.index.get_level_values('status').notna()
+    if by:
+        rolled = per_status.groupby(level=by, sort=False)[measures].sum()
+        status_counts = per_status.loc[known, 'deals'].unstack('status', fill_value=0)
+    else:
+        rolled = per_status[measures].sum().to_frame().T
+        status_counts = per_status.loc[known, 'deals'].to_frame().T.set_axis(rolled.index)
+    status_counts = status_counts.add_prefix('status_')
+    return rolled.join(status_counts).fillna({col: 0 for col in status_counts.columns})
+
+
+class KPICube:
+    """Additive KPI aggregates keyed by city, property type, segment, month and status, plus per broker"""
+
+    def __init__(self, cells, brokers=None, selection=None):
+        self.cells = cells
+        self.brokers = brokers
+        self.selection = selection
+
+    @classmethod
+    def from_facts(cls, facts):
+        """Build the cube from the full fact table"""
+        brokers = _partials(facts, BROKER_KEY, values=False) if DIMENSIONS['broker_id'] in facts.columns else None
+        return cls(_partials(facts, CELL_KEY), brokers)
+
+    def copy(self):
+        return KPICube(self.cells.copy(), self.brokers.copy() if self.brokers is not None else None, self.selection)
+
+    @property
+    def statuses(self):
+        return list(self.cells.index.get_level_values('status').dropna().unique())
+
+    def has_dimension(self, name):
+        """True if any deal has a value for the dimension"""
+        frame = self.brokers if name == 'broker_id' else self.cells
+        return frame is not None and bool(frame.index.get_level_values(name).notna().any())
+
+    def update(self, new_facts):
+        """Fold newly appended deals into the cube, in place"""
+        self.cells = _merge(self.cells, _partials(new_facts, CELL_KEY))
+        if self.brokers is not None:
+            self.brokers = _merge(self.brokers, _partials(new_facts, BROKER_KEY, values=False))
+        return self
+
+    def filter(self, selection):
+        """Cube of the deals matching a sidebar selection, or None if the cells cannot tell
+
+        City, property type, segment and status filters select cells, and a
+        deal date range selects months when it covers whole months; any other
+        date range needs the deals themselves. The per-broker rollup can only
+        follow the status filter, so any other filter drops it.
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for name, chosen in selection.items():
+            if name == DATE_FILTER:
+                start, end = (pd.Timestamp(date) for date in chosen)
+                if start.day != 1 or not end.is_month_end:
+                    return None
+                name, chosen = 'month', pd.period_range(start, end, freq='M').astype(str)
+            elif name not in CELL_KEY:
+                return None
+            mask &= self.cells.index.get_level_values(name).isin(list(chosen))
+
+        brokers = None
+        if self.brokers is not None and set(selection) <= {'status'}:
+            brokers = self.brokers
+            if 'status' in selection:
+                brokers = brokers[brokers.index.get_level_values('status').isin(list(selection['status']))]
+        return KPICube(self.cells[mask], brokers, selection)
+
+    def rollup(self, by=None):
+        """Roll the cube up to the given dimensions, with derived rates and means
+
+        With no dimensions the result is a single row of grand totals.
+        Rolling up by broker_id reads the per-broker rollup, which carries
+        deal counts only.
+        """
+        by = [] if not by else [by] if isinstance(by, str) else list(by)
+        frame = self.brokers if 'broker_id' in by else self.cells
+        if frame is None:
+            raise KeyError("the cube has no per-broker rollup")
+        rolled = _rollup(frame, by)
+
+        if 'status_Closed' in rolled.columns:
+            rolled['closed'] = rolled['status_Closed']
+        else:
+            rolled['closed'] = 0
+        rolled['closure_rate'] = percentage(rolled['closed'], rolled['deals'])
+
+        for name in VALUE_MEASURES:
+            if f"{name}_sum" not in rolled.columns:
+                continue
+            count = rolled[f"{name}_count"].replace(0, np.nan)
+            mean = rolled[f"{name}_sum"] / count
+            variance = rolled[f"{name}_sumsq"] / count - mean ** 2
+            rolled[f"{name}_mean"] = mean
+            rolled[f"{name}_std"] = np.sqrt(variance.clip(lower=0))
+
+        return rolled
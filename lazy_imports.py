@@ -0,0 +1,64 @@
+"""Deferred imports for the heavy plotting and modelling libraries.
+
+``px = lazy_import('plotly.express')`` binds a placeholder that imports the
+real module the first time one of its attributes is used. A dashboard worker
+therefore only pays for Plotly when a page draws a chart, and for
+scikit-learn when a model is trained or loaded. Every import made through a
+placeholder is timed; import_report() lists what was loaded and what it cost.
+"""
+import importlib
+import sys
+import threading
+import time
+
+_lock = threading.RLock()
+_import_times = {}
+
+
+class LazyModule:
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    # A module someone else already imported costs nothing here
+                    cached = self._name in sys.modules
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    if not cached:
+                        _import_times[self._name] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        # Only called for names not found on the placeholder itself
+        if attr in ('_name', '_module'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Placeholder for module name, imported when first used"""
+    return LazyModule(name)
+
+
+def import_report():
+    """Modules imported through placeholders so far, slowest first, as (name, seconds) pairs"""
+    with _lock:
+        return sorted(_import_times.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,144 @@
+"""Persistent registry of trained RealEstateModels.
+
+Fitted models, scalers, feature lists and results are stored on disk under a
+key derived from a fingerprint of the training data plus the hyperparameters,
+so a model set is trained once per data/config change and then shared by
+every rerun, session and worker. Only the most recently saved entries are
+kept, so the registry does not grow with every data change.
+"""
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import joblib
+import pandas as pd
+import sklearn
+
+from models import DEFAULT_PARAMS, RealEstateModels
+
+REGISTRY_DIR = '.cache/models'
+LATEST_NAME = 'latest.json'
+REGISTRY_FORMAT = 3
+
+# Model sets kept on disk; older entries are removed when a new one is saved
+REGISTRY_KEEP = 3
+
+# Per-model results that are only used while training and are not saved
+UNSAVED_RESULTS = ('X_test',)
+
+
+def data_fingerprint(df):
+    """Content hash of a DataFrame, including its columns and dtypes"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def registry_key(df, params=None):
+    """Registry key for a model set trained on df with the given params"""
+    params = params if params is not None else DEFAULT_PARAMS
+    digest = hashlib.sha256()
+    digest.update(data_fingerprint(df).encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(f"{REGISTRY_FORMAT}:{sklearn.__version__}".encode())
+    return digest.hexdigest()[:32]
+
+
+def _entry_path(key, registry_dir):
+    return os.path.join(registry_dir, f"{key}.joblib")
+
+
+def prune_registry(registry_dir=REGISTRY_DIR, keep=REGISTRY_KEEP, current=None):
+    """Remove all but the keep most recently saved model sets (never current)"""
+    paths = sorted(glob.glob(os.path.join(registry_dir, '*.joblib')), key=os.path.getmtime, reverse=True)
+    others = 0
+    for path in paths:
+        if current is not None and path == _entry_path(current, registry_dir):
+            continue
+        others += 1
+        if others >= keep:
+            # Another worker may have removed it already; open readers keep their copy
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+
+def save_models(re_models, key, registry_dir=REGISTRY_DIR, keep=REGISTRY_KEEP):
+    """Write a trained model set to the registry, mark it as latest and prune older ones"""
+    os.makedirs(registry_dir, exist_ok=True)
+    results = {name: {field: value for field, value in result.items() if field not in UNSAVED_RESULTS}
+               for name, result in re_models.results.items()}
+    payload = {
+        'format': REGISTRY_FORMAT,
+        'params': re_models.params,
+        'models': re_models.models,
+        'results': results,
+        'timings': re_models.timings
+    }
+
+    # Write to a temp file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=registry_dir)
+    os.close(fd)
+    try:
+        joblib.dump(payload, tmp_path)
+        os.replace(tmp_path, _entry_path(key, registry_dir))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    latest_tmp = os.path.join(registry_dir, LATEST_NAME + '.tmp')
+    with open(latest_tmp, 'w') as f:
+        json.dump({'key': key}, f)
+    os.replace(latest_tmp, os.path.join(registry_dir, LATEST_NAME))
+    prune_registry(registry_dir, keep, current=key)
+
+
+def latest_key(registry_dir=REGISTRY_DIR):
+    """Key of the most recently registered model set, or None"""
+    try:
+        with open(os.path.join(registry_dir, LATEST_NAME)) as f:
+            return json.load(f)['key']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_models(key, df=None, registry_dir=REGISTRY_DIR):
+    """Load a registered model set, or None if the key is not registered"""
+    path = _entry_path(key, registry_dir)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        payload = joblib.load(path)
+    except Exception:
+        return None
+    if payload.get('format') != REGISTRY_FORMAT:
+        return None
+
+    re_models = RealEstateModels(df, payload['params'])
+    re_models.models = payload['models']
+    re_models.results = payload['results']
+    re_models.timings = payload.get('timings', {})
+    return re_models
+
+
+def get_or_train(df, params=None, key=None, registry_dir=REGISTRY_DIR):
+    """Load the model set for df/params from the registry, training it if missing"""
+    if key is None:
+        key = registry_key(df, params)
+    re_models = load_models(key, df, registry_dir)
+    if re_models is not None:
+        return re_models
+
+    re_models = RealEstateModels(df, params)
+    re_models.train_all_models()
+    try:
+        save_models(re_models, key, registry_dir)
+    except OSError:
+        # A read-only deployment still gets the freshly trained models
+        pass
+    return re_models
@@ -1,49 +1,229 @@
+import os
+import time
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_percentage_error
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from lazy_imports import lazy_import
 import warnings
 warnings.filterwarnings('ignore')
 
+# scikit-learn is imported the first time a model is trained
+model_selection = lazy_import('sklearn.model_selection')
+preprocessing = lazy_import('sklearn.preprocessing')
+linear_model = lazy_import('sklearn.linear_model')
+ensemble = lazy_import('sklearn.ensemble')
+metrics = lazy_import('sklearn.metrics')
+
+NUMERIC_FEATURES = [
+    'area_sqft', 'bedrooms', 'bathrooms', 'property_age_at_deal',
+    'experience_years', 'rating', 'hoa_fee', 'school_score', 
+    'walk_score', 'offer_price', 'loan_rate'
+]
+
+DEFAULT_PARAMS = {
+    'test_size': 0.2,
+    'random_state': 42,
+    'feature_dtype': 'float64',
+    'random_forest_regression': {
+        'n_estimators': 100,
+        'max_depth': 15,
+        'min_samples_split': 5
+    },
+    'status_classifier': {
+        'n_estimators': 100,
+        'max_depth': 10,
+        'min_samples_split': 5
+    }
+}
+
+# Trainer method for each model, in the order they are reported
+TRAINERS = {
+    'simple_regression': 'train_simple_regression',
+    'multiple_regression': 'train_multiple_regression',
+    'random_forest_regression': 'train_random_forest_regression',
+    'status_classifier': 'train_deal_status_classifier'
+}
+
+# Train/test split each trainer reads
+TASKS = {
+    'simple_regression': 'simple',
+    'multiple_regression': 'regression',
+    'random_forest_regression': 'regression',
+    'status_classifier': 'classification'
+}
+
+FOREST_MODELS = ['random_forest_regression', 'status_classifier']
+
+# Below this many rows, worker start-up costs more than training sequentially
+PARALLEL_MIN_ROWS = 50000
+
+# Rows scored per model.predict call in the batch prediction API
+DEFAULT_CHUNK_SIZE = 100000
+
+def iter_feature_chunks(data, features, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield float64 feature arrays from a DataFrame, a NumPy array or an iterable of dicts
+
+    NumPy input must hold either the model's features or all NUMERIC_FEATURES,
+    in that column order.
+    """
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            chunk = data.iloc[start:start + chunk_size]
+            yield chunk[features].to_numpy(dtype='float64', na_value=np.nan)
+    
+    elif isinstance(data, np.ndarray):
+        data = np.atleast_2d(data)
+        if data.shape[1] == len(features):
+            columns = slice(None)
+        elif data.shape[1] == len(NUMERIC_FEATURES):
+            columns = [NUMERIC_FEATURES.index(feature) for feature in features]
+        else:
+            raise ValueError(f"Expected {len(features)} or {len(NUMERIC_FEATURES)} feature columns, "
+                             f"got {data.shape[1]}")
+        for start in range(0, len(data), chunk_size):
+            yield np.asarray(data[start:start + chunk_size, columns], dtype='float64')
+    
+    else:
+        rows = iter(data)
+        while True:
+            batch = list(itertools.islice(rows, chunk_size))
+            if not batch:
+                break
+            yield np.array([[row[feature] for feature in features] for row in batch], dtype='float64')
+
+def fit_trendline(x, y):
+    """Closed-form least-squares line y = intercept + slope * x over x's range"""
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    dx = x - x.mean()
+    variance = np.dot(dx, dx)
+    slope = np.dot(dx, y - y.mean()) / variance if variance else 0.0
+    return {
+        'slope': float(slope),
+        'intercept': float(y.mean() - slope * x.mean()),
+        'x_range': (float(x.min()), float(x.max()))
+    }
+
+def plan_core_budget(max_cores=None):
+    """Split the core budget: the linear fits share one core, the forests split the rest"""
+    total = max_cores or os.cpu_count() or 1
+    forest_cores = max(1, (total - 1) // len(FOREST_MODELS))
+    return {name: forest_cores if name in FOREST_MODELS else 1 for name in TRAINERS}
+
+def _run_trainer(arrays, test_index, params, model_name, n_jobs):
+    """Train one model in a worker process and return its artifacts and timings
+
+    The worker gets only its task's split arrays and test row labels, never
+    the full feature matrix.
+    """
+    re_models = RealEstateModels(None, params, n_jobs=n_jobs)
+    re_models._split_arrays[TASKS[model_name]] = arrays
+    re_models._test_indexes[TASKS[model_name]] = test_index
+    re_models._timed_train(model_name)
+    return (model_name, re_models.models[model_name],
+            re_models.results[model_name], re_models.timings[model_name])
+
 class RealEstateModels:
-    def __init__(self, df_transformed):
+    def __init__(self, df_transformed, params=None, n_jobs=-1):
         self.df = df_transformed
+        self.params = params if params is not None else DEFAULT_PARAMS
+        self.n_jobs = n_jobs
         self.models = {}
         self.results = {}
-        
+        self.timings = {}
+        # Shared feature matrix, split row indices, gathered split arrays and test row labels
+        self._data = None
+        self._splits = {}
+        self._split_arrays = {}
+        self._test_indexes = {}
+    
+    def _feature_data(self):
+        """Build the feature matrix and targets once, shared by every trainer"""
+        if self._data is None:
+            dtype = self.params.get('feature_dtype', 'float64')
+            status = self.df['status'].to_numpy(dtype=object)
+            self._data = {
+                'X': np.ascontiguousarray(self.df[NUMERIC_FEATURES].to_numpy(dtype=dtype, na_value=np.nan)),
+                'price': self.df['final_price'].to_numpy(dtype='float64', na_value=np.nan),
+                'status': status,
+                'has_status': ~pd.isna(status),
+                'index': self.df.index.to_numpy()
+            }
+        return self._data
+    
+    def _split(self, task):
+        """Train/test row indices into the feature matrix for a task"""
+        if task not in self._splits:
+            data = self._feature_data()
+            X, price = data['X'], data['price']
+            
+            if task == 'simple':
+                valid = ~np.isnan(X[:, 0]) & ~np.isnan(price)
+            elif task == 'regression':
+                valid = ~np.isnan(X).any(axis=1) & ~np.isnan(price)
+            else:
+                valid = ~np.isnan(X).any(axis=1) & data['has_status']
+            rows = np.flatnonzero(valid)
+            
+            # Splitting row positions yields the same partition as splitting the frame
+            stratify = data['status'][rows] if task == 'classification' else None
+            self._splits[task] = model_selection.train_test_split(
+                rows, test_size=self.params['test_size'],
+                random_state=self.params['random_state'], stratify=stratify
+            )
+        return self._splits[task]
+    
+    def _arrays(self, task):
+        """X_train, X_test, y_train, y_test arrays for a task, gathered once
+
+        The task's rows are gathered into one contiguous block in train-then-test
+        order, so the train and test arrays are slices (views) of a single copy.
+        Tasks with different rows or splits each need their own block.
+        """
+        if task not in self._split_arrays:
+            data = self._feature_data()
+            train_rows, test_rows = self._split(task)
+            rows = np.concatenate([train_rows, test_rows])
+            X = data['X'][rows, :1] if task == 'simple' else data['X'][rows]
+            y = (data['status'] if task == 'classification' else data['price'])[rows]
+            n_train = len(train_rows)
+            self._split_arrays[task] = (X[:n_train], X[n_train:], y[:n_train], y[n_train:])
+        return self._split_arrays[task]
+    
+    def _test_index(self, task):
+        """Source row labels of a task's test rows"""
+        if task not in self._test_indexes:
+            self._test_indexes[task] = self._feature_data()['index'][self._split(task)[1]]
+        return self._test_indexes[task]
+    
+    def _test_frames(self, task, features, target):
+        """X_test/y_test as pandas objects, indexed like the source rows"""
+        _, X_test, _, y_test = self._arrays(task)
+        index = self._test_index(task)
+        return (pd.DataFrame(X_test, index=index, columns=features),
+                pd.Series(y_test, index=index, name=target))
+    
     def prepare_regression_data(self):
         """Prepare data for price prediction"""
-        numeric_features = [
-            'area_sqft', 'bedrooms', 'bathrooms', 'property_age_at_deal',
-            'experience_years', 'rating', 'hoa_fee', 'school_score', 
-            'walk_score', 'offer_price', 'loan_rate'
-        ]
-        
-        df_reg = self.df.dropna(subset=numeric_features + ['final_price'])
-        X = df_reg[numeric_features]
-        y = df_reg['final_price']
-        
-        return train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = self._arrays('regression')
+        train_rows, test_rows = self._split('regression')
+        index = self._feature_data()['index']
+        return (pd.DataFrame(X_train, index=index[train_rows], columns=NUMERIC_FEATURES),
+                pd.DataFrame(X_test, index=index[test_rows], columns=NUMERIC_FEATURES),
+                pd.Series(y_train, index=index[train_rows], name='final_price'),
+                pd.Series(y_test, index=index[test_rows], name='final_price'))
     
     def train_simple_regression(self):
         """Simple Linear Regression using only area_sqft"""
-        df_simple = self.df.dropna(subset=['area_sqft', 'final_price'])
-        X = df_simple[['area_sqft']]
-        y = df_simple['final_price']
-        
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        X_train, X_test, y_train, y_test = self._arrays('simple')
         
-        scaler = StandardScaler()
+        scaler = preprocessing.StandardScaler()
         X_train_scaled = scaler.fit_transform(X_train)
         X_test_scaled = scaler.transform(X_test)
         
-        model = LinearRegression()
+        model = linear_model.LinearRegression()
         model.fit(X_train_scaled, y_train)
         
         y_pred = model.predict(X_test_scaled)
@@ -54,26 +234,28 @@ class RealEstateModels:
             'features': ['area_sqft']
         }
         
+        X_test_df, y_test_series = self._test_frames('simple', ['area_sqft'], 'final_price')
         self.results['simple_regression'] = {
-            'r2': r2_score(y_test, y_pred),
-            'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
-            'mape': mean_absolute_percentage_error(y_test, y_pred),
-            'y_test': y_test,
+            'r2': metrics.r2_score(y_test, y_pred),
+            'rmse': np.sqrt(metrics.mean_squared_error(y_test, y_pred)),
+            'mape': metrics.mean_absolute_percentage_error(y_test, y_pred),
+            'y_test': y_test_series,
             'y_pred': y_pred,
-            'X_test': X_test
+            'X_test': X_test_df,
+            'trendline': fit_trendline(y_test, y_pred)
         }
         
         return self.results['simple_regression']
     
     def train_multiple_regression(self):
         """Multiple Linear Regression with all features"""
-        X_train, X_test, y_train, y_test = self.prepare_regression_data()
+        X_train, X_test, y_train, y_test = self._arrays('regression')
         
-        scaler = StandardScaler()
+        scaler = preprocessing.StandardScaler()
         X_train_scaled = scaler.fit_transform(X_train)
         X_test_scaled = scaler.transform(X_test)
         
-        model = LinearRegression()
+        model = linear_model.LinearRegression()
         model.fit(X_train_scaled, y_train)
         
         y_pred = model.predict(X_test_scaled)
@@ -81,37 +263,37 @@ class RealEstateModels:
         self.models['multiple_regression'] = {
             'model': model,
             'scaler': scaler,
-            'features': X_train.columns.tolist()
+            'features': list(NUMERIC_FEATURES)
         }
         
         # Feature importance (coefficients)
         feature_importance = pd.DataFrame({
-            'feature': X_train.columns,
+            'feature': NUMERIC_FEATURES,
             'coefficient': model.coef_
         }).sort_values('coefficient', key=abs, ascending=False)
         
+        X_test_df, y_test_series = self._test_frames('regression', NUMERIC_FEATURES, 'final_price')
         self.results['multiple_regression'] = {
-            'r2': r2_score(y_test, y_pred),
-            'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
-            'mape': mean_absolute_percentage_error(y_test, y_pred),
-            'y_test': y_test,
+            'r2': metrics.r2_score(y_test, y_pred),
+            'rmse': np.sqrt(metrics.mean_squared_error(y_test, y_pred)),
+            'mape': metrics.mean_absolute_percentage_error(y_test, y_pred),
+            'y_test': y_test_series,
             'y_pred': y_pred,
-            'X_test': X_test,
-            'feature_importance': feature_importance
+            'X_test': X_test_df,
+            'feature_importance': feature_importance,
+            'trendline': fit_trendline(y_test, y_pred)
         }
         
         return self.results['multiple_regression']
     
     def train_random_forest_regression(self):
         """Random Forest Regression for price prediction"""
-        X_train, X_test, y_train, y_test = self.prepare_regression_data()
-        
-        model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=15,
-            min_samples_split=5,
-            random_state=42,
-            n_jobs=-1
+        X_train, X_test, y_train, y_test = self._arrays('regression')
+        
+        model = ensemble.RandomForestRegressor(
+            **self.params['random_forest_regression'],
+            random_state=self.params['random_state'],
+            n_jobs=self.n_jobs
         )
         
         model.fit(X_train, y_train)
@@ -119,51 +301,47 @@ class RealEstateModels:
         
         self.models['random_forest_regression'] = {
             'model': model,
-            'features': X_train.columns.tolist()
+            'features': list(NUMERIC_FEATURES)
         }
         
         # Feature importance
         feature_importance = pd.DataFrame({
-            'feature': X_train.columns,
+            'feature': NUMERIC_FEATURES,
             'importance': model.feature_importances_
         }).sort_values('importance', ascending=False)
         
+        X_test_df, y_test_series = self._test_frames('regression', NUMERIC_FEATURES, 'final_price')
         self.results['random_forest_regression'] = {
-            'r2': r2_score(y_test, y_pred),
-            'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
-            'mape': mean_absolute_percentage_error(y_test, y_pred),
-            'y_test': y_test,
+            'r2': metrics.r2_score(y_test, y_pred),
+            'rmse': np.sqrt(metrics.mean_squared_error(y_test, y_pred)),
+            'mape': metrics.mean_absolute_percentage_error(y_test, y_pred),
+            'y_test': y_test_series,
             'y_pred': y_pred,
-            'X_test': X_test,
-            'feature_importance': feature_importance
+            'X_test': X_test_df,
+            'feature_importance': feature_importance,
+            'trendline': fit_trendline(y_test, y_pred)
         }
         
         return self.results['random_forest_regression']
     
     def prepare_classification_data(self):
         """Prepare data for deal status classification"""
-        numeric_features = [
-            'area_sqft', 'bedrooms', 'bathrooms', 'property_age_at_deal',
-            'experience_years', 'rating', 'hoa_fee', 'school_score', 
-            'walk_score', 'offer_price', 'loan_rate'
-        ]
-        
-        df_class = self.df.dropna(subset=numeric_features + ['status'])
-        X = df_class[numeric_features]
-        y = df_class['status']
-        
-        return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        X_train, X_test, y_train, y_test = self._arrays('classification')
+        train_rows, test_rows = self._split('classification')
+        index = self._feature_data()['index']
+        return (pd.DataFrame(X_train, index=index[train_rows], columns=NUMERIC_FEATURES),
+                pd.DataFrame(X_test, index=index[test_rows], columns=NUMERIC_FEATURES),
+                pd.Series(y_train, index=index[train_rows], name='status'),
+                pd.Series(y_test, index=index[test_rows], name='status'))
     
     def train_deal_status_classifier(self):
         """Random Forest Classifier for deal status prediction"""
-        X_train, X_test, y_train, y_test = self.prepare_classification_data()
-        
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
-            random_state=42,
-            n_jobs=-1
+        X_train, X_test, y_train, y_test = self._arrays('classification')
+        
+        model = ensemble.RandomForestClassifier(
+            **self.params['status_classifier'],
+            random_state=self.params['random_state'],
+            n_jobs=self.n_jobs
         )
         
         model.fit(X_train, y_train)
@@ -172,24 +350,25 @@ class RealEstateModels:
         
         self.models['status_classifier'] = {
             'model': model,
-            'features': X_train.columns.tolist(),
+            'features': list(NUMERIC_FEATURES),
             'classes': model.classes_.tolist()
         }
         
         # Feature importance
         feature_importance = pd.DataFrame({
-            'feature': X_train.columns,
+            'feature': NUMERIC_FEATURES,
             'importance': model.feature_importances_
         }).sort_values('importance', ascending=False)
         
+        X_test_df, y_test_series = self._test_frames('classification', NUMERIC_FEATURES, 'status')
         self.results['status_classifier'] = {
-            'accuracy': accuracy_score(y_test, y_pred),
-            'classification_report': classification_report(y_test, y_pred, output_dict=True),
-            'confusion_matrix': confusion_matrix(y_test, y_pred),
-            'y_test': y_test,
+            'accuracy': metrics.accuracy_score(y_test, y_pred),
+            'classification_report': metrics.classification_report(y_test, y_pred, output_dict=True),
+            'confusion_matrix': metrics.confusion_matrix(y_test, y_pred),
+            'y_test': y_test_series,
             'y_pred': y_pred,
             'y_pred_proba': y_pred_proba,
-            'X_test': X_test,
+            'X_test': X_test_df,
             'feature_importance': feature_importance,
             'classes': model.classes_
         }
@@ -198,60 +377,122 @@ class RealEstateModels:
     
     def predict_price(self, model_name, features_dict):
         """Predict price using trained model"""
+        return self.predict_price_batch(model_name, [features_dict])[0]
+    
+    def predict_status(self, features_dict):
+        """Predict deal status"""
+        batch = self.predict_status_batch([features_dict])
+        
+        return {
+            'predicted_status': batch['predicted_status'][0],
+            'probabilities': dict(zip(batch['classes'], batch['probabilities'][0]))
+        }
+    
+    def predict_price_batch(self, model_name, data, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Predict prices for many listings at once, returning a float64 array"""
         if model_name not in self.models:
             raise ValueError(f"Model {model_name} not trained yet")
         
         model_info = self.models[model_name]
         model = model_info['model']
-        features = model_info['features']
-        
-        # Create DataFrame with features
-        X = pd.DataFrame([features_dict])[features]
+        scaler = model_info.get('scaler')
         
-        # Scale if needed
-        if 'scaler' in model_info:
-            X = model_info['scaler'].transform(X)
+        predictions = []
+        for X in iter_feature_chunks(data, model_info['features'], chunk_size):
+            if scaler is not None:
+                X = scaler.transform(X)
+            predictions.append(model.predict(X))
         
-        prediction = model.predict(X)[0]
-        return prediction
+        if not predictions:
+            return np.empty(0, dtype='float64')
+        return np.concatenate(predictions).astype('float64', copy=False)
     
-    def predict_status(self, features_dict):
-        """Predict deal status"""
+    def predict_status_batch(self, data, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Predict deal status for many listings, returning labels and class probabilities"""
         if 'status_classifier' not in self.models:
             raise ValueError("Status classifier not trained yet")
         
         model_info = self.models['status_classifier']
         model = model_info['model']
-        features = model_info['features']
-        
-        X = pd.DataFrame([features_dict])[features]
+        classes = np.asarray(model_info['classes'], dtype=object)
         
-        prediction = model.predict(X)[0]
-        probabilities = model.predict_proba(X)[0]
+        # The forest's predicted label is the most probable class, so one pass gives both
+        probabilities = [model.predict_proba(X)
+                         for X in iter_feature_chunks(data, model_info['features'], chunk_size)]
+        probabilities = (np.concatenate(probabilities) if probabilities
+                         else np.empty((0, len(classes)), dtype='float64'))
         
         return {
-            'predicted_status': prediction,
-            'probabilities': dict(zip(model_info['classes'], probabilities))
+            'predicted_status': classes[probabilities.argmax(axis=1)],
+            'probabilities': probabilities,
+            'classes': model_info['classes']
+        }
+    
+    def _timed_train(self, model_name):
+        """Run one trainer, recording its wall and CPU time"""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        getattr(self, TRAINERS[model_name])()
+        self.timings[model_name] = {
+            'wall_time': time.perf_counter() - wall_start,
+            'cpu_time': time.process_time() - cpu_start,
+            'n_jobs': self.n_jobs
         }
     
-    def train_all_models(self):
-        """Train all models"""
-        print("Training Simple Linear Regression...")
-        self.train_simple_regression()
+    def _train_parallel(self, max_cores=None):
+        """Train every model concurrently on a process pool within a core budget"""
+        budget = plan_core_budget(max_cores)
+        # Start forests first so the slowest models are never queued behind the linear fits
+        order = FOREST_MODELS + [name for name in TRAINERS if name not in FOREST_MODELS]
+        
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(TRAINERS), mp_context=context) as pool:
+            # Gather each split once here; a worker receives only the arrays its model trains on
+            futures = {name: pool.submit(_run_trainer, self._arrays(TASKS[name]), self._test_index(TASKS[name]),
+                                         self.params, name, budget[name])
+                       for name in order}
+            for name in TRAINERS:
+                model_name, model_info, result, timing = futures[name].result()
+                self.models[model_name] = model_info
+                self.results[model_name] = result
+                self.timings[model_name] = timing
+    
+    def train_all_models(self, parallel=None, max_cores=None):
+        """Train all models, concurrently on a process pool when parallel (default: if worthwhile)"""
+        wall_start = time.perf_counter()
         
-        print("Training Multiple Linear Regression...")
-        self.train_multiple_regression()
+        if parallel is None:
+            cores = max_cores or os.cpu_count() or 1
+            parallel = cores > len(FOREST_MODELS) and len(self.df) >= PARALLEL_MIN_ROWS
         
-        print("Training Random Forest Regression...")
-        self.train_random_forest_regression()
+        if parallel:
+            try:
+                self._train_parallel(max_cores)
+            except (OSError, RuntimeError) as e:
+                # Fall back to in-process training when worker processes are unavailable
+                print(f"Parallel training unavailable ({e}), training sequentially...")
+                parallel = False
         
-        print("Training Deal Status Classifier...")
-        self.train_deal_status_classifier()
+        if not parallel:
+            for model_name in TRAINERS:
+                print(f"Training {model_name.replace('_', ' ').title()}...")
+                self._timed_train(model_name)
         
-        print("All models trained successfully!")
+        print(f"All models trained successfully in {time.perf_counter() - wall_start:.1f}s!")
         
         return self.results
     
+    def get_training_report(self):
+        """Wall and CPU time spent training each model"""
+        report = [{
+            'Model': model_name.replace('_', ' ').title(),
+            'Wall Time (s)': timing['wall_time'],
+            'CPU Time (s)': timing['cpu_time'],
+            'Cores': timing['n_jobs']
+        } for model_name, timing in self.timings.items()]
+        
+        return pd.DataFrame(report)
+    
     def get_model_comparison(self):
         """Compare regression models"""
         comparison = []
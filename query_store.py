@@ -0,0 +1,348 @@
+"""Query stores behind the dashboard pages.
+
+Pages ask a store for exactly what a chart needs (a row count, a top-N value
+count, histogram bins, per-group box statistics) instead of working on the
+full frames.
+SQLiteStore keeps the cleaned sheets in an on-disk SQLite database with
+indexes on the join and filter columns, so several dashboard workers share
+one copy; a sheet is only rewritten when its content digest changes, and a
+sheet that only gained rows at the end just has those rows inserted.
+FrameStore answers the same questions from in-memory DataFrames and is used
+when the database cannot be written.
+"""
+import collections
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from changes import frame_digest
+from chart_data import MAX_OUTLIERS, grouped_box_stats, histogram_bins
+from instrumentation import timed
+
+SQL_STORE_PATH = '.cache/curated.sqlite'
+INDEXED_COLUMNS = ['property_id', 'customer_id', 'broker_id', 'city', 'status', 'deal_date']
+META_TABLE = '_sheets'
+INSERT_BATCH_ROWS = 50000
+
+# Multiplicative hash of the rowid, a repeatable order for sampling outliers
+SAMPLE_ORDER = '(rowid * 2654435761) % 4294967291'
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _sql_rows(df):
+    """Rows of df as tuples of Python values SQLite can bind"""
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+        values = series.astype(object)
+        columns[name] = values.where(series.notna(), None)
+    converted = pd.DataFrame(columns, index=df.index)
+    for start in range(0, len(converted), INSERT_BATCH_ROWS):
+        yield from converted.iloc[start:start + INSERT_BATCH_ROWS].itertuples(index=False, name=None)
+
+
+class FrameStore:
+    """Store interface over in-memory DataFrames"""
+
+    def __init__(self, dataframes):
+        self.dataframes = dataframes
+
+    def tables(self):
+        return list(self.dataframes)
+
+    def columns(self, table):
+        return list(self.dataframes[table].columns)
+
+    @timed('row_count', stage='query')
+    def row_count(self, table, **equals):
+        """Rows of table, optionally only those where each column equals the given value"""
+        df = self.dataframes[table]
+        mask = np.ones(len(df), dtype=bool)
+        for column, value in equals.items():
+            mask &= (df[column] == value).to_numpy(dtype=bool, na_value=False)
+        return int(mask.sum())
+
+    @timed('value_counts', stage='query')
+    def value_counts(self, table, column, limit=None, by_value=False):
+        """Non-null value counts, largest first (or ordered by value)"""
+        counts = self.dataframes[table][column].value_counts()
+        counts = counts[counts > 0]
+        if by_value:
+            counts = counts.sort_index()
+        return counts.head(limit) if limit else counts
+
+    @timed('select', stage='query')
+    def select(self, table, columns=None, limit=None):
+        df = self.dataframes[table]
+        if columns is not None:
+            df = df[columns]
+        return df.head(limit) if limit else df
+
+    @timed('histogram', stage='query')
+    def histogram(self, table, column, bins=50):
+        """Bin edges and counts of the column's values"""
+        return histogram_bins(self.dataframes[table][column], bins)
+
+    @timed('box_stats', stage='query')
+    def box_stats(self, table, group, column, max_outliers=MAX_OUTLIERS):
+        """chart_data.box_stats of column for each value of group, in order of first appearance"""
+        df = self.dataframes[table]
+        return grouped_box_stats(df[group], df[column], max_outliers)
+
+
+class SQLiteStore:
+    """Store interface over an on-disk SQLite copy of the cleaned sheets"""
+
+    def __init__(self, path=SQL_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._synced = None
+        self._tables = []
+        self._columns = {}
+        # Reduced chart data, keyed by table, sheet digest and request
+        self._charts = {}
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # A connection per call keeps the store usable from every session thread
+        con = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            yield con
+        finally:
+            con.close()
+
+    def sync(self, dataframes, digests, hashes=None):
+        """Bring the database up to date, rewriting only sheets whose digest changed
+
+        With the sheets' row hashes (as ChangeTracker keeps them), a sheet
+        whose stored rows are its first rows only has the rest inserted.
+        """
+        hashes = hashes or {}
+        with self._lock:
+            if self._synced == digests:
+                return self
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._connect() as con:
+                con.execute('PRAGMA journal_mode=WAL')
+                con.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} "
+                            "(name TEXT PRIMARY KEY, digest TEXT, columns TEXT, position INTEGER, rows INTEGER)")
+                # Stores written before row counts were kept
+                if 'rows' not in [row[1] for row in con.execute(f"PRAGMA table_info({META_TABLE})")]:
+                    with contextlib.suppress(sqlite3.OperationalError):
+                        # Another worker may have added it since
+                        con.execute(f"ALTER TABLE {META_TABLE} ADD COLUMN rows INTEGER")
+                for position, (name, df) in enumerate(dataframes.items()):
+                    self._write_table(con, name, df, digests.get(name), position, hashes.get(name))
+
+                stale = [name for (name,) in con.execute(f"SELECT name FROM {META_TABLE}")
+                         if name not in dataframes]
+                for name in stale:
+                    con.execute('BEGIN IMMEDIATE')
+                    con.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+                    con.execute(f"DELETE FROM {META_TABLE} WHERE name = ?", (name,))
+                    con.execute('COMMIT')
+
+                rows = con.execute(f"SELECT name, columns FROM {META_TABLE} ORDER BY position").fetchall()
+            self._tables = [name for name, _ in rows]
+            self._columns = {name: json.loads(columns) for name, columns in rows}
+            self._synced = dict(digests)
+            self._charts = {key: value for key, value in self._charts.items() if digests.get(key[0]) == key[1]}
+        return self
+
+    def _write_table(self, con, name, df, digest, position, hashes=None):
+        # BEGIN IMMEDIATE serializes writers; another worker may have written this digest already
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            stored = con.execute(f"SELECT digest, columns, rows FROM {META_TABLE} WHERE name = ?",
+                                 (name,)).fetchone()
+            if digest is not None and stored is not None and stored[0] == digest:
+                con.execute(f"UPDATE {META_TABLE} SET position = ? WHERE name = ?", (position, name))
+                con.execute('COMMIT')
+                return
+
+            table = _quote(name)
+            columns = json.dumps([str(col) for col in df.columns])
+            # Rows appended to the sheet: the table already holds everything before them
+            start = 0
+            if (hashes is not None and stored is not None and stored[1] == columns and stored[2]
+                    and stored[2] < len(df) and stored[0] == frame_digest(df, hashes[:stored[2]])):
+                start = stored[2]
+            else:
+                con.execute(f"DROP TABLE IF EXISTS {table}")
+                column_defs = ', '.join(f"{_quote(col)} {_sql_type(df[col].dtype)}" for col in df.columns)
+                con.execute(f"CREATE TABLE {table} ({column_defs})")
+
+            placeholders = ', '.join('?' * len(df.columns))
+            con.executemany(f"INSERT INTO {table} VALUES ({placeholders})", _sql_rows(df.iloc[start:]))
+            if start == 0:
+                for column in INDEXED_COLUMNS:
+                    if column in df.columns:
+                        con.execute(f"CREATE INDEX {_quote(f'idx_{name}_{column}')} ON {table} ({_quote(column)})")
+            con.execute(f"INSERT OR REPLACE INTO {META_TABLE} (name, digest, columns, position, rows) "
+                        "VALUES (?, ?, ?, ?, ?)", (name, digest, columns, position, len(df)))
+            con.execute('COMMIT')
+        except Exception:
+            con.execute('ROLLBACK')
+            raise
+
+    def query(self, sql, params=()):
+        """Run a read-only query and return the result as a DataFrame"""
+        with self._connect() as con:
+            return pd.read_sql_query(sql, con, params=params)
+
+    def tables(self):
+        return list(self._tables)
+
+    def columns(self, table):
+        return list(self._columns[table])
+
+    @timed('row_count', stage='query')
+    def row_count(self, table, **equals):
+        """Rows of table, optionally only those where each column equals the given value"""
+        where = ' AND '.join(f"{_quote(column)} = ?" for column in equals)
+        sql = f"SELECT COUNT(*) FROM {_quote(table)}" + (f" WHERE {where}" if where else '')
+        with self._connect() as con:
+            return con.execute(sql, tuple(equals.values())).fetchone()[0]
+
+    @timed('value_counts', stage='query')
+    def value_counts(self, table, column, limit=None, by_value=False):
+        """Non-null value counts, largest first (or ordered by value)"""
+        col = _quote(column)
+        order = col if by_value else f"count DESC, {col}"
+        sql = (f"SELECT {col} AS value, COUNT(*) AS count FROM {_quote(table)} "
+               f"WHERE {col} IS NOT NULL GROUP BY {col} ORDER BY {order}")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        counts = self.query(sql)
+        return pd.Series(counts['count'].to_numpy(), index=pd.Index(counts['value'], name=column), name='count')
+
+    @timed('select', stage='query')
+    def select(self, table, columns=None, limit=None):
+        cols = ', '.join(_quote(col) for col in columns) if columns is not None else '*'
+        sql = f"SELECT {cols} FROM {_quote(table)}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql)
+
+    def _chart(self, table, request, reduce):
+        """reduce(), computed once per version of the table's sheet"""
+        digest = (self._synced or {}).get(table)
+        key = (table, digest, request)
+        with self._lock:
+            if digest is not None and key in self._charts:
+                return self._charts[key]
+        value = reduce()
+        if digest is not None:
+            with self._lock:
+                self._charts[key] = value
+        return value
+
+    @timed('histogram', stage='query')
+    def histogram(self, table, column, bins=50):
+        """Bin edges and counts of the column's values, binned by SQLite"""
+        return self._chart(table, ('histogram', column, bins), lambda: self._histogram(table, column, bins))
+
+    def _histogram(self, table, column, bins):
+        col, tbl = _quote(column), _quote(table)
+        with self._connect() as con:
+            low, high = con.execute(f"SELECT MIN({col}), MAX({col}) FROM {tbl} WHERE {col} IS NOT NULL").fetchone()
+            if low is None:
+                return np.empty(0), np.empty(0, dtype=np.int64)
+            low, high = float(low), float(high)
+            if high <= low:
+                # The range np.histogram uses for a single distinct value
+                low, high = low - 0.5, high + 0.5
+            rows = con.execute(f"SELECT MIN(CAST(({col} - ?) * ? AS INTEGER), ?) AS bin, COUNT(*) "
+                               f"FROM {tbl} WHERE {col} IS NOT NULL GROUP BY bin",
+                               (low, bins / (high - low), bins - 1)).fetchall()
+        counts = np.zeros(bins, dtype=np.int64)
+        for position, count in rows:
+            counts[position] = count
+        return np.linspace(low, high, bins + 1), counts
+
+    @timed('box_stats', stage='query')
+    def box_stats(self, table, group, column, max_outliers=MAX_OUTLIERS):
+        """chart_data.box_stats of column for each value of group, reduced by SQLite
+
+        Only the quartile ranks, per-group aggregates and a repeatable sample
+        of at most max_outliers outliers per group leave the database.
+        """
+        return self._chart(table, ('box_stats', group, column, max_outliers),
+                           lambda: self._box_stats(table, group, column, max_outliers))
+
+    def _box_stats(self, table, group, column, max_outliers):
+        grp, col, tbl = _quote(group), _quote(column), _quote(table)
+        rows = f"SELECT {grp} AS grp, {col} AS x, rowid FROM {tbl} WHERE {grp} IS NOT NULL AND {col} IS NOT NULL"
+        with self._connect() as con:
+            groups = con.execute(f"SELECT grp, COUNT(*), AVG(x) FROM ({rows}) "
+                                 "GROUP BY grp ORDER BY MIN(rowid)").fetchall()
+            if not groups:
+                return {}
+
+            # Quartiles interpolate linearly between neighbouring ranks, as np.percentile does
+            positions = {name: (count - 1) * np.array([0.25, 0.5, 0.75]) for name, count, _ in groups}
+            wanted = {(name, int(rank)) for name, ranks in positions.items()
+                      for position in ranks for rank in (np.floor(position), np.ceil(position))}
+            values = dict(((name, rank), x) for name, rank, x in con.execute(
+                f"WITH wanted(grp, r) AS (VALUES {', '.join(['(?, ?)'] * len(wanted))}) "
+                f"SELECT grp, r, x FROM (SELECT grp, x, ROW_NUMBER() OVER (PARTITION BY grp ORDER BY x) - 1 AS r "
+                f"FROM ({rows})) JOIN wanted USING (grp, r)",
+                [item for pair in wanted for item in pair]))
+
+            quartiles, fences = {}, []
+            for name, ranks in positions.items():
+                below = np.array([values[name, int(np.floor(rank))] for rank in ranks])
+                above = np.array([values[name, int(np.ceil(rank))] for rank in ranks])
+                quartiles[name] = below + (ranks - np.floor(ranks)) * (above - below)
+                q1, _, q3 = quartiles[name]
+                fences.extend([name, q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)])
+
+            fenced = (f"WITH fences(grp, low, high) AS (VALUES {', '.join(['(?, ?, ?)'] * len(groups))}) "
+                      f"SELECT grp, x, rowid, x < low OR x > high AS outside FROM ({rows}) JOIN fences USING (grp)")
+            whiskers = {name: row for name, *row in con.execute(
+                f"SELECT grp, MIN(CASE WHEN NOT outside THEN x END), MAX(CASE WHEN NOT outside THEN x END), "
+                f"SUM(outside), MIN(CASE WHEN outside THEN x END), MAX(CASE WHEN outside THEN x END) "
+                f"FROM ({fenced}) GROUP BY grp", fences)}
+            sample = collections.defaultdict(list)
+            for name, x in con.execute(
+                    f"SELECT grp, x FROM (SELECT grp, x, ROW_NUMBER() OVER (PARTITION BY grp ORDER BY {SAMPLE_ORDER}) "
+                    f"AS pick FROM ({fenced}) WHERE outside) WHERE pick <= ?", fences + [max_outliers]):
+                sample[name].append(x)
+
+        stats = {}
+        for name, count, mean in groups:
+            q1, median, q3 = quartiles[name]
+            lower, upper, outside, lowest, highest = whiskers[name]
+            outliers = sample[name]
+            if outside > max_outliers:
+                # Keep the extremes so the axis range matches the full data
+                outliers = [lowest, highest] + outliers[:max_outliers - 2]
+            stats[name] = {
+                'q1': q1,
+                'median': median,
+                'q3': q3,
+                'lowerfence': lower,
+                'upperfence': upper,
+                'mean': mean,
+                'count': count,
+                'outliers': np.array(outliers, dtype='float64')
+            }
+        return stats
@@ -0,0 +1,208 @@
+"""Batch scoring of listing files with a registered model set.
+
+Streams a CSV or Parquet file of listings through the trained models in
+bounded-memory chunks and appends predictions to the output file as it goes,
+so files larger than RAM score with constant memory:
+
+    python score.py listings.parquet scored.parquet --workers 4
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_registry import REGISTRY_DIR, latest_key, load_models
+
+DEFAULT_PRICE_MODEL = 'random_forest_regression'
+DEFAULT_CHUNK_SIZE = 50000
+
+# Model set loaded once per worker process by _init_worker
+_worker_models = None
+
+
+def _file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.csv', '.txt'):
+        return 'csv'
+    raise ValueError(f"Unsupported file type for {path}: use .csv or .parquet")
+
+
+def iter_input_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet file"""
+    if _file_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet output file
+
+    Chunks go to a hidden file next to path, which replaces path only once
+    every chunk is written; a run that fails part way removes it and leaves
+    any previous output untouched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _file_format(path)
+        directory, name = os.path.split(path)
+        self.partial_path = os.path.join(directory, f".{name}.partial")
+        self._parquet_writer = None
+        self._rows = 0
+
+    def write(self, chunk):
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._parquet_writer = pq.ParquetWriter(self.partial_path, table.schema)
+            else:
+                # Later chunks must match the schema fixed by the first one
+                table = pa.Table.from_pandas(chunk, schema=self._parquet_writer.schema,
+                                             preserve_index=False)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.partial_path, mode='w' if self._rows == 0 else 'a',
+                         header=self._rows == 0, index=False)
+        self._rows += len(chunk)
+
+    def close(self, complete=True):
+        """Finish the output file, or discard it if the run did not complete"""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if not os.path.exists(self.partial_path):
+            return
+        if complete:
+            os.replace(self.partial_path, self.path)
+        else:
+            os.remove(self.partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(complete=exc_type is None)
+
+
+def score_chunk(re_models, chunk, price_model=DEFAULT_PRICE_MODEL):
+    """Add predicted price, price per sqft, status and class probabilities to a chunk"""
+    features = re_models.models[price_model]['features']
+    status_features = re_models.models['status_classifier']['features']
+    classes = re_models.models['status_classifier']['classes']
+    missing = sorted(set(features + status_features) - set(chunk.columns))
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {', '.join(missing)}")
+
+    # Fixed dtypes, so a chunk with no complete rows has the same schema as any other
+    scored = chunk.copy()
+    scored['predicted_price'] = np.full(len(chunk), np.nan)
+    scored['price_per_sqft'] = np.full(len(chunk), np.nan)
+    scored['predicted_status'] = pd.Series(pd.NA, index=chunk.index, dtype='string')
+    for status_class in classes:
+        scored[f"prob_{status_class}"] = np.full(len(chunk), np.nan)
+
+    # Rows with incomplete features keep empty predictions instead of failing the chunk
+    complete = chunk[list(dict.fromkeys(features + status_features))].notna().all(axis=1).to_numpy()
+    if complete.any():
+        rows = chunk[complete]
+        prices = re_models.predict_price_batch(price_model, rows, chunk_size=len(rows))
+        status = re_models.predict_status_batch(rows, chunk_size=len(rows))
+
+        scored.loc[complete, 'predicted_price'] = prices
+        if 'area_sqft' in rows.columns:
+            scored.loc[complete, 'price_per_sqft'] = prices / rows['area_sqft'].to_numpy(dtype='float64')
+        scored.loc[complete, 'predicted_status'] = status['predicted_status']
+        for i, status_class in enumerate(classes):
+            scored.loc[complete, f"prob_{status_class}"] = status['probabilities'][:, i]
+
+    return scored
+
+
+def _init_worker(model_key, registry_dir):
+    global _worker_models
+    _worker_models = load_models(model_key, registry_dir=registry_dir)
+
+
+def _score_in_worker(chunk, price_model):
+    return score_chunk(_worker_models, chunk, price_model)
+
+
+def score_file(input_path, output_path, model_key, registry_dir=REGISTRY_DIR,
+               price_model=DEFAULT_PRICE_MODEL, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """Score input_path into output_path chunk by chunk, returning the number of rows"""
+    re_models = load_models(model_key, registry_dir=registry_dir)
+    if re_models is None:
+        raise ValueError(f"Model set {model_key} is not in the registry at {registry_dir}")
+    if price_model not in re_models.models:
+        raise ValueError(f"Model {price_model} is not part of model set {model_key}")
+
+    rows = 0
+    with ChunkWriter(output_path) as writer:
+        if workers <= 1:
+            for chunk in iter_input_chunks(input_path, chunk_size):
+                writer.write(score_chunk(re_models, chunk, price_model))
+                rows += len(chunk)
+            return rows
+
+        # Keep a bounded number of chunks in flight and write them back in input order
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_key, registry_dir)) as pool:
+            pending = collections.deque()
+            for chunk in iter_input_chunks(input_path, chunk_size):
+                pending.append(pool.submit(_score_in_worker, chunk, price_model))
+                if len(pending) >= 2 * workers:
+                    scored = pending.popleft().result()
+                    writer.write(scored)
+                    rows += len(scored)
+            while pending:
+                scored = pending.popleft().result()
+                writer.write(scored)
+                rows += len(scored)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a listings file with a registered model set")
+    parser.add_argument('input', help="CSV or Parquet file of listings")
+    parser.add_argument('output', help="CSV or Parquet file to write predictions to")
+    parser.add_argument('--model-key', help="Registry key of the model set (default: latest)")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR, help="Model registry directory")
+    parser.add_argument('--price-model', default=DEFAULT_PRICE_MODEL,
+                        choices=['simple_regression', 'multiple_regression', 'random_forest_regression'],
+                        help="Regression model used for predicted_price")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for scoring")
+    args = parser.parse_args(argv)
+
+    model_key = args.model_key or latest_key(args.registry_dir)
+    if model_key is None:
+        print(f"No registered model set found in {args.registry_dir}. "
+              "Open the Predictive Models page once to train one.", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    try:
+        rows = score_file(args.input, args.output, model_key, args.registry_dir,
+                          args.price_model, args.chunk_size, args.workers)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Scored {rows:,} rows with model set {model_key} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+"""Columnar snapshot cache for the curation workbook.
+
+Parsing the workbook with openpyxl dominates cold starts once the Deals sheet
+grows, so every sheet is written once to Parquet next to a manifest that
+records the workbook's mtime, size and content hash. Later loads read the
+snapshot instead of the workbook whenever the source has not changed.
+
+Prebuild the snapshot during deploys with:
+
+    python snapshot.py --workbook data/real_estate_curation_project.xlsx
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+WORKBOOK_PATH = 'data/real_estate_curation_project.xlsx'
+SNAPSHOT_DIR = '.cache/snapshot'
+MANIFEST_NAME = 'manifest.json'
+SNAPSHOT_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_fingerprint(path=WORKBOOK_PATH):
+    """Fingerprint the workbook by mtime, size and content hash"""
+    stat = os.stat(path)
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': file_digest(path)
+    }
+
+
+def _read_manifest(snapshot_dir):
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(snapshot_dir, manifest):
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def snapshot_is_current(path=WORKBOOK_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """Return the manifest if the snapshot matches the workbook, else None"""
+    manifest = _read_manifest(snapshot_dir)
+    if manifest is None or not os.path.exists(path):
+        return None
+
+    source = manifest['source']
+    stat = os.stat(path)
+    if stat.st_size != source['size']:
+        return None
+
+    # Same mtime and size: trust the snapshot without hashing the workbook
+    if stat.st_mtime_ns == source['mtime_ns']:
+        return manifest
+
+    # Touched but possibly unchanged: fall back to the content hash
+    if file_digest(path) != source['sha256']:
+        return None
+
+    source['mtime_ns'] = stat.st_mtime_ns
+    try:
+        _write_manifest(snapshot_dir, manifest)
+    except OSError:
+        pass
+    return manifest
+
+
+def _write_sheet(df, directory, name):
+    """Write one sheet as Parquet, falling back to pickle for mixed-type columns"""
+    parquet_file = f"{name}.parquet"
+    try:
+        df.to_parquet(os.path.join(directory, parquet_file), index=False)
+        return {'file': parquet_file, 'format': 'parquet'}
+    except Exception:
+        pickle_file = f"{name}.pkl"
+        df.to_pickle(os.path.join(directory, pickle_file))
+        return {'file': pickle_file, 'format': 'pickle'}
+
+
+def _read_sheet(directory, entry):
+    path = os.path.join(directory, entry['file'])
+    if entry['format'] == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def load_snapshot(path=WORKBOOK_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """Load all sheets from the snapshot, or None if it is missing or stale"""
+    manifest = snapshot_is_current(path, snapshot_dir)
+    if manifest is None:
+        return None
+
+    try:
+        return {name: _read_sheet(snapshot_dir, entry)
+                for name, entry in manifest['sheets'].items()}
+    except Exception:
+        return None
+
+
+def build_snapshot(path=WORKBOOK_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """Parse the workbook and write every sheet to a fresh snapshot"""
+    fingerprint = workbook_fingerprint(path)
+    dataframes = pd.read_excel(path, sheet_name=None, engine='openpyxl')
+
+    parent = os.path.dirname(os.path.abspath(snapshot_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='.snapshot-', dir=parent)
+    try:
+        sheets = {}
+        for index, (name, df) in enumerate(dataframes.items()):
+            sheets[name] = _write_sheet(df, staging_dir, f"sheet_{index}")
+
+        _write_manifest(staging_dir, {
+            'version': SNAPSHOT_VERSION,
+            'source': fingerprint,
+            'sheets': sheets,
+            'created_at': time.time()
+        })
+
+        # Swap the staged snapshot in so readers never see a partial one
+        if os.path.exists(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+        os.replace(staging_dir, snapshot_dir)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return dataframes
+
+
+def load_workbook(path=WORKBOOK_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """Load every sheet, preferring an up-to-date columnar snapshot"""
+    dataframes = load_snapshot(path, snapshot_dir)
+    if dataframes is not None:
+        return dataframes
+
+    try:
+        return build_snapshot(path, snapshot_dir)
+    except OSError:
+        # Read-only deployments still get the data, just without a snapshot
+        return pd.read_excel(path, sheet_name=None, engine='openpyxl')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prebuild the columnar snapshot of the curation workbook")
+    parser.add_argument('--workbook', default=WORKBOOK_PATH, help="Path to the Excel workbook")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR, help="Directory for the snapshot files")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the snapshot is current")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if not args.force and snapshot_is_current(args.workbook, args.snapshot_dir) is not None:
+        print(f"Snapshot at {args.snapshot_dir} is up to date")
+        return 0
+
+    dataframes = build_snapshot(args.workbook, args.snapshot_dir)
+    elapsed = time.perf_counter() - start
+    for name, df in dataframes.items():
+        print(f"  {name}: {len(df):,} rows x {len(df.columns)} columns")
+    print(f"Snapshot written to {args.snapshot_dir} in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
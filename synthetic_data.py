@@ -0,0 +1,215 @@
+"""Synthetic curation workbook at any scale.
+
+generate_workbook() builds the five sheets of the production workbook with
+its columns, dtypes and value ranges, for any number of deals. Every deal
+references an existing property, customer and broker. Prices follow the
+property's city, type and size, so the KPIs and models have signal to find.
+City names carry the same kinds of misspellings as the real export
+('mumbay ', ' Surrat', 'Calcutta', 'Nodia'), and a share of deal statuses is
+misspelled too. The dashboard does not clean statuses, so those misspellings
+show up as their own categories, as they would in a dirty export.
+
+Dimension sheets grow with the deal count in the production workbook's
+proportions, capped so each still fits in an Excel sheet:
+
+    python synthetic_data.py --deals 100000 --out data/real_estate_curation_project.xlsx
+    python synthetic_data.py --deals 10000000 --partitions data/deals --out data/real_estate_curation_project.xlsx
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SHEETS = ['Customers', 'Brokers', 'Properties', 'PropertyDetails', 'Deals']
+
+# Rows an Excel sheet can hold, less the header
+EXCEL_MAX_ROWS = 1048575
+
+# Production workbook proportions: 2,000 deals, 500 customers, 1,000 properties, 50 brokers
+DEALS_PER_CUSTOMER = 4
+DEALS_PER_PROPERTY = 2
+DEALS_PER_BROKER = 40
+MAX_DIMENSION_ROWS = 1000000
+MAX_BROKERS = 10000
+
+# City -> (price per sqft base, misspellings seen in exports)
+CITIES = {
+    'Mumbai': (5200, ['mumbay ', 'Mumbaai', 'MUMBAI']),
+    'Delhi': (4300, ['Dehli', 'New Delhi']),
+    'Kolkata': (3000, ['Calcutta', 'Kalkata']),
+    'Noida': (3300, ['Nodia']),
+    'Surat': (2700, [' Surrat', 'surat']),
+    'Pune': (3900, ['Poona', 'pune ']),
+    'Jaipur': (2900, ['Jaypur']),
+    'Chennai': (3600, ['Chennnai', 'chennai'])
+}
+PROPERTY_TYPES = {'Flat': 1.0, 'Villa': 1.35, 'Plot': 0.7}
+STATUSES = {'Closed': 0.59, 'Pending': 0.27, 'Cancelled': 0.14}
+STATUS_MISSPELLINGS = {
+    'Closed': ['closed', 'Closed ', 'CLOSED'],
+    'Pending': ['pending', ' Pending'],
+    'Cancelled': ['Canceled', 'cancelled']
+}
+DEAL_DATES = ('2021-01-01', '2023-09-30')
+
+
+def _spell(rng, codes, names, misspellings, rate, min_repeats=1):
+    """Object array of names[codes], with about rate of the rows replaced by a misspelling
+
+    A misspelling drawn for fewer than min_repeats rows is spelled correctly
+    instead, so every spelling that does appear appears at least that often.
+    """
+    spellings = np.array(list(names) + [variant for name in names for variant in misspellings.get(name, [])],
+                         dtype=object)
+    counts = np.array([len(misspellings.get(name, [])) for name in names])
+    starts = len(names) + np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    index = codes.copy()
+    misspelled = (rng.random(len(codes)) < rate) & (counts[codes] > 0)
+    rows = np.flatnonzero(misspelled)
+    index[rows] = starts[codes[rows]] + (rng.random(len(rows)) * counts[codes[rows]]).astype(np.int64)
+    if min_repeats > 1:
+        used = np.bincount(index, minlength=len(spellings))
+        rare = (used > 0) & (used < min_repeats)
+        rare[:len(names)] = False
+        reverted = rare[index]
+        index[reverted] = codes[reverted]
+    return spellings[index]
+
+
+def _cities(rng, size, rate):
+    codes = rng.integers(0, len(CITIES), size)
+    names = list(CITIES)
+    return codes, _spell(rng, codes, names, {name: CITIES[name][1] for name in names}, rate)
+
+
+def generate_workbook(deals=10000, customers=None, properties=None, brokers=None,
+                      city_typo_rate=0.3, status_typo_rate=0.01, seed=0):
+    """The five curation sheets with the given number of deals, as a dict of DataFrames"""
+    rng = np.random.default_rng(seed)
+    customers = customers or max(1, min(deals // DEALS_PER_CUSTOMER, MAX_DIMENSION_ROWS))
+    properties = properties or max(1, min(deals // DEALS_PER_PROPERTY, MAX_DIMENSION_ROWS))
+    brokers = brokers or max(1, min(deals // DEALS_PER_BROKER, MAX_BROKERS))
+    sheets = {}
+
+    _, city = _cities(rng, customers, city_typo_rate)
+    sheets['Customers'] = pd.DataFrame({
+        'customer_id': np.arange(1, customers + 1),
+        'name': 'c',
+        'city': city,
+        'segment': np.array(['Low', 'Mid', 'High'], dtype=object)[rng.integers(0, 3, customers)],
+        'annual_income': rng.uniform(500000, 1500000, customers)
+    })
+
+    _, city = _cities(rng, brokers, city_typo_rate)
+    sheets['Brokers'] = pd.DataFrame({
+        'broker_id': np.arange(1, brokers + 1),
+        'agency': np.array(['A', 'B', 'C'], dtype=object)[rng.integers(0, 3, brokers)],
+        'city': city,
+        'experience_years': rng.integers(0, 30, brokers),
+        'rating': np.round(rng.uniform(1.0, 5.0, brokers), 1)
+    })
+
+    property_city, city = _cities(rng, properties, city_typo_rate)
+    property_type = rng.integers(0, len(PROPERTY_TYPES), properties)
+    area_sqft = rng.integers(500, 5000, properties)
+    sheets['Properties'] = pd.DataFrame({
+        'property_id': np.arange(1, properties + 1),
+        'city': city,
+        'property_type': np.array(list(PROPERTY_TYPES), dtype=object)[property_type],
+        'area_sqft': area_sqft,
+        'bedrooms': rng.integers(1, 6, properties),
+        'bathrooms': rng.integers(1, 4, properties),
+        'year_built': rng.integers(1980, 2020, properties)
+    })
+
+    sheets['PropertyDetails'] = pd.DataFrame({
+        'property_id': np.arange(1, properties + 1),
+        'hoa_fee': rng.integers(1, 10000, properties),
+        'school_score': rng.integers(0, 100, properties),
+        'walk_score': rng.integers(0, 100, properties),
+        'condition': np.array(['New', 'Good', 'Fair'], dtype=object)[rng.integers(0, 3, properties)]
+    })
+
+    # Deals reference existing rows; a deal is in its property's city
+    property_index = rng.integers(0, properties, deals)
+    deal_city = property_city[property_index]
+    base_ppsf = np.array([CITIES[name][0] for name in CITIES])[deal_city]
+    type_factor = np.array(list(PROPERTY_TYPES.values()))[property_type[property_index]]
+    offer_price = area_sqft[property_index] * base_ppsf * type_factor * rng.lognormal(0, 0.15, deals)
+
+    start, end = (np.datetime64(date, 'D') for date in DEAL_DATES)
+    deal_date = start + rng.integers(0, (end - start).astype(int) + 1, deals).astype('timedelta64[D]')
+    status = rng.choice(len(STATUSES), deals, p=list(STATUSES.values()))
+
+    sheets['Deals'] = pd.DataFrame({
+        'deal_id': np.arange(1, deals + 1),
+        'property_id': property_index + 1,
+        'customer_id': rng.integers(1, customers + 1, deals),
+        'broker_id': rng.integers(1, brokers + 1, deals),
+        'city': _spell(rng, deal_city, list(CITIES), {name: CITIES[name][1] for name in CITIES}, city_typo_rate),
+        'deal_date': deal_date.astype('datetime64[ns]'),
+        'offer_price': offer_price,
+        'final_price': offer_price * rng.uniform(0.9, 1.05, deals),
+        # A stratified train/test split needs every status label at least twice
+        'status': _spell(rng, status, list(STATUSES), STATUS_MISSPELLINGS, status_typo_rate, min_repeats=2),
+        'mortgage': np.array(['Yes', 'No'], dtype=object)[rng.integers(0, 2, deals)],
+        'loan_rate': rng.uniform(6, 12, deals)
+    })
+    return {name: sheets[name] for name in SHEETS}
+
+
+def write_workbook(dataframes, path):
+    """Write the sheets to an Excel workbook"""
+    for name, df in dataframes.items():
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"{name} has {len(df):,} rows, more than an Excel sheet holds; "
+                             "write the deals as partitions instead")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for name, df in dataframes.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+
+def write_partitions(deals, directory, rows_per_file=1000000):
+    """Write deals as Parquet partitions for out-of-core ingestion; returns the files written"""
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for part, start in enumerate(range(0, len(deals), rows_per_file)):
+        path = os.path.join(directory, f"deals-{part:05d}.parquet")
+        deals.iloc[start:start + rows_per_file].to_parquet(path, index=False)
+        files.append(path)
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic curation workbook")
+    parser.add_argument('--deals', type=int, default=10000)
+    parser.add_argument('--customers', type=int, help="Defaults to one per four deals")
+    parser.add_argument('--properties', type=int, help="Defaults to one per two deals")
+    parser.add_argument('--brokers', type=int, help="Defaults to one per forty deals")
+    parser.add_argument('--city-typo-rate', type=float, default=0.3)
+    parser.add_argument('--status-typo-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='data/real_estate_curation_project.xlsx', help="Workbook to write")
+    parser.add_argument('--partitions', help="Write deals here as Parquet partitions, leaving them out of the workbook")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    dataframes = generate_workbook(args.deals, args.customers, args.properties, args.brokers,
+                                   args.city_typo_rate, args.status_typo_rate, args.seed)
+    for name, df in dataframes.items():
+        print(f"  {name}: {len(df):,} rows")
+
+    if args.partitions:
+        files = write_partitions(dataframes.pop('Deals'), args.partitions)
+        print(f"Deals written to {len(files)} partitions in {args.partitions}")
+    write_workbook(dataframes, args.out)
+    print(f"Workbook written to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
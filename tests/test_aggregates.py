@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import DealsSummary, StreamingHistogram
+from compaction import compact_frame
+from ingest import iter_deal_chunks, value_ranges
+
+
+def _blocks(values, size):
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def test_streamed_histogram_with_range_matches_in_memory():
+    values = np.random.default_rng(0).lognormal(12, 0.5, 5000)
+    in_memory = StreamingHistogram(50).add(values)
+
+    streamed = StreamingHistogram(50, (values.min(), values.max()))
+    for block in _blocks(values, 700):
+        streamed.add(block)
+
+    np.testing.assert_array_equal(streamed.edges, in_memory.edges)
+    np.testing.assert_array_equal(streamed.counts, in_memory.counts)
+
+
+@pytest.mark.parametrize('order', ['ascending', 'descending', 'shuffled'])
+def test_streamed_histogram_grows_without_losing_values(order):
+    values = np.random.default_rng(1).lognormal(12, 0.5, 5000)
+    if order == 'ascending':
+        values = np.sort(values)
+    elif order == 'descending':
+        values = np.sort(values)[::-1]
+
+    streamed = StreamingHistogram(50)
+    for block in _blocks(values, 700):
+        streamed.add(block)
+
+    assert streamed.counts.sum() == len(values)
+    assert streamed.edges[0] >= 0
+    assert streamed.edges[0] <= values.min() and streamed.edges[-1] >= values.max()
+    assert len(streamed.counts) <= 50
+    assert len(streamed.counts) >= 25
+
+
+def test_ingested_summary_matches_in_memory(tmp_path):
+    rng = np.random.default_rng(2)
+    deals = pd.DataFrame({
+        'deal_id': np.arange(3000),
+        'offer_price': rng.lognormal(12, 0.5, 3000),
+        'final_price': rng.lognormal(12, 0.5, 3000),
+        'loan_rate': rng.uniform(2, 8, 3000)
+    })
+    deals.iloc[:1500].to_parquet(tmp_path / 'part-0.parquet', row_group_size=400)
+    deals.iloc[1500:].to_csv(tmp_path / 'part-1.csv', index=False)
+
+    in_memory = DealsSummary().add(compact_frame(deals))
+    streamed = DealsSummary(value_ranges(DealsSummary.HISTOGRAMS, str(tmp_path)))
+    for chunk in iter_deal_chunks(str(tmp_path), chunk_size=700):
+        streamed.add(compact_frame(chunk))
+
+    for column, histogram in in_memory.histograms.items():
+        np.testing.assert_allclose(streamed.histograms[column].edges, histogram.edges)
+        np.testing.assert_array_equal(streamed.histograms[column].counts, histogram.counts)